@@ -0,0 +1,53 @@
+"""Run the benchmark suite.
+
+Run from the source root::
+
+    python -m benchmarks --save baseline.json
+    python -m benchmarks --compare baseline.json
+
+Exit status is 1 when some case regressed against the baseline.
+"""
+import argparse
+import sys
+
+from . import suite
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m benchmarks')
+    parser.add_argument('-k', dest='pattern',
+                        help='run cases with names matching the regexp')
+    parser.add_argument('--quick', action='store_true',
+                        help='time a single call, skip the biggest sizes; '
+                        'only memory is compared with the baseline')
+    parser.add_argument('--save', metavar='FILE',
+                        help='store results as JSON')
+    parser.add_argument('--compare', metavar='FILE',
+                        help='compare results with saved baseline')
+    parser.add_argument('--threshold', type=float, default=0.2,
+                        help='allowed relative slowdown, 0.2 by default')
+    args = parser.parse_args(argv)
+
+    baseline = suite.load(args.compare) if args.compare else {}
+
+    def report(name, result):
+        line = '{:<24} {:>14,.0f} ops/sec {:>14,} bytes'.format(
+            name, result['ops'], result['peak'])
+        base = baseline.get(name)
+        if base is not None and not args.quick:
+            line += '  {:+.0%}'.format(result['ops'] / base['ops'] - 1)
+        print(line)
+        sys.stdout.flush()
+
+    results = suite.run(args.pattern, args.quick, report)
+    if args.save:
+        suite.save(results, args.save)
+    regressions = suite.compare(results, baseline, args.threshold,
+                                not args.quick)
+    for name, message in regressions:
+        print('REGRESSION {}: {}'.format(name, message))
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,612 @@
+"""Benchmarks of the library hot paths.
+
+Every case prepares its data and returns a function to be timed; one
+call of the function is one operation.  Results are mappings of case
+name to ``{'ops': ops/sec, 'peak': bytes}`` where peak is the memory
+allocated by a single call, as seen by tracemalloc.
+"""
+import gc
+import json
+import re
+import timeit
+import tracemalloc
+import types
+
+from steward import (Component, Field, FieldArray, FieldComp, FieldList,
+                     FieldDict)
+from steward.interning import Interner
+
+
+SIZES = (10, 1000, 100000, 1000000)
+QUICK_SIZES = (10, 1000)
+DEPTHS = (1, 5, 20)
+
+CASES = []
+
+
+def case(name, params=None):
+    """Register case factory, called once per item of `params`."""
+    def deco(make):
+        if params is None:
+            CASES.append((name, make, None))
+        else:
+            for param in params:
+                CASES.append(('{}[{}]'.format(name, param), make, param))
+        return make
+    return deco
+
+
+class Point(Component):
+    x = Field()
+    y = Field()
+    label = Field(default='')
+    tags = Field(maker=list)
+
+
+class Item(Component):
+    id = Field()
+    name = Field(default='')
+
+
+class Bag(Component):
+    items = FieldList(Item)
+    index = FieldDict(Item)
+
+
+class Shape(Component):
+    origin = FieldComp(Point)
+    name = Field()
+
+
+class SlotsPoint:
+    # plain class to compare construction of components with
+    __slots__ = ('x', 'y', 'label', 'tags')
+
+    def __init__(self, x, y, label='', tags=None):
+        self.x = x
+        self.y = y
+        self.label = label
+        self.tags = [] if tags is None else tags
+
+
+class Record(Component):
+    id = Field()
+    name = Field()
+    price = Field(default=0)
+    note = Field(default=None)
+
+
+class CompactRecord(Component, compact=True):
+    id = Field()
+    name = Field()
+    price = Field(default=0)
+    note = Field(default=None)
+
+
+class Order(Component):
+    id = Field()
+    customer = Field()
+    items = FieldList(Item)
+
+
+class Section(Component):
+    name = Field()
+    leaves = FieldList(Item)
+
+
+class Config(Component):
+    version = Field()
+    main = FieldComp(Section)
+    extra = FieldList(Section)
+
+
+class Series(Component):
+    samples = Field()
+
+
+class ArraySeries(Component):
+    samples = FieldArray('d')
+
+
+class Address(Component):
+    city = Field()
+    street = Field()
+    country = Field(default='UA')
+
+
+class Customer(Component):
+    id = Field()
+    address = FieldComp(Address)
+    billing = FieldComp(Address)
+
+
+def _chain(depth):
+    plainval = {'value': 0}
+    for i in range(1, depth + 1):
+        plainval = {'value': i, 'child': plainval}
+    return plainval
+
+
+def _nested(depth):
+    # FieldComp needs a concrete type, build a class per level
+    def body(child):
+        def ret(ns):
+            ns['value'] = Field()
+            if child is not None:
+                ns['child'] = FieldComp(child)
+        return ret
+
+    cls = types.new_class('Leaf', (Component,), exec_body=body(None))
+    for i in range(depth):
+        cls = types.new_class('Node{}'.format(i), (Component,),
+                              exec_body=body(cls))
+    return cls
+
+
+def _bag(size):
+    # items share one plain dict to keep memory of big lists bounded,
+    # wrappers are still built per index
+    item = {'id': 1, 'name': 'item'}
+    return Bag.from_plain({'items': [item] * size,
+                           'index': {str(i): {'id': i} for i in range(100)}})
+
+
+@case('init.defaults')
+def _init_defaults(param):
+    return lambda: Point(x=1, y=2)
+
+
+@case('init.generic')
+def _init_generic(param):
+    def func():
+        self = object.__new__(Point)
+        Component.__init__(self, x=1, y=2)
+    return func
+
+
+@case('init.slots')
+def _init_slots(param):
+    return lambda: SlotsPoint(x=1, y=2)
+
+
+@case('init.nested')
+def _init_nested(param):
+    return lambda: Shape(origin=Point(x=1, y=2), name='s')
+
+
+@case('from_plain')
+def _from_plain(param):
+    plainval = {'x': 1, 'y': 2}
+    return lambda: Point.from_plain(plainval)
+
+
+@case('from_plain.validate')
+def _from_plain_validate(param):
+    plainval = {'x': 1, 'y': 2}
+    return lambda: Point.from_plain(plainval, validate=True)
+
+
+@case('batch.decode', ('loop', 'many'))
+def _batch_decode(mode):
+    # a page of records, every one validated and read
+    page = [{'id': i, 'name': 'item{}'.format(i)} for i in range(10000)]
+    if mode == 'many':
+        return lambda: Record.from_plain_many(page, validate=True,
+                                              decode=('id', 'name'))
+
+    def func():
+        ret = []
+        for plainval in page:
+            item = Record.from_plain(plainval, validate=True)
+            item.id
+            item.name
+            ret.append(item)
+        return ret
+    return func
+
+
+@case('get.first')
+def _get_first(param):
+    plainval = {'x': 1, 'y': 2}
+
+    def func():
+        point = Point.from_plain(plainval)
+        point.x
+        point.label
+    return func
+
+
+@case('get.repeat')
+def _get_repeat(param):
+    point = Point(x=1, y=2)
+
+    def func():
+        point.x
+        point.y
+        point.label
+        point.tags
+    return func
+
+
+@case('comp.depth', DEPTHS)
+def _comp_depth(depth):
+    cls = _nested(depth)
+    plainval = _chain(depth)
+
+    def func():
+        node = cls.from_plain(plainval)
+        for i in range(depth):
+            node = node.child
+        return node.value
+    return func
+
+
+@case('list.iter', SIZES)
+def _list_iter(size):
+    items = _bag(size).items
+
+    def func():
+        for item in items:
+            pass
+    return func
+
+
+@case('list.stream', SIZES)
+def _list_stream(size):
+    bag = _bag(size)
+
+    def func():
+        for item in bag.items.stream():
+            pass
+    return func
+
+
+@case('list.index', SIZES)
+def _list_index(size):
+    bag = _bag(size)
+    positions = range(0, size, max(size // 100, 1))
+
+    def func():
+        items = Bag.from_plain(bag.as_plain()).items
+        for i in positions:
+            items[i].id
+    return func
+
+
+@case('list.insert', SIZES)
+def _list_insert(size):
+    items = _bag(size).items
+    middle = size // 2
+    item = Item(id=0)
+
+    def func():
+        items.insert(middle, item)
+        del items[middle]
+    return func
+
+
+@case('list.extend', SIZES[:3])
+def _list_extend(size):
+    items = [Item(id=i) for i in range(size)]
+
+    def func():
+        bag = Bag()
+        bag.items.extend(items)
+        # items are kept by a single list at a time
+        bag.items.clear()
+    return func
+
+
+@case('list.sort', SIZES[:3])
+def _list_sort(size):
+    plainval = {'items': [{'id': (i * 7919) % size} for i in range(size)]}
+
+    def func():
+        bag = Bag.from_plain(plainval)
+        bag.items[0]
+        bag.items.sort(key='id')
+    return func
+
+
+@case('list.lookup', SIZES[:3])
+def _list_lookup(size):
+    def body(ns):
+        ns['items'] = FieldList(Item, index=['id'])
+
+    cls = types.new_class('Indexed', (Component,), exec_body=body)
+    items = cls.from_plain({'items': [{'id': i} for i in range(size)]}).items
+    last = size - 1
+
+    def func():
+        return items.lookup('id', last)
+    return func
+
+
+@case('list.to_columns', SIZES)
+def _list_to_columns(size):
+    items = _bag(size).items
+    return lambda: items.to_columns(['id', 'name'])
+
+
+@case('list.attr_columns', SIZES)
+def _list_attr_columns(size):
+    # the manual way to_columns() replaces
+    plainval = _bag(size).as_plain()
+
+    def func():
+        items = Bag.from_plain(plainval).items
+        ids = []
+        names = []
+        for item in items:
+            ids.append(item.id)
+            names.append(item.name)
+    return func
+
+
+@case('list.from_columns', SIZES)
+def _list_from_columns(size):
+    items = _bag(0).items
+    columns = {'id': list(range(size)), 'name': ['item'] * size}
+    return lambda: items.from_columns(columns)
+
+
+@case('dict.get')
+def _dict_get(param):
+    plainval = _bag(10).as_plain()
+
+    def func():
+        index = Bag.from_plain(plainval).index
+        for key in ('1', '50', '99'):
+            index[key].id
+    return func
+
+
+@case('dict.set')
+def _dict_set(param):
+    index = _bag(10).index
+    item = Item(id=0)
+
+    def func():
+        index['new'] = item
+        del index['new']
+    return func
+
+
+@case('dict.scan', ('all', 'lru', 'weak'))
+def _dict_scan(cache):
+    def body(ns):
+        ns['rows'] = FieldDict(Item, cache=cache, cache_size=100)
+
+    cls = types.new_class('Table', (Component,), exec_body=body)
+    plainval = {'rows': {str(i): {'id': i} for i in range(10000)}}
+
+    def func():
+        rows = cls.from_plain(plainval).rows
+        for key in rows:
+            rows[key].id
+    return func
+
+
+@case('clone.only', ('all', 'projected'))
+def _clone_only(mode):
+    # read-mostly endpoint returning 2 fields of a wide document
+    def body(ns):
+        for i in range(50):
+            ns['f{}'.format(i)] = Field()
+        ns['items'] = FieldList(Item)
+
+    cls = types.new_class('Wide', (Component,), exec_body=body)
+    plainval = {'f{}'.format(i): ['value'] * 10 for i in range(50)}
+    plainval['items'] = [{'id': i, 'name': 'item'} for i in range(100)]
+    only = ['f0', 'items.id'] if mode == 'projected' else None
+
+    def func():
+        cls.from_plain(plainval, only=only).clone()
+    return func
+
+
+@case('json.partial', ('loads', 'lazy'))
+def _json_partial(mode):
+    # handler reading one entry of a big document, untouched items come
+    # first and have to be passed by
+    text = json.dumps({
+        'items': [{'id': i, 'name': 'item {}'.format(i)}
+                  for i in range(10000)],
+        'index': {str(i): {'id': i} for i in range(100)}})
+    if mode == 'loads':
+        return lambda: Bag.from_plain(json.loads(text)).index['1'].id
+    return lambda: Bag.from_json(text).index['1'].id
+
+
+@case('clone.deep')
+def _clone_deep(param):
+    bag = _bag(1000)
+    return bag.clone
+
+
+@case('clone.cow')
+def _clone_cow(param):
+    bag = _bag(1000)
+
+    def func():
+        bag.cow_clone().items[5].id = 2
+    return func
+
+
+@case('clone.change', ('deep', 'cow'))
+def _clone_change(mode):
+    # a config of 100 sections with 100 leaves each, one leaf changed
+    config = Config.from_plain({
+        'version': 1,
+        'main': {'name': 'main', 'leaves': []},
+        'extra': [{'name': 's{}'.format(i),
+                   'leaves': [{'id': j, 'name': str(j)}
+                              for j in range(100)]}
+                  for i in range(100)]})
+    clone = config.cow_clone if mode == 'cow' else config.clone
+
+    def func():
+        ret = clone(version=2)
+        ret.extra[5].leaves[7].name = 'changed'
+    return func
+
+
+@case('binary.read', ('json', 'buffer', 'clone'))
+def _binary_read(mode):
+    # a few fields of an order of 10000 items
+    order = Order.from_plain({
+        'id': 1, 'customer': 'someone',
+        'items': [{'id': i, 'name': 'item {}'.format(i)}
+                  for i in range(10000)]})
+    if mode == 'json':
+        text = json.dumps(order.as_plain())
+
+        def func():
+            ret = Order.from_plain(json.loads(text))
+            return ret.customer, ret.items[5000].name
+        return func
+    data = order.as_buffer()
+    if mode == 'clone':
+        return lambda: Order.from_buffer(data).clone()
+
+    def func():
+        ret = Order.from_buffer(data)
+        return ret.customer, ret.items[5000].name
+    return func
+
+
+@case('memory.records', ('regular', 'compact'))
+def _memory_records(mode):
+    # peak is the cost of 10000 decoded records with all fields read
+    cls = CompactRecord if mode == 'compact' else Record
+    page = [{'id': i, 'name': 'name', 'price': 1.5, 'note': None}
+            for i in range(10000)]
+
+    def func():
+        items = [cls.from_plain(item) for item in page]
+        for item in items:
+            item.id, item.name, item.price, item.note
+        return items
+    return func
+
+
+@case('memory.series', ('list', 'array'))
+def _memory_series(mode):
+    # peak is the cost of 10000 float samples
+    cls = ArraySeries if mode == 'array' else Series
+
+    def func():
+        samples = (i * 0.5 for i in range(10000))
+        series = cls(samples=list(samples) if mode == 'list' else samples)
+        series.samples
+        return series
+    return func
+
+
+@case('memory.interned', ('plain', 'interned'))
+def _memory_interned(mode):
+    # peak is the cost of 10000 customers decoded from NDJSON, most
+    # addresses repeat
+    lines = [json.dumps({'id': i, 'address': {'city': 'Kyiv',
+                                              'street': str(i % 50)},
+                         'billing': {'city': 'Kyiv', 'street': '1'}})
+             for i in range(10000)]
+
+    def func():
+        plainvals = (json.loads(line) for line in lines)
+        if mode == 'plain':
+            return Customer.from_plain_many(plainvals)
+        return Customer.from_plain_many(plainvals, intern=Interner())
+    return func
+
+
+@case('tree.walk', ('lazy', 'eager'))
+def _tree_walk(mode):
+    # export-like pass visiting every node of a fresh tree
+    plainval = {'items': [{'id': i, 'name': 'item'} for i in range(1000)],
+                'index': {str(i): {'id': i} for i in range(100)}}
+    eager = mode == 'eager'
+
+    def func():
+        bag = Bag.from_plain(plainval, eager=eager)
+        for item in bag.items:
+            item.id
+            item.name
+        for item in bag.index.values():
+            item.id
+    return func
+
+
+def select(pattern=None, quick=False):
+    """Yield (name, func) pairs of cases matching `pattern`.
+
+    Data of a case is built only when the previous one is done with.
+    """
+    for name, make, param in CASES:
+        if pattern is not None and not re.search(pattern, name):
+            continue
+        if quick and param in SIZES and param not in QUICK_SIZES:
+            continue
+        yield name, make(param)
+
+
+def measure(func, quick=False, repeat=3):
+    """Return best ops/sec and memory peak of one call of `func`."""
+    func()
+    timer = timeit.Timer(func)
+    if quick:
+        number, best = 1, timer.timeit(1)
+    else:
+        number, elapsed = timer.autorange()
+        best = min([elapsed] + timer.repeat(repeat - 1, number))
+    gc.collect()
+    tracemalloc.start()
+    try:
+        start = tracemalloc.get_traced_memory()[0]
+        func()
+        peak = tracemalloc.get_traced_memory()[1] - start
+    finally:
+        tracemalloc.stop()
+    return {'ops': number / max(best, 1e-9), 'peak': peak}
+
+
+def run(pattern=None, quick=False, report=None):
+    results = {}
+    for name, func in select(pattern, quick):
+        results[name] = measure(func, quick)
+        if report is not None:
+            report(name, results[name])
+    return results
+
+
+def compare(results, baseline, threshold=0.2, speed=True):
+    """Return list of (name, message) for regressions against `baseline`.
+
+    Speed regresses when ops/sec drops by more than `threshold`, memory
+    when peak grows by more than `threshold` and at least 1 KiB.  Speed
+    is not compared if `speed` is false, e.g. for single calls timed by
+    quick mode.
+    """
+    ret = []
+    for name, result in results.items():
+        base = baseline.get(name)
+        if base is None:
+            continue
+        if speed and result['ops'] < base['ops'] * (1 - threshold):
+            ret.append((name, 'ops/sec {:,.0f} -> {:,.0f}'.format(
+                base['ops'], result['ops'])))
+        if result['peak'] > max(base['peak'] * (1 + threshold),
+                                base['peak'] + 1024):
+            ret.append((name, 'peak {:,} -> {:,} bytes'.format(
+                base['peak'], result['peak'])))
+    return ret
+
+
+def save(results, filename):
+    with open(filename, 'w') as f:
+        json.dump(results, f, indent=2, sort_keys=True)
+
+
+def load(filename):
+    with open(filename) as f:
+        return json.load(f)
@@ -0,0 +1,30 @@
+import unittest
+
+from . import suite
+
+
+class TestSuite(unittest.TestCase):
+    def test_quick_run(self):
+        results = suite.run(quick=True)
+        self.assertIn('list.insert[1000]', results)
+        self.assertNotIn('list.insert[1000000]', results)
+        for result in results.values():
+            self.assertGreater(result['ops'], 0)
+            self.assertGreaterEqual(result['peak'], 0)
+
+    def test_pattern(self):
+        results = suite.run('^comp\\.', quick=True)
+        self.assertEqual(['comp.depth[1]', 'comp.depth[5]',
+                          'comp.depth[20]'], list(results))
+
+    def test_compare(self):
+        baseline = {'a': {'ops': 100, 'peak': 10000},
+                    'b': {'ops': 100, 'peak': 100}}
+        results = {'a': {'ops': 70, 'peak': 13000},
+                   'b': {'ops': 90, 'peak': 1000},
+                   'c': {'ops': 1, 'peak': 1}}
+        self.assertEqual([('a', 'ops/sec 100 -> 70'),
+                          ('a', 'peak 10,000 -> 13,000 bytes')],
+                         suite.compare(results, baseline))
+        self.assertEqual([('a', 'peak 10,000 -> 13,000 bytes')],
+                         suite.compare(results, baseline, speed=False))
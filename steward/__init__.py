@@ -1,18 +1,872 @@
 __version__ = '0.0.2'
 
-from collections import OrderedDict, MutableMapping, MutableSequence, Sequence
+from collections import OrderedDict, namedtuple
+try:
+    from collections.abc import (Mapping, MutableMapping, MutableSequence,
+                                 Sequence)
+except ImportError:  # pragma: no cover
+    from collections import (Mapping, MutableMapping, MutableSequence,
+                             Sequence)
+import builtins
+from array import array, typecodes
+from bisect import bisect_left
+from keyword import iskeyword
+from operator import itemgetter
 from copy import deepcopy
+from sys import getsizeof
+from time import perf_counter
+from weakref import WeakValueDictionary
 
 
 sentinel = object()
 
+# Bumped by every copy-on-write clone, see Component.cow_clone()
+_cow_epoch = 0
+# Active Metrics instance if any
+_metrics = None
+
 
 class Error(Exception):
     """Base error"""
 
 
+def _format_path(path):
+    ret = []
+    for key in path:
+        if isinstance(key, str):
+            ret.append('.' + key if ret else key)
+        else:
+            ret.append('[{!r}]'.format(key))
+    return ''.join(ret)
+
+
+def _root(node):
+    while node._parent_ is not None:
+        node = node._parent_[0]
+    return node
+
+
+def _adopt(owner, key, child):
+    child._parent_ = (owner, key)
+    if owner._watched_ and not child._watched_:
+        _watch(child)
+    if child._views_:
+        _root(owner)._views_ = True
+
+
+def _placed(owner, key, child, keys=()):
+    # a wrapper is kept in one place only, one already placed elsewhere
+    # is put as cow_clone(); `keys` are being replaced
+    parent = child._parent_
+    if parent is not None and (parent[0] is not owner or
+                               parent[1] != key and parent[1] not in keys):
+        return child.cow_clone()
+    return child
+
+
+def _placed_all(owner, items, keys=()):
+    ret = []
+    seen = set()
+    for item in items:
+        if id(item) in seen:
+            item = item.cow_clone()
+        else:
+            seen.add(id(item))
+            item = _placed(owner, None, item, keys)
+        ret.append(item)
+    return ret
+
+
+def _orphan(owner, child):
+    parent = child._parent_
+    if parent is not None and parent[0] is owner:
+        if child._owned_ != _cow_epoch:
+            # detached wrapper must not write into data of the clones
+            _unshare(child)
+        # its nested containers are still shared with them
+        node = owner
+        while node is not None:
+            if node._shared_ > child._shared_:
+                child._shared_ = node._shared_
+            parent = node._parent_
+            node = parent[0] if parent is not None else None
+        if _root(owner)._views_:
+            child._views_ = True
+        child._parent_ = None
+
+
+def _unshare(obj):
+    """Copy plain containers shared by cow_clone() on the way to `obj`.
+
+    Every wrapper remembers the epoch it was known to exclusively own its
+    plain container at; a container is shared if some of the owners
+    was cloned later.
+    """
+    chain = []
+    node = obj
+    while node is not None:
+        chain.append(node)
+        parent = node._parent_
+        node = parent[0] if parent is not None else None
+    shared = 0
+    for node in reversed(chain):
+        if node._owned_ < shared:
+            owner, key = node._parent_
+            old = node._plain_
+            new = old.copy()
+            try:
+                current = owner._plain_[key]
+            except (KeyError, IndexError):
+                current = None
+            if current is old:
+                owner._plain_[key] = new
+            else:
+                # stale link, the wrapper is not a part of tree anymore
+                node._parent_ = None
+            node._plain_ = new
+        elif node._parent_ is None and \
+                not isinstance(node._plain_, (dict, list)):
+            # read-only view, see Component.from_buffer()
+            node._plain_ = node._plain_.copy()
+        node._owned_ = _cow_epoch
+        if node._shared_ > shared:
+            shared = node._shared_
+
+
+# class -> (name, field, kind) of arrays and nested fields, see _export()
+_exports = {}
+# class -> whether plain data of the class or of nested ones may hold
+# arrays or stores, see _listed()
+_listing = {}
+
+
+def _export_plan(cls):
+    ret = _exports.get(cls)
+    if ret is None:
+        ret = []
+        for name, field in cls._fields_.items():
+            for kind in (FieldArray, FieldComp, FieldList, FieldDict):
+                if isinstance(field, kind):
+                    ret.append((name, field, kind))
+        ret = _exports[cls] = tuple(ret)
+    return ret
+
+
+def _uses(cls, memo, test):
+    # whether `test(field, kind)` holds for a field of `cls` or of
+    # classes nested in it, walked without recursion
+    ret = memo.get(cls)
+    if ret is None:
+        ret = False
+        seen = {cls}
+        stack = [cls]
+        while stack and not ret:
+            for name, field, kind in _export_plan(stack.pop()):
+                if test(field, kind):
+                    ret = True
+                    break
+                if kind is not FieldArray and field.type not in seen:
+                    seen.add(field.type)
+                    stack.append(field.type)
+        memo[cls] = ret
+    return ret
+
+
+def _needs_listing(cls):
+    return _uses(cls, _listing, lambda field, kind: kind is FieldArray or
+                 getattr(field, 'storage', None) is not None)
+
+
+def _output(obj):
+    """Return plain data of `obj` as given by as_plain(), see _listed()."""
+    if isinstance(obj, Component):
+        kind, cls = FieldComp, type(obj)
+    else:
+        kind = FieldList if isinstance(obj, ListProxy) else FieldDict
+        cls = obj.type
+    if obj._stored_ or _needs_listing(cls):
+        return _listed(kind, cls, obj._plain_)
+    return obj._plain_
+
+
+def _listed(kind, cls, plainval, copy=False):
+    """Copy `kind` plain data of `cls` with arrays given as lists.
+
+    Stores are read into new lists and dicts.  With `copy` arrays are
+    copied instead and stores are kept.  Only containers on the way to
+    arrays and stores are copied.
+    """
+    holder = [plainval]
+    stack = [(holder, 0, kind, cls)]
+    while stack:
+        owner, key, kind, cls = stack.pop()
+        val = owner[key]
+        if kind is FieldComp:
+            val = dict(val)
+            for name, field, kind in _export_plan(cls):
+                item = val.get(name)
+                if item is None:
+                    continue
+                if kind is FieldArray:
+                    if isinstance(item, array):
+                        val[name] = item[:] if copy else item.tolist()
+                    continue
+                storage = getattr(field, 'storage', None)
+                if storage is not None and storage.owns(item):
+                    if not copy:
+                        stack.append((val, name, kind, field.type))
+                elif _needs_listing(field.type):
+                    stack.append((val, name, kind, field.type))
+        else:
+            if kind is FieldList:
+                val = list(val)
+                keys = range(len(val))
+            else:
+                val = dict(val.items())
+                keys = list(val)
+            if _needs_listing(cls):
+                stack.extend((val, key, FieldComp, cls) for key in keys
+                             if val[key] is not None)
+        owner[key] = val
+    return holder[0]
+
+
+def _export(obj):
+    """Make plain data of `obj` tree hold no read-only views.
+
+    Views left by from_buffer() and from_json() are copied into dicts
+    and lists once for the whole tree, wrappers get the copies.
+    """
+    root = _root(obj)
+    if root._views_:
+        _export_node(root)
+        root._views_ = False
+
+
+def _export_node(root):
+    # post-order walk with an explicit stack: entries are (wrapper or
+    # None, kind, class, plain data, updates of the owner, key, own
+    # updates once children are pushed)
+    if isinstance(root, Component):
+        kind, cls = FieldComp, type(root)
+    else:
+        kind = FieldList if isinstance(root, ListProxy) else FieldDict
+        cls = root.type
+    stack = [(root, kind, cls, root._plain_, {}, None, None)]
+    while stack:
+        node, kind, cls, plainval, owner, key, updates = stack.pop()
+        if updates is not None:
+            new = _exported(node, plainval, updates)
+            if new is not plainval:
+                owner[key] = new
+            continue
+        updates = {}
+        stack.append((node, kind, cls, plainval, owner, key, updates))
+        if kind is FieldComp:
+            for name, field, kind in _export_plan(cls):
+                val = plainval.get(name)
+                if val is None or kind is FieldArray or \
+                        kind is not FieldComp and \
+                        field.storage is not None and field.storage.owns(val):
+                    continue
+                stack.append((_child(node, name), kind, field.type, val,
+                              updates, name, None))
+        else:
+            items = enumerate(plainval) if kind is FieldList else \
+                plainval.items()
+            stack.extend((_child(node, key), FieldComp, cls, item, updates,
+                          key, None) for key, item in items
+                         if item is not None)
+
+
+def _exported(node, plainval, updates):
+    # `plainval` with `updates` applied, in place if `node` owns it
+    if isinstance(plainval, (dict, list, tuple)):
+        if not updates:
+            return plainval
+        if node is not None and node._owned_ == _cow_epoch and \
+                not isinstance(plainval, tuple):
+            for key, val in updates.items():
+                plainval[key] = val
+            return plainval
+        ret = list(plainval) if isinstance(plainval, tuple) \
+            else plainval.copy()
+    else:
+        ret = plainval.copy()
+    for key, val in updates.items():
+        ret[key] = val
+    if node is not None and node._plain_ is plainval:
+        node._plain_ = ret
+        node._owned_ = _cow_epoch
+    return ret
+
+
+# class -> (name, field, kind) of fields built by Component.materialize()
+_plans = {}
+
+
+def _plan(cls):
+    ret = _plans.get(cls)
+    if ret is None:
+        ret = []
+        for name, field in cls._fields_.items():
+            kind = type(field)
+            if kind not in (FieldComp, FieldList, FieldDict) or \
+                    getattr(field, 'storage', None) is not None:
+                kind = Field if _is_plain_field(field) else None
+            if kind is Field and cls._compact_ or \
+                    kind is None and not field.nested:
+                continue
+            ret.append((name, field, kind))
+        ret = _plans[cls] = tuple(ret)
+    return ret
+
+
+def _maker(cls):
+    # wrappers built in bulk skip from_plain() unless it is overridden
+    # or metrics count it
+    if _metrics is None and \
+            cls.from_plain.__func__ is Component.from_plain.__func__:
+        return None
+    return cls.from_plain
+
+
+def _restore(cls, plainval):
+    # unpickle component, see Component.__reduce__()
+    return cls.from_plain(plainval)
+
+
+def _mark_shared(components, epoch):
+    for item in components:
+        item._shared_ = epoch
+        yield item
+
+
+def _watch(obj):
+    """Report changes made in `obj` tree, see _changed().
+
+    Wrappers made later in the tree inherit the flag from their owners.
+    """
+    stack = [obj]
+    while stack:
+        node = stack.pop()
+        if not node._watched_:
+            node._watched_ = True
+            stack.extend(node._wrappers())
+
+
+def _unwatch(obj):
+    """Stop reporting changes in `obj` tree nobody listens to any more.
+
+    Trees of tracked, indexed and stored nodes and of their owners stay
+    watched.
+    """
+    node = obj
+    while node is not None:
+        if node._tracker_ is not None or node._index_ is not None or \
+                node._stored_:
+            return
+        node = node._parent_[0] if node._parent_ is not None else None
+    stack = [obj]
+    while stack:
+        node = stack.pop()
+        if node._watched_ and node._tracker_ is None and \
+                node._index_ is None and not node._stored_:
+            node._watched_ = False
+            stack.extend(node._wrappers())
+
+
+def _changed(obj, key, op, value=None):
+    """Report change of `key` in `obj` to trackers of `obj` and owners."""
+    path = [key]
+    node = obj
+    child = None
+    while True:
+        if node._digest_ is not None:
+            node._digest_ = None
+        if node._stored_ and child is not None:
+            # item changed in place is written to the store again
+            node._plain_.touch(key, child._plain_)
+        dependents = node._dependents_
+        if dependents is not None:
+            cache = node.__dict__
+            for name in dependents.get(key, ()):
+                cache.pop(name, None)
+        tracker = node._tracker_
+        if tracker is not None:
+            tracker._record(op, tuple(reversed(path)), value)
+        index = node._index_
+        if index is not None:
+            index._record(op, tuple(reversed(path)), value)
+        parent = node._parent_
+        if parent is None:
+            return
+        child = node
+        node, key = parent
+        path.append(key)
+
+
+def _digest(plainval):
+    # blake2b is new in Python 3.6, the rest of the module works before
+    from hashlib import blake2b
+    out = []
+    _canonical(plainval, out)
+    return blake2b(''.join(out).encode('utf-8', 'surrogatepass'),
+                   digest_size=16).digest()
+
+
+def _canonical(value, out):
+    """Write text of `value`, the same for values equal in Python.
+
+    Numbers are written by value, so 1, 1.0 and True give the same
+    text, and entries of mappings and sets are sorted.  Nested values
+    are walked with an explicit stack.
+    """
+    # (text written before the value, value)
+    stack = [('', value)]
+    while stack:
+        text, value = stack.pop()
+        if text:
+            out.append(text)
+        if isinstance(value, str):
+            out.append('s' + str(len(value)) + ':')
+            out.append(value)
+        elif value is None:
+            out.append('n')
+        elif isinstance(value, int):
+            out.append('i' + str(int(value)) + ';')
+        elif isinstance(value, float):
+            if value.is_integer():
+                out.append('i' + str(int(value)) + ';')
+            else:
+                out.append('f' + repr(value) + ';')
+        elif isinstance(value, Mapping):
+            keys = list(value)
+            out.append('d' + str(len(keys)) + ';')
+            if all(type(key) is str for key in keys):
+                keys.sort(reverse=True)
+                stack.extend(('s' + str(len(key)) + ':' + key, value[key])
+                             for key in keys)
+            else:
+                # keys of different types, sort by their text
+                _entries([(key, value[key]) for key in keys], out)
+        elif isinstance(value, (set, frozenset)):
+            out.append('e' + str(len(value)) + ';')
+            _entries([(item,) for item in value], out)
+        elif isinstance(value, (bytes, bytearray)):
+            out.append('b' + value.hex() + ';')
+        elif isinstance(value, (tuple, array, Sequence)):
+            # lists, tuples and arrays never compare equal to each other
+            tag = 't' if isinstance(value, tuple) else \
+                'a' if isinstance(value, array) else 'l'
+            out.append(tag + str(len(value)) + ';')
+            stack.extend([('', item) for item in value][::-1])
+        else:
+            raise TypeError("Object of type {} cannot be digested".format(
+                type(value).__name__))
+
+
+def _entries(entries, out):
+    texts = []
+    for entry in entries:
+        text = []
+        for item in entry:
+            _canonical(item, text)
+        texts.append(''.join(text))
+    texts.sort()
+    out.extend(texts)
+
+
+def diff(a, b):
+    """Return JSON Patch turning plain data of `a` into the one of `b`.
+
+    Subtrees are skipped when they are the same objects, e.g. shared by
+    cow_clone(), when their components have equal digests cached or
+    when they compare equal.
+    """
+    if type(a) is not type(b):
+        raise TypeError("Components of the same class are required, "
+                        "got {} and {}".format(type(a).__name__,
+                                               type(b).__name__))
+    _export(a)
+    _export(b)
+    ret = []
+    if a._plain_ is not b._plain_ and not _same_digest(a, b):
+        _diff(_output(a), _output(b), a, b, [], ret)
+    return ret
+
+
+def _same_digest(a, b):
+    return a is not None and b is not None and \
+        a._digest_ is not None and a._digest_ == b._digest_
+
+
+def _diff(old, new, a, b, path, out):
+    # `a` and `b` are wrappers of `old` and `new` if known
+    if isinstance(old, Mapping) and isinstance(new, Mapping):
+        for key, val in old.items():
+            other = new.get(key, sentinel)
+            if other is sentinel:
+                out.append({'op': 'remove', 'path': _pointer(path + [key])})
+            else:
+                _diff_item(val, other, a, b, key, path, out)
+        for key, val in new.items():
+            if key not in old:
+                out.append({'op': 'add', 'path': _pointer(path + [key]),
+                            'value': _copy(val)})
+    elif isinstance(old, MutableSequence) and \
+            isinstance(new, MutableSequence):
+        size = min(len(old), len(new))
+        for index in range(size):
+            _diff_item(old[index], new[index], a, b, index, path, out)
+        for index in range(len(old) - 1, size - 1, -1):
+            out.append({'op': 'remove', 'path': _pointer(path + [index])})
+        for index in range(size, len(new)):
+            out.append({'op': 'add', 'path': _pointer(path + [index]),
+                        'value': _copy(new[index])})
+    else:
+        out.append({'op': 'replace', 'path': _pointer(path),
+                    'value': _copy(new)})
+
+
+def _diff_item(old, new, a, b, key, path, out):
+    if old is new:
+        return
+    if isinstance(old, (MutableMapping, MutableSequence)) and \
+            type(old) is type(new):
+        a = _child(a, key)
+        b = _child(b, key)
+        # C level comparison is much faster than the walk
+        if _same_digest(a, b) or old == new:
+            return
+        _diff(old, new, a, b, path + [key], out)
+    elif type(old) is not type(new) or old != new:
+        out.append({'op': 'replace', 'path': _pointer(path + [key]),
+                    'value': _copy(new)})
+
+
+def _child(node, key):
+    # existing wrapper of `key` item of `node`, never built here
+    if node is None:
+        return None
+    return node._child(key)
+
+
+def _copy(value):
+    # deep copy of reported plain data, arrays and stores are given as
+    # lists and dicts
+    if isinstance(value, array):
+        return value.tolist()
+    if type(value) is dict or isinstance(value, MutableMapping):
+        return {key: _copy(val) for key, val in value.items()}
+    if type(value) is list or isinstance(value, MutableSequence):
+        return [_copy(item) for item in value]
+    ret = deepcopy(value)
+    if ret is not value and isinstance(ret, (dict, list)):
+        # decoded view
+        return _copy(ret)
+    return ret
+
+
+def _escape(key):
+    return str(key).replace('~', '~0').replace('/', '~1')
+
+
+def _pointer(path):
+    return ''.join('/' + _escape(key) for key in path)
+
+
+class Tracker:
+    """Record changes made to `root` tree.
+
+    Changes made through fields and proxies of `root` and of its nested
+    components are collected until reset().  patch() reports them as
+    RFC 6902 JSON Patch and delta() as RFC 7396 merge patch.
+    """
+
+    def __init__(self, root):
+        if root._tracker_ is not None:
+            raise Error("{!r} is already tracked".format(root))
+        self.root = root
+        self._ops = []
+        root._tracker_ = self
+        _watch(root)
+
+    def close(self):
+        if self.root is not None:
+            self.root._tracker_ = None
+            _unwatch(self.root)
+            self.root = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _record(self, op, path, value):
+        if op != 'remove':
+            value = _copy(value)
+        self._ops.append((op, path, value))
+
+    @property
+    def dirty(self):
+        return bool(self._ops)
+
+    def reset(self):
+        self._ops = []
+
+    def _compact(self):
+        # Drop changes overwritten by later ones.  Later insertions and
+        # removals in a list shift indexes, so they reset overwrites
+        # known for items of that list.
+        ret = []
+        covered = []
+        for op, path, value in reversed(self._ops):
+            # Only replacing a value is made moot by a later change of
+            # the same path, inserted and removed items are different.
+            size = len(path) if op == 'replace' else len(path) - 1
+            if any(len(c) <= size and path[:len(c)] == c for c in covered):
+                continue
+            ret.append((op, path, value))
+            if op != 'replace' and isinstance(path[-1], int):
+                parent = path[:-1]
+                size = len(path)
+                covered = [c for c in covered
+                           if len(c) < size or c[:size - 1] != parent]
+                if op == 'remove':
+                    covered.append(path)
+            else:
+                covered.append(path)
+        ret.reverse()
+        return ret
+
+    def patch(self, reset=True):
+        """Return JSON Patch with changes made since last reset."""
+        ret = []
+        for op, path, value in self._compact():
+            item = {'op': op, 'path': _pointer(path)}
+            if op != 'remove':
+                item['value'] = value
+            ret.append(item)
+        if reset:
+            self.reset()
+        return ret
+
+    def delta(self, reset=True):
+        """Return JSON Merge Patch with changes made since last reset.
+
+        Merge patch replaces lists as a whole, so a change inside a list
+        reports the entire current list.  Merge patch reads None as
+        removal, a field set to None is reported so too.
+        """
+        ret = {}
+        for op, path, value in self._compact():
+            path, value = self._current(path)
+            target = ret
+            for key in path[:-1]:
+                item = target.get(key, sentinel)
+                if item is sentinel:
+                    item = target[key] = {}
+                elif not isinstance(item, dict):
+                    # whole ancestor is already reported
+                    break
+                target = item
+            else:
+                target[path[-1]] = None if value is sentinel else value
+        if reset:
+            self.reset()
+        return ret
+
+    def _current(self, path):
+        # copy of plain value at `path`, paths into lists are cut at the
+        # list; only wrappers and plain data on the way are looked at
+        node = self.root
+        value = None
+        for index, key in enumerate(path):
+            if node is not None:
+                if isinstance(node, ListProxy):
+                    return path[:index], _copy(node.as_plain())
+                child = node._child(key)
+                if child is not None:
+                    node = child
+                    continue
+                value = getattr(node, '__dict__', {}).get(key)
+                if not isinstance(value, array):
+                    value = node._plain_.get(key, sentinel)
+                node = None
+            elif isinstance(value, Mapping):
+                value = value.get(key, sentinel)
+            else:
+                return path[:index], _copy(value)
+        if node is not None:
+            value = node.as_plain()
+        return path, value if value is sentinel else _copy(value)
+
+
+# values deepcopy() gives as they are
+_atomic = frozenset([str, int, float, bool, type(None), bytes])
+
+
+def _deepcopy(plainval):
+    """Copy plain data like deepcopy() for trees of any depth.
+
+    Dicts and lists are walked with an explicit stack and copied apart
+    each time they are met, other values are given to deepcopy().
+    """
+    atomic = _atomic
+    holder = [plainval]
+    stack = [(holder, 0)]
+    while stack:
+        owner, key = stack.pop()
+        val = owner[key]
+        if type(val) is dict:
+            new = val.copy()
+            for k, v in new.items():
+                if type(v) not in atomic:
+                    stack.append((new, k))
+        elif type(val) is list:
+            new = val[:]
+            for i, v in enumerate(new):
+                if type(v) not in atomic:
+                    stack.append((new, i))
+        else:
+            new = deepcopy(val)
+        owner[key] = new
+    return holder[0]
+
+
+def _equal(a, b):
+    """Compare plain data, walking too deep trees with an explicit stack."""
+    try:
+        return a == b
+    except RecursionError:
+        pass
+    stack = [(a, b)]
+    while stack:
+        a, b = stack.pop()
+        if a is b:
+            continue
+        if type(a) is dict and type(b) is dict:
+            if len(a) != len(b):
+                return False
+            for key, val in a.items():
+                other = b.get(key, sentinel)
+                if other is sentinel:
+                    return False
+                stack.append((val, other))
+        elif type(a) is list and type(b) is list:
+            if len(a) != len(b):
+                return False
+            stack.extend(zip(a, b))
+        elif a != b:
+            return False
+    return True
+
+
+def _sizeof(plainval):
+    ret = 0
+    stack = [plainval]
+    while stack:
+        item = stack.pop()
+        ret += getsizeof(item)
+        if isinstance(item, dict):
+            stack.extend(item.keys())
+            stack.extend(item.values())
+        elif isinstance(item, list):
+            stack.extend(item)
+    return ret
+
+
+class Metrics:
+    """Count decoding work per component class while active.
+
+    Counters are ``from_plain`` (wrappers made), ``get_hits`` and
+    ``get_misses`` (field reads served by cache or decoded),
+    ``dict_hits`` and ``dict_misses`` (DictProxy items), ``list_builds``
+    and ``list_size`` (ListProxy items cached and the largest number of
+    cached items), ``clone`` and ``clone_bytes`` (deep copies and their
+    size).  With `timing` decoding counters get ``_time`` siblings
+    holding seconds spent.  Dict and list counters are kept for the item
+    class.
+    """
+
+    def __init__(self, timing=False):
+        global _metrics
+        if _metrics is not None:
+            raise Error("Metrics are already collected")
+        self.timing = timing
+        self._counters = {}
+        _metrics = self
+
+    def close(self):
+        global _metrics
+        if _metrics is self:
+            _metrics = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _add(self, cls, name, value=1):
+        counters = self._counters.get(cls)
+        if counters is None:
+            counters = self._counters[cls] = {}
+        counters[name] = counters.get(name, 0) + value
+
+    def _max(self, cls, name, value):
+        counters = self._counters.get(cls)
+        if counters is None:
+            counters = self._counters[cls] = {}
+        if value > counters.get(name, 0):
+            counters[name] = value
+
+    def _call(self, cls, name, func, *args):
+        """Count and optionally time func(*args)."""
+        self._add(cls, name)
+        if not self.timing:
+            return func(*args)
+        start = perf_counter()
+        try:
+            return func(*args)
+        finally:
+            self._add(cls, name + '_time', perf_counter() - start)
+
+    def snapshot(self, reset=False):
+        """Return counters keyed by qualified class name."""
+        ret = {}
+        for cls, counters in self._counters.items():
+            ret['{}.{}'.format(cls.__module__, cls.__qualname__)] = \
+                dict(counters)
+        if reset:
+            self.reset()
+        return ret
+
+    def reset(self):
+        self._counters = {}
+
+
+def _nested_error(exc, key):
+    # Error raised while validating the item `key` of a container.
+    path = (key,) + getattr(exc, 'path', ())
+    reason = getattr(exc, 'reason', str(exc))
+    ret = Error("{}: {}".format(_format_path(path), reason))
+    ret.path = path
+    ret.reason = reason
+    return ret
+
+
 class Field:
     name = None
+    # getter returns Component or proxy linked to the owner instance
+    nested = False
+    # value is kept in _plain_ only, set for plain fields of compact classes
+    compact = False
+    # getter may put an equal value of another type into plain data, such
+    # a replacement is not reported as a change
+    converts = False
 
     def __init__(self, *, default=sentinel, const=False, maker=sentinel):
         self.default = default
@@ -29,16 +883,51 @@ class Field:
         assert self.name is None, self.name
         self.name = name
 
+    @property
+    def required(self):
+        return self.default is sentinel and self.maker is sentinel
+
+    def validate(self, plainval):
+        pass
+
     def __get__(self, instance, owner):
         if instance is None:
             return self
         name = self.name
         assert name
-        ret = instance.__dict__.get(name, sentinel)
+        if self.compact:
+            ret = instance._plain_.get(name, sentinel)
+            if ret is not sentinel:
+                if _metrics is not None:
+                    _metrics._add(type(instance), 'get_hits')
+                return ret
+            ret = sentinel
+        else:
+            ret = instance.__dict__.get(name, sentinel)
         if ret is sentinel:
-            ret, plainval = self.getter(instance._plain_.get(name, sentinel))
-            instance.__dict__[name] = ret
-            instance._plain_[name] = plainval
+            val = instance._plain_.get(name, sentinel)
+            if _metrics is None:
+                ret, plainval = self.getter(val)
+            else:
+                ret, plainval = _metrics._call(type(instance), 'get_misses',
+                                               self.getter, val)
+            if not self.compact:
+                instance.__dict__[name] = ret
+            if plainval is not val:
+                if instance._owned_ != _cow_epoch:
+                    _unshare(instance)
+                instance._plain_[name] = plainval
+                if instance._watched_ and (val is sentinel or
+                                           not self.converts):
+                    _changed(instance, name,
+                             'add' if val is sentinel else 'replace',
+                             plainval)
+            if self.nested and ret is not None and ret is not self.default:
+                ret._parent_ = (instance, name)
+                if instance._watched_ or ret._views_:
+                    _adopt(instance, name, ret)
+        elif _metrics is not None:
+            _metrics._add(type(instance), 'get_hits')
         return ret
 
     def getter(self, plainval):
@@ -58,14 +947,33 @@ class Field:
             raise AttributeError(
                 "Constant '{.name}' cannot be set".format(self))
         ret, plainval = self.setter(value)
-        instance.__dict__[name] = ret
-        instance._plain_[name] = plainval
+        if self.nested and ret is not None:
+            ret = _placed(instance, name, ret)
+            plainval = ret._plain_
+        if instance._owned_ != _cow_epoch:
+            _unshare(instance)
+        if self.nested:
+            old = instance.__dict__.get(name)
+            if old is not None:
+                _orphan(instance, old)
+            if ret is not None:
+                _adopt(instance, name, ret)
+        if not self.compact:
+            instance.__dict__[name] = ret
+        if instance._watched_:
+            op = 'replace' if name in instance._plain_ else 'add'
+            instance._plain_[name] = plainval
+            _changed(instance, name, op, plainval)
+        else:
+            instance._plain_[name] = plainval
 
     def setter(self, value):
         return value, value
 
 
 class FieldComp(Field):
+    nested = True
+
     def __init__(self, type, *, default=sentinel, const=False, maker=sentinel):
         if not issubclass(type, Component):
             raise TypeError("`type` should be subclass of steward.Component")
@@ -104,21 +1012,243 @@ class FieldComp(Field):
         else:
             return self.type.from_plain(ret) if ret is not None else None, ret
 
+    def validate(self, plainval):
+        if plainval is not None:
+            self.type.validate_plain(plainval)
+
+
+def _check_index(type, names):
+    names = tuple(names)
+    for name in names:
+        field = type._fields_.get(name)
+        if field is None or field.nested:
+            raise TypeError("{} cannot be indexed by '{}'".format(
+                type.__name__, name))
+    return names
+
+
+class _Index:
+    """Slots (list positions or dict keys) of items by field values.
+
+    Built from plain data without wrapping items and kept up to date
+    from change reports of the proxy, see _changed().  Inserting or
+    removing list items before the end shifts positions of the later
+    ones, the index is built again on next lookup then.
+    """
+
+    def __init__(self, type, names, positional):
+        self.defaults = {name: type._fields_[name].default for name in names}
+        self.positional = positional
+        # name -> {value: set of slots} and name -> {slot: value}
+        self.buckets = None
+        self.values = None
+        self.size = 0
+
+    def build(self, items):
+        self.buckets = {name: {} for name in self.defaults}
+        self.values = {name: {} for name in self.defaults}
+        self.size = 0
+        for slot, plainitem in items:
+            self._add(slot, plainitem)
+            self.size += 1
+
+    def _add(self, slot, plainitem):
+        for name, default in self.defaults.items():
+            self._set(name, slot, plainitem.get(name, default))
+
+    def _set(self, name, slot, value):
+        values = self.values[name]
+        old = values.pop(slot, sentinel)
+        if old is not sentinel:
+            self.buckets[name][old].discard(slot)
+        if value is not sentinel:
+            values[slot] = value
+            self.buckets[name].setdefault(value, set()).add(slot)
+
+    def _discard(self, slot):
+        for name in self.defaults:
+            self._set(name, slot, sentinel)
+
+    def _record(self, op, path, value):
+        if self.buckets is None:
+            return
+        slot = path[0]
+        if len(path) > 1:
+            if path[1] in self.defaults:
+                if len(path) == 2 and op != 'remove':
+                    self._set(path[1], slot, value)
+                else:
+                    self.buckets = None
+        elif op == 'replace':
+            self._add(slot, value)
+        elif not self.positional:
+            if op == 'remove':
+                self._discard(slot)
+            else:
+                self._add(slot, value)
+        elif op == 'add':
+            if slot < self.size:
+                self.buckets = None
+                return
+            self._add(slot, value)
+            self.size += 1
+        else:
+            if slot < self.size - 1:
+                self.buckets = None
+                return
+            self._discard(slot)
+            self.size -= 1
+
+    def find(self, name, value):
+        bucket = self.buckets.get(name)
+        if bucket is None:
+            raise Error("Items are not indexed by '{}'".format(name))
+        return bucket.get(value, ())
+
+
+def _lookup(proxy, index, items):
+    """Return up to date index of `proxy`."""
+    if index.buckets is None:
+        index.build(items)
+    return index
+
+
+CacheInfo = namedtuple('CacheInfo', 'hits misses maxsize currsize')
+
+CACHE_POLICIES = ('all', 'lru', 'weak')
+
+
+def _check_cache(cache, cache_size):
+    if cache not in CACHE_POLICIES:
+        raise ValueError("`cache` should be one of {}, got {!r}".format(
+            ', '.join(CACHE_POLICIES), cache))
+    if cache == 'lru':
+        if not isinstance(cache_size, int) or cache_size < 1:
+            raise ValueError("`cache_size` should be positive int, "
+                             "got {!r}".format(cache_size))
+
 
 class DictProxy(MutableMapping):
+    """Mapping of keys to `type` components.
+
+    Wrappers made for items are cached according to `cache` policy:
+
+    * ``'all'`` keeps every wrapper for the life of proxy;
+    * ``'lru'`` keeps `cache_size` recently used wrappers;
+    * ``'weak'`` keeps wrappers only while they are referenced elsewhere.
+
+    With any policy the same wrapper is returned for a key as long as it
+    is alive, so changes made through it are never lost.
+    """
+    _parent_ = None
+    _owned_ = 0
+    _shared_ = 0
+    _tracker_ = None
+    _index_ = None
+    _digest_ = None
+    _dependents_ = None
+    _stored_ = False
+    # plain data of the tree may hold read-only views, see _export()
+    _views_ = False
+    # changes are reported to owners, see _watch()
+    _watched_ = False
+    _hits = _misses = 0
+    __indexed = ()
+    # strong references to recently used wrappers for 'lru' cache
+    __recent = None
+    __size = None
+
     @classmethod
-    def _from_plain(cls, type, plainval):
-        ret = cls(type)
+    def _from_plain(cls, type, plainval, cache='all', cache_size=None,
+                    index=()):
+        # arguments are checked by FieldDict already
+        ret = object.__new__(cls)
+        ret.type = type
         ret._plain_ = plainval
+        if cache == 'all' and not index:
+            ret.__objects = {}
+        else:
+            ret._setup(cache, cache_size, index)
         return ret
 
-    def __init__(self, type):
+    def __init__(self, type, cache='all', cache_size=None, index=()):
+        _check_cache(cache, cache_size)
         self.type = type
         self._plain_ = {}
-        self.__objects = {}
+        self._setup(cache, cache_size, _check_index(type, index))
+
+    def _setup(self, cache, cache_size, index):
+        if index:
+            self.__indexed = index
+        if cache == 'all':
+            self.__objects = {}
+        else:
+            self.__objects = WeakValueDictionary()
+            if cache == 'lru':
+                self.__recent = OrderedDict()
+            self.__size = cache_size
+
+    def _child(self, key):
+        return self.__objects.get(key)
+
+    def _fill(self):
+        # build wrappers of every entry, see Component.materialize()
+        objects = self.__objects
+        if type(objects) is not dict:
+            # limited caches would drop them right away
+            return ()
+        new = object.__new__
+        t = self.type
+        make = _maker(t)
+        watched = self._watched_
+        ret = []
+        for key, plainitem in self._plain_.items():
+            item = objects.get(key)
+            if item is None:
+                if make is None:
+                    item = new(t)
+                    item._plain_ = plainitem
+                elif _metrics is None:
+                    item = make(plainitem)
+                else:
+                    item = _metrics._call(t, 'dict_misses', make, plainitem)
+                objects[key] = item
+                item._parent_ = (self, key)
+                if watched:
+                    item._watched_ = True
+            ret.append(item)
+        return ret
+
+    def _wrappers(self):
+        return list(self.__objects.values())
+
+    def cache_info(self):
+        """Return hit and miss counts and size of the wrappers cache."""
+        if self.__recent is not None:
+            size = len(self.__recent)
+        else:
+            size = len(self.__objects)
+        return CacheInfo(self._hits, self._misses, self.__size, size)
+
+    def lookup(self, name, value):
+        """Return items having `value` of indexed field `name`."""
+        index = self._index_
+        if index is None:
+            index = self._index_ = _Index(self.type, self.__indexed, False)
+            _watch(self)
+        keys = _lookup(self, index, self._plain_.items()).find(name, value)
+        return [self[key] for key in keys]
+
+    def _touch(self, key, item):
+        recent = self.__recent
+        recent[key] = item
+        recent.move_to_end(key)
+        if len(recent) > self.__size:
+            recent.popitem(last=False)
 
     def as_plain(self):
-        return self._plain_
+        _export(self)
+        return _output(self)
 
     def __len__(self):
         return len(self._plain_)
@@ -129,145 +1259,1164 @@ class DictProxy(MutableMapping):
     def __getitem__(self, key):
         ret = self.__objects.get(key, sentinel)
         if ret is not sentinel:
+            self._hits += 1
+            if self.__recent is not None:
+                self._touch(key, ret)
+            if _metrics is not None:
+                _metrics._add(self.type, 'dict_hits')
             return ret
         plainitem = self._plain_[key]
-        assert isinstance(plainitem, dict)
-        ret = self.type.from_plain(plainitem)
+        self._misses += 1
+        if _metrics is None:
+            ret = self.type.from_plain(plainitem)
+        else:
+            ret = _metrics._call(self.type, 'dict_misses',
+                                 self.type.from_plain, plainitem)
+        ret._parent_ = (self, key)
+        if self._watched_ or ret._views_:
+            _adopt(self, key, ret)
         self.__objects[key] = ret
+        if self.__recent is not None:
+            self._touch(key, ret)
         return ret
 
     def __setitem__(self, key, val):
         assert isinstance(val, self.type)
+        val = _placed(self, key, val)
+        if self._owned_ != _cow_epoch:
+            _unshare(self)
+        old = self.__objects.get(key)
+        if old is not None:
+            _orphan(self, old)
+        _adopt(self, key, val)
         self.__objects[key] = val
-        self._plain_[key] = val._plain_
+        if self.__recent is not None:
+            self._touch(key, val)
+        if self._watched_:
+            op = 'replace' if key in self._plain_ else 'add'
+            self._plain_[key] = val._plain_
+            _changed(self, key, op, val._plain_)
+        else:
+            self._plain_[key] = val._plain_
 
     def __delitem__(self, key):
+        if self._owned_ != _cow_epoch:
+            _unshare(self)
         del self._plain_[key]
-        self.__objects.pop(key, None)
+        old = self.__objects.pop(key, None)
+        if old is not None:
+            _orphan(self, old)
+        if self.__recent is not None:
+            self.__recent.pop(key, None)
+        if self._watched_:
+            _changed(self, key, 'remove')
 
 
 class FieldDict(Field):
-    def __init__(self, type):
+    required = False
+    nested = True
+
+    def __init__(self, type, *, cache='all', cache_size=None, index=(),
+                 storage=None):
         super().__init__()
+        _check_cache(cache, cache_size)
         self.type = type
+        self.cache = cache
+        self.cache_size = cache_size
+        self.index = _check_index(type, index)
+        # keeps entries out of memory, see steward.storage
+        self.storage = storage
+
+    def validate(self, plainval):
+        if not isinstance(plainval, dict):
+            raise Error("a dict is required, got {}".format(
+                builtins.type(plainval).__name__))
+        validate = self.type.validate_plain
+        for key, val in plainval.items():
+            try:
+                validate(val)
+            except Error as exc:
+                raise _nested_error(exc, key) from None
 
     def setter(self, value):
         raise AttributeError("FieldDict cannot be set")
 
     def getter(self, plainval):
+        storage = self.storage
         if plainval is sentinel:
-            plainval = {}
-        assert isinstance(plainval, dict)
-        return DictProxy._from_plain(self.type, plainval), plainval
+            plainval = {} if storage is None else storage.dict()
+        elif storage is not None and not storage.owns(plainval):
+            plainval = storage.dict(plainval)
+        assert type(plainval) is dict or isinstance(plainval, Mapping)
+        ret = DictProxy._from_plain(self.type, plainval, self.cache,
+                                    self.cache_size, self.index)
+        if storage is not None:
+            # changed items are written to the store again
+            ret._stored_ = ret._watched_ = True
+        return ret, plainval
 
 
 class ListProxy(MutableSequence):
+    _parent_ = None
+    _owned_ = 0
+    _shared_ = 0
+    _tracker_ = None
+    _index_ = None
+    _digest_ = None
+    _dependents_ = None
+    _stored_ = False
+    # plain data of the tree may hold read-only views, see _export()
+    _views_ = False
+    # changes are reported to owners, see _watch()
+    _watched_ = False
+    __indexed = ()
+    # wrappers of all items in order, kept until the shadow is changed
+    __items = None
+    # index -> wrapper made by stream(), while referenced elsewhere
+    __streamed = None
+
     @classmethod
-    def _from_plain(cls, type, plainval):
-        ret = cls(type)
+    def _from_plain(cls, type, plainval, index=()):
+        # `index` is checked by FieldList already
+        ret = object.__new__(cls)
+        ret.type = type
         ret._plain_ = plainval
+        ret.__shadow = {}
+        if index:
+            ret.__indexed = index
         return ret
 
-    def __init__(self, type):
+    def __init__(self, type, index=()):
         self.type = type
         self._plain_ = []
-        self.__shadow = None
+        # sparse shadow: index -> wrapper, only for touched items
+        self.__shadow = {}
+        index = _check_index(type, index)
+        if index:
+            self.__indexed = index
 
     def as_plain(self):
-        return self._plain_
+        _export(self)
+        return _output(self)
 
     def __len__(self):
         return len(self._plain_)
 
+    def lookup(self, name, value):
+        """Return items having `value` of indexed field `name`."""
+        index = self._index_
+        if index is None:
+            index = self._index_ = _Index(self.type, self.__indexed, True)
+            _watch(self)
+        positions = _lookup(self, index, enumerate(self._plain_)).find(
+            name, value)
+        return [self._item(pos) for pos in sorted(positions)]
+
+    def _index(self, index):
+        size = len(self._plain_)
+        if index < 0:
+            index += size
+        if not 0 <= index < size:
+            raise IndexError("list index out of range")
+        return index
+
+    def _item(self, index):
+        ret = self.__shadow.get(index, sentinel)
+        if ret is sentinel and self.__streamed:
+            ret = self.__streamed.pop(index, sentinel)
+            if ret is not sentinel:
+                self.__shadow[index] = ret
+        if ret is sentinel:
+            if _metrics is None:
+                ret = self.type.from_plain(self._plain_[index])
+            else:
+                ret = _metrics._call(self.type, 'list_builds',
+                                     self.type.from_plain,
+                                     self._plain_[index])
+                _metrics._max(self.type, 'list_size', len(self.__shadow) + 1)
+            ret._parent_ = (self, index)
+            if self._watched_ or ret._views_:
+                _adopt(self, index, ret)
+            self.__shadow[index] = ret
+        return ret
+
+    def _splice(self, start, removed, added):
+        # Keep shadow keys in sync with plain list after replacing
+        # `removed` items at `start` by `added` new ones.
+        self.__items = None
+        if removed == added == 0:
+            return
+        if self.__shadow:
+            self.__shadow = self._shifted(self.__shadow, start, removed,
+                                          added)
+        if self.__streamed:
+            self.__streamed = WeakValueDictionary(self._shifted(
+                self.__streamed, start, removed, added))
+
+    def _shifted(self, wrappers, start, removed, added):
+        stop = start + removed
+        delta = added - removed
+        ret = {}
+        for key, val in list(wrappers.items()):
+            if key < start:
+                ret[key] = val
+            elif key < stop:
+                _orphan(self, val)
+            else:
+                key += delta
+                ret[key] = val
+                if delta:
+                    _adopt(self, key, val)
+        return ret
+
+    def _move(self, position):
+        # put wrappers at `position(index)`, orphan them for None
+        self.__items = None
+        if self.__shadow:
+            self.__shadow = self._moved(self.__shadow, position)
+        if self.__streamed:
+            self.__streamed = WeakValueDictionary(self._moved(
+                self.__streamed, position))
+
+    def _moved(self, wrappers, position):
+        ret = {}
+        for key, val in list(wrappers.items()):
+            new = position(key)
+            if new is None:
+                _orphan(self, val)
+            else:
+                ret[new] = val
+                if new != key:
+                    _adopt(self, new, val)
+        return ret
+
     def __iter__(self):
-        if self.__shadow is None:
-            t = self.type
-            self.__shadow = [t.from_plain(i) for i in self._plain_]
-        return iter(self.__shadow)
+        if self._stored_:
+            # wrappers of paged in items are not kept
+            return self.stream()
+        items = self.__items
+        if items is None:
+            shadow = self.__shadow
+            size = len(shadow)
+            if size != len(self._plain_):
+                return self._iter()
+            # every item is wrapped, iterate over a list at C speed
+            items = self.__items = [shadow[i] for i in range(size)]
+        return iter(items)
+
+    def _iter(self):
+        index = 0
+        while index < len(self._plain_):
+            yield self._item(index)
+            index += 1
+
+    def _child(self, index):
+        ret = self.__shadow.get(index)
+        if ret is None and self.__streamed:
+            ret = self.__streamed.get(index)
+        return ret
+
+    def _fill(self):
+        # build wrappers of every item, see Component.materialize()
+        shadow = self.__shadow
+        new = object.__new__
+        t = self.type
+        make = _maker(t)
+        watched = self._watched_
+        ret = []
+        for index, plainitem in enumerate(self._plain_):
+            item = shadow.get(index)
+            if item is None and self.__streamed:
+                item = self.__streamed.pop(index, None)
+                if item is not None:
+                    shadow[index] = item
+            if item is None:
+                if make is None:
+                    item = new(t)
+                    item._plain_ = plainitem
+                elif _metrics is None:
+                    item = make(plainitem)
+                else:
+                    item = _metrics._call(t, 'list_builds', make, plainitem)
+                shadow[index] = item
+                item._parent_ = (self, index)
+                if watched:
+                    item._watched_ = True
+            ret.append(item)
+        if make is not None and _metrics is not None:
+            _metrics._max(t, 'list_size', len(shadow))
+        return ret
+
+    def _wrappers(self):
+        ret = list(self.__shadow.values())
+        if self.__streamed:
+            ret.extend(self.__streamed.values())
+        return ret
+
+    def stream(self):
+        """Iterate over items without caching freshly built wrappers.
+
+        The proxy keeps such wrappers only while they are referenced
+        elsewhere, moving them on inserts and removals like cached ones.
+        """
+        t = self.type
+        for index, plainitem in enumerate(self._plain_):
+            ret = self._child(index)
+            if ret is None:
+                streamed = self.__streamed
+                if streamed is None:
+                    streamed = self.__streamed = WeakValueDictionary()
+                ret = t.from_plain(plainitem)
+                _adopt(self, index, ret)
+                streamed[index] = ret
+            yield ret
 
     def __getitem__(self, index):
-        if self.__shadow is None:
-            t = self.type
-            self.__shadow = [t.from_plain(i) for i in self._plain_]
-        return self.__shadow[index]
+        items = self.__items
+        if items is not None:
+            return items[index]
+        if isinstance(index, slice):
+            return [self._item(i)
+                    for i in range(*index.indices(len(self._plain_)))]
+        return self._item(self._index(index))
+
+    def _put(self, index, item):
+        self.__items = None
+        old = self.__shadow.get(index)
+        if old is None and self.__streamed:
+            old = self.__streamed.pop(index, None)
+        if old is not None:
+            _orphan(self, old)
+        _adopt(self, index, item)
+        self.__shadow[index] = item
 
     def __setitem__(self, index, val):
-        if self.__shadow is None:
-            t = self.type
-            self.__shadow = [t.from_plain(i) for i in self._plain_]
-        self.__shadow[index] = val
-        if isinstance(val, Sequence):
-            nv = []
-            for i in val:
-                assert isinstace(i, self.type)
-                nv.append(i._plain_)
-        else:
-            nv = val._plain_
-        self._plain_[index] = nv
+        if isinstance(index, slice):
+            items = list(val)
+            for i in items:
+                assert isinstance(i, self.type)
+            start, stop, step = index.indices(len(self._plain_))
+            positions = range(start, stop, step)
+            items = _placed_all(self, items, positions)
+            if self._owned_ != _cow_epoch:
+                _unshare(self)
+            self._plain_[index] = [i._plain_ for i in items]
+            if step == 1:
+                self._splice(start, len(positions), len(items))
+                if self._watched_:
+                    for pos in positions:
+                        _changed(self, start, 'remove')
+                positions = range(start, start + len(items))
+                op = 'add'
+            else:
+                op = 'replace'
+            for pos, item in zip(positions, items):
+                self._put(pos, item)
+                if self._watched_:
+                    _changed(self, pos, op, item._plain_)
+            return
+        assert isinstance(val, self.type)
+        index = self._index(index)
+        val = _placed(self, index, val)
+        if self._owned_ != _cow_epoch:
+            _unshare(self)
+        self._plain_[index] = val._plain_
+        self._put(index, val)
+        if self._watched_:
+            _changed(self, index, 'replace', val._plain_)
 
     def __delitem__(self, index):
-        if self.__shadow is None:
-            t = self.type
-            self.__shadow = [t.from_plain(i) for i in self._plain_]
+        if self._owned_ != _cow_epoch:
+            _unshare(self)
+        if isinstance(index, slice):
+            start, stop, step = index.indices(len(self._plain_))
+            positions = sorted(range(start, stop, step))
+            del self._plain_[index]
+            if step == 1:
+                self._splice(start, len(positions), 0)
+            elif positions:
+                dropped = set(positions)
+                self._move(lambda key: None if key in dropped
+                           else key - bisect_left(positions, key))
+            if self._watched_:
+                for pos in reversed(positions):
+                    _changed(self, pos, 'remove')
+            return
+        index = self._index(index)
         del self._plain_[index]
-        del self.__shadow[index]
+        self._splice(index, 1, 0)
+        if self._watched_:
+            _changed(self, index, 'remove')
 
     def insert(self, index, value):
         assert isinstance(value, self.type)
-        if self.__shadow is None:
-            t = self.type
-            self.__shadow = [t.from_plain(i) for i in self._plain_]
-        self.__shadow.insert(index, value)
+        value = _placed(self, None, value)
+        if self._owned_ != _cow_epoch:
+            _unshare(self)
+        size = len(self._plain_)
+        if index < 0:
+            index = max(size + index, 0)
+        index = min(index, size)
         self._plain_.insert(index, value._plain_)
+        if index < size:
+            self._splice(index, 0, 1)
+        self._put(index, value)
+        if self._watched_:
+            _changed(self, index, 'add', value._plain_)
+
+    def extend(self, values):
+        items = list(values)
+        for item in items:
+            assert isinstance(item, self.type)
+        items = _placed_all(self, items)
+        if self._owned_ != _cow_epoch:
+            _unshare(self)
+        size = len(self._plain_)
+        self._plain_.extend([item._plain_ for item in items])
+        for index, item in enumerate(items, size):
+            self._put(index, item)
+            if self._watched_:
+                _changed(self, index, 'add', item._plain_)
+
+    def clear(self):
+        if self._owned_ != _cow_epoch:
+            _unshare(self)
+        size = len(self._plain_)
+        del self._plain_[:]
+        self._splice(0, size, 0)
+        if self._watched_:
+            for index in range(size - 1, -1, -1):
+                _changed(self, index, 'remove')
+
+    def pop(self, index=-1):
+        index = self._index(index)
+        ret = self._item(index)
+        del self[index]
+        return ret
+
+    def index(self, value, start=0, stop=None):
+        size = len(self._plain_)
+        start, stop, step = slice(start, stop).indices(size)
+        parent = getattr(value, '_parent_', None)
+        if parent is not None and parent[0] is self and \
+                start <= parent[1] < stop and \
+                self._child(parent[1]) is value:
+            return parent[1]
+        # compare plain data without building wrappers
+        if isinstance(value, self.type):
+            try:
+                return self._plain_.index(value._plain_, start, stop)
+            except ValueError:
+                pass
+        raise ValueError("{!r} is not in list".format(value))
+
+    def remove(self, value):
+        del self[self.index(value)]
+
+    def reverse(self):
+        size = len(self._plain_)
+        self._reorder(range(size - 1, -1, -1))
+
+    def sort(self, key=None, reverse=False):
+        """Sort items in place by plain values.
+
+        `key` is a field name or a function of plain item, wrappers are
+        not built.
+        """
+        plainvals = self._plain_
+        if key is None:
+            keyfunc = plainvals.__getitem__
+        elif isinstance(key, str):
+            keyfunc = self._values(self._names([key])[0]).__getitem__
+        else:
+            keyfunc = lambda index: key(plainvals[index])  # noqa
+        order = sorted(range(len(plainvals)), key=keyfunc, reverse=reverse)
+        self._reorder(order)
+
+    def _reorder(self, order):
+        # put item `order[i]` at position `i`
+        if self._owned_ != _cow_epoch:
+            _unshare(self)
+        plainvals = self._plain_
+        plainvals[:] = [plainvals[old] for old in order]
+        if self.__shadow or self.__streamed:
+            self._move(dict(zip(order, range(len(order)))).get)
+        if self._watched_:
+            for new, old in enumerate(order):
+                if new != old:
+                    _changed(self, new, 'replace', plainvals[new])
+
+    def _names(self, names):
+        fields = self.type._fields_
+        names = tuple(fields if names is None else names)
+        for name in names:
+            if name not in fields:
+                raise Error("Unknown field '{}'".format(name))
+        return names
+
+    def to_columns(self, fields=None, arrays=None):
+        """Return dict of field name to values of every item.
+
+        Values are read from plain data without wrapping items.  `arrays`
+        maps names to array typecodes for columns to be returned as
+        array.array.
+        """
+        ret = OrderedDict()
+        arrays = arrays or {}
+        for name in self._names(fields):
+            column = self._values(name)
+            typecode = arrays.get(name)
+            if typecode is not None:
+                column = array(typecode, column)
+            ret[name] = column
+        return ret
+
+    def _values(self, name):
+        try:
+            # a C level pass per column beats building rows
+            return list(map(itemgetter(name), self._plain_))
+        except KeyError:
+            return self._column(name)
+
+    def _column(self, name):
+        field = self.type._fields_[name]
+        ret = []
+        for index, item in enumerate(self._plain_):
+            val = item.get(name, sentinel)
+            if val is sentinel:
+                try:
+                    val = field.getter(sentinel)[1]
+                except AttributeError as exc:
+                    raise _nested_error(Error(str(exc)), index) from None
+            ret.append(val)
+        return ret
+
+    def from_columns(self, columns, validate=False):
+        """Replace items by ones built from `columns`.
+
+        `columns` maps field names to sequences of equal length, plain
+        items are made in bulk without wrappers.
+        """
+        names = self._names(columns)
+        if not names:
+            raise Error("At least one column is required")
+        sizes = set(len(columns[name]) for name in names)
+        if len(sizes) > 1:
+            raise Error("Columns have different lengths")
+        plainvals = [dict(zip(names, row))
+                     for row in zip(*[columns[name] for name in names])]
+        if validate:
+            check = self.type.validate_plain
+            for index, plainval in enumerate(plainvals):
+                try:
+                    check(plainval)
+                except Error as exc:
+                    raise _nested_error(exc, index) from None
+        if self._owned_ != _cow_epoch:
+            _unshare(self)
+        size = len(self._plain_)
+        self._plain_[:] = plainvals
+        self._splice(0, size, len(plainvals))
+        if self._watched_:
+            for index in range(size - 1, -1, -1):
+                _changed(self, index, 'remove')
+            for index, plainval in enumerate(plainvals):
+                _changed(self, index, 'add', plainval)
 
 
 class FieldList(Field):
-    def __init__(self, type):
+    required = False
+    nested = True
+
+    def __init__(self, type, *, index=(), storage=None):
         super().__init__()
         self.type = type
+        self.index = _check_index(type, index)
+        # keeps items out of memory, see steward.storage
+        self.storage = storage
+
+    def validate(self, plainval):
+        if not isinstance(plainval, (list, tuple)):
+            raise Error("a list is required, got {}".format(
+                builtins.type(plainval).__name__))
+        validate = self.type.validate_plain
+        for index, val in enumerate(plainval):
+            try:
+                validate(val)
+            except Error as exc:
+                raise _nested_error(exc, index) from None
+
+    def __set__(self, instance, value, check_const=True):
+        # ``obj.items += more`` extends the proxy and sets it back
+        if value is not None and instance.__dict__.get(self.name) is value:
+            return
+        super().__set__(instance, value, check_const)
 
     def setter(self, value):
         raise AttributeError("FieldList cannot be set")
 
     def getter(self, plainval):
+        storage = self.storage
         if plainval is sentinel:
-            plainval = []
+            plainval = [] if storage is None else storage.list()
+        elif storage is not None and not storage.owns(plainval):
+            plainval = storage.list(plainval)
         if isinstance(plainval, tuple):
             plainval = list(plainval)
-        assert isinstance(plainval, list), plainval
-        return ListProxy._from_plain(self.type, plainval), plainval
+        assert type(plainval) is list or isinstance(plainval, Sequence), \
+            plainval
+        ret = ListProxy._from_plain(self.type, plainval, self.index)
+        if storage is not None:
+            # changed items are written to the store again
+            ret._stored_ = ret._watched_ = True
+        return ret, plainval
+
+
+class FieldArray(Field):
+    """Homogeneous numbers kept in array.array of `typecode`.
+
+    Plain lists are converted on first access and plain data keeps the
+    array in place of the list, as_plain() gives it as a list.
+    memoryview() of the value and numpy.frombuffer() give zero-copy
+    access to the buffer.
+    """
+    required = False
+    converts = True
+
+    def __init__(self, typecode):
+        if typecode not in typecodes or typecode in 'uw':
+            raise ValueError("numeric array typecode is required, "
+                             "got {!r}".format(typecode))
+        super().__init__()
+        self.typecode = typecode
+
+    def _convert(self, value):
+        if isinstance(value, array) and value.typecode == self.typecode:
+            return value
+        try:
+            view = memoryview(value)
+        except TypeError:
+            return array(self.typecode, value)
+        ret = array(self.typecode)
+        if view.format.lstrip('@=') == self.typecode:
+            # same native layout, copy the buffer as a whole
+            ret.frombytes(view.cast('B') if view.c_contiguous
+                          else view.tobytes())
+        else:
+            ret.extend(view.tolist())
+        return ret
+
+    def validate(self, plainval):
+        if isinstance(plainval, array):
+            if plainval.typecode != self.typecode:
+                raise Error("an array of '{}' is required, got '{}'".format(
+                    self.typecode, plainval.typecode))
+            return
+        if not isinstance(plainval, (list, tuple)):
+            raise Error("a list is required, got {}".format(
+                builtins.type(plainval).__name__))
+        try:
+            array(self.typecode, plainval)
+        except (TypeError, OverflowError) as exc:
+            raise Error("bad item for array of '{}': {}".format(
+                self.typecode, exc)) from None
+
+    def setter(self, value):
+        ret = self._convert(value)
+        return ret, ret
+
+    def getter(self, plainval):
+        if plainval is sentinel:
+            ret = array(self.typecode)
+            return ret, ret
+        ret = self._convert(plainval)
+        return ret, ret
+
+
+def json_default(obj):
+    """Make arrays and read-only views acceptable for json.dumps().
+
+    Pass as ``default`` argument: ``json.dumps(plain, default=json_default)``
+    """
+    if isinstance(obj, array):
+        return obj.tolist()
+    if isinstance(obj, Mapping):
+        return dict(obj)
+    if isinstance(obj, Sequence):
+        return list(obj)
+    raise TypeError("Object of type {} is not JSON serializable".format(
+        type(obj).__name__))
+
+
+_projections = {}
+
+
+class Projection:
+    """Subset of `cls` fields selected by dotted `paths`.
+
+    ``'b.c'`` selects field ``c`` of component stored in ``b``; paths
+    through FieldList and FieldDict apply to every item.  Plain data is
+    pruned to the selected fields, so decoding, validation, clone() and
+    as_plain() of the result pay only for them.
+    """
+
+    def __init__(self, cls, paths):
+        if isinstance(paths, str):
+            paths = [paths]
+        self.cls = cls
+        self.paths = tuple(paths)
+        self._tree = {}
+        for path in self.paths:
+            self._add(self._tree, cls, path.split('.'), path)
+        self._node = self._compile(cls, self._tree)
+
+    def _add(self, tree, cls, names, path):
+        name = names[0]
+        field = cls._fields_.get(name) if cls is not None else None
+        if field is None:
+            raise Error("Unknown field '{}' in projection '{}'".format(
+                name, path))
+        if len(names) == 1:
+            tree[name] = None
+            return
+        if not field.nested:
+            raise Error("Cannot project into plain field '{}' in "
+                        "'{}'".format(name, path))
+        if name in tree and tree[name] is None:
+            # the whole value is selected already
+            return
+        self._add(tree.setdefault(name, {}), field.type, names[1:], path)
+
+    def _compile(self, cls, tree):
+        node = []
+        for name, subtree in tree.items():
+            field = cls._fields_[name]
+            child = None
+            if subtree is not None:
+                child = self._compile(field.type, subtree)
+            node.append((name, field, child))
+        return node
+
+    def prune(self, plainval):
+        """Return copy of `plainval` holding selected fields only."""
+        return self._prune(self._node, plainval)
+
+    def _prune(self, node, plainval):
+        ret = {}
+        for name, field, child in node:
+            val = plainval.get(name, sentinel)
+            if val is sentinel:
+                continue
+            if child is None or val is None:
+                ret[name] = val
+            elif isinstance(field, FieldList):
+                ret[name] = [self._prune(child, item) for item in val]
+            elif isinstance(field, FieldDict):
+                ret[name] = {key: self._prune(child, item)
+                             for key, item in val.items()}
+            else:
+                ret[name] = self._prune(child, val)
+        return ret
+
+    def validate(self, plainval):
+        """Check selected fields of `plainval` against the schema."""
+        self._validate(self._node, plainval)
+
+    def _validate(self, node, plainval):
+        if not isinstance(plainval, Mapping):
+            raise Error("a dict is required, got {}".format(
+                type(plainval).__name__))
+        missing = [name for name, field, child in node
+                   if field.required and name not in plainval]
+        if missing:
+            raise Error("Missing params: '{}'".format(
+                ', '.join(sorted(missing))))
+        for name, field, child in node:
+            val = plainval.get(name, sentinel)
+            if val is sentinel:
+                continue
+            try:
+                if child is None:
+                    field.validate(val)
+                else:
+                    self._validate_nested(field, child, val)
+            except Error as exc:
+                raise _nested_error(exc, name) from None
+
+    def _validate_nested(self, field, child, val):
+        if isinstance(field, FieldList):
+            if not isinstance(val, (list, tuple)):
+                raise Error("a list is required, got {}".format(
+                    type(val).__name__))
+            items = enumerate(val)
+        elif isinstance(field, FieldDict):
+            if not isinstance(val, Mapping):
+                raise Error("a dict is required, got {}".format(
+                    type(val).__name__))
+            items = val.items()
+        elif val is None:
+            return
+        else:
+            self._validate(child, val)
+            return
+        for key, item in items:
+            try:
+                self._validate(child, item)
+            except Error as exc:
+                raise _nested_error(exc, key) from None
+
+    def from_plain(self, plainval, validate=False):
+        """Wrap pruned `plainval` into `cls` instance."""
+        if validate:
+            self.validate(plainval)
+        return self.cls.from_plain(self.prune(plainval))
+
+
+def _projection(cls, only):
+    if isinstance(only, Projection):
+        if only.cls is not cls:
+            raise Error("Projection of {} cannot be used for {}".format(
+                only.cls.__name__, cls.__name__))
+        return only
+    if isinstance(only, str):
+        only = [only]
+    key = (cls, tuple(only))
+    ret = _projections.get(key)
+    if ret is None:
+        ret = _projections[key] = Projection(cls, only)
+    return ret
+
+
+class computed:
+    """Read-only attribute computed from fields and cached per instance.
+
+    The cached value is dropped when a field listed in `depends`, all
+    fields by default, is changed through the component or a proxy,
+    nested components included.  Changes made in place to values of
+    plain fields are not seen.  A component is kept in one place of
+    one tree only, one put in a second place is stored as cow_clone(),
+    so its changes reach every value depending on it.
+    Use as ``@computed`` or ``@computed(depends=['items'])``.
+    """
+    name = None
+
+    def __init__(self, func=None, *, depends=None):
+        self.func = func
+        self.depends = None if depends is None else tuple(depends)
+        self.__doc__ = getattr(func, '__doc__', None)
+
+    def __call__(self, func):
+        if self.func is not None:
+            raise TypeError("'computed' object is not callable")
+        self.func = func
+        self.__doc__ = func.__doc__
+        return self
+
+    def set_name(self, name):
+        assert self.name is None, self.name
+        self.name = name
+
+    def __get__(self, instance, owner):
+        if instance is None:
+            return self
+        _watch(instance)
+        # the instance attribute is found first on next reads
+        ret = instance.__dict__[self.name] = self.func(instance)
+        return ret
+
+
+def _dependents(cls):
+    # field name -> names of computed values to reset on its change
+    ret = {}
+    fields = cls._fields_
+    for item in cls._computed_.values():
+        depends = fields if item.depends is None else item.depends
+        for name in depends:
+            if name not in fields:
+                raise TypeError("Unknown field '{}' in depends of '{}'"
+                                .format(name, item.name))
+            ret[name] = ret.get(name, ()) + (item.name,)
+    return ret
 
 
 class Namespace(OrderedDict):
     def __init__(self, bases):
         super().__init__()
         self.fields = {}
+        self.computed = {}
         for b in bases:
             if issubclass(b, Component):
                 self.fields.update(b._fields_)
+                self.computed.update(b._computed_)
 
     def __setitem__(self, key, val):
         super().__setitem__(key, val)
         if isinstance(val, Field):
             val.set_name(key)
             self.fields[key] = val
+        elif isinstance(val, computed):
+            val.set_name(key)
+            self.computed[key] = val
 
     def __delitem__(self, key):
         raise RuntimeError("Not allowed")
 
 
+def _is_plain_field(field):
+    # Field which stores its value as is and may be handled inline
+    t = type(field)
+    return (t.__get__ is Field.__get__ and t.__set__ is Field.__set__ and
+            t.getter is Field.getter and t.setter is Field.setter)
+
+
+def _compile(source, name, env):
+    code = compile(source, '<steward {}>'.format(name), 'exec')
+    exec(code, env)
+    ret = env[name]
+    ret._compiled_ = True
+    return ret
+
+
+def _compile_init(cls):
+    """Build __init__ with per-field handling unrolled for `cls`."""
+    fields = cls._fields_
+    for name in fields:
+        if not name.isidentifier() or iskeyword(name) or \
+                name.startswith('__'):
+            return None
+    # field names are parameters, so builtins are bound as helpers too
+    env = {'__S': sentinel, '__Error': Error, '__cls': cls,
+           '__generic': Component.__init__, '__sorted': sorted}
+    args = ''.join('{}=__S, '.format(name) for name in fields)
+    lines = [
+        'def __init__(__self, *, {}**__extra):'.format(args),
+        '    if __self.__class__ is not __cls:',
+        '        __kw = {{__k: __v for __k, __v in ({}) if __v is not __S}}'
+        .format(''.join("('{0}', {0}), ".format(name) for name in fields)),
+        '        __kw.update(__extra)',
+        '        return __generic(__self, **__kw)',
+        '    if __extra:',
+        '        raise __Error("Extra params: \'{}\'".format(',
+        "            ', '.join(__sorted(__extra))))",
+        '    __missing = ()',
+        '    __plain = __self._plain_ = {}',
+    ]
+    if not cls._compact_:
+        lines.append('    __cache = __self.__dict__')
+        store = "__cache['{0}'] = __plain['{0}'] = {0}"
+    else:
+        store = "__plain['{0}'] = {0}"
+    for name, field in fields.items():
+        env['__f_' + name] = field
+        if _is_plain_field(field):
+            if field.default is not sentinel:
+                env['__d_' + name] = field.default
+                fill = '{0} = __d_{0}'.format(name)
+            elif field.maker is not sentinel:
+                env['__m_' + name] = field.maker
+                fill = '{0} = __m_{0}()'.format(name)
+            else:
+                lines += [
+                    '    if {} is __S:'.format(name),
+                    "        __missing += ('{}',)".format(name),
+                    '    else:',
+                    '        ' + store.format(name)]
+                continue
+            lines += [
+                '    if {} is __S:'.format(name),
+                '        ' + fill,
+                '    ' + store.format(name)]
+        else:
+            lines += [
+                '    if {} is not __S:'.format(name),
+                '        __f_{0}.__set__(__self, {0}, False)'.format(name),
+                '    else:',
+                '        try:',
+                '            __f_{}.__get__(__self, __cls)'.format(name),
+                '        except AttributeError:',
+                "            __missing += ('{}',)".format(name)]
+    lines += [
+        '    if __missing:',
+        '        raise __Error("Missing params: \'{}\'".format(',
+        "            ', '.join(__sorted(__missing))))"]
+    return _compile('\n'.join(lines), '__init__', env)
+
+
+# validate methods of fields holding nested components
+_level_validators = (FieldComp.validate, FieldList.validate,
+                     FieldDict.validate)
+
+
+def _compile_validator(cls):
+    """Build validate_plain checking plain data against `cls` schema.
+
+    Components nesting components which nest in turn are checked by
+    _validate() walking the levels with an explicit stack, check_plain()
+    checks one level and returns the fields to walk into.
+    """
+    fields = cls._fields_
+    env = {'__S': sentinel, '__Error': Error, '__dict': dict,
+           '__names': cls._names_, '__nested': _nested_error}
+    levels = [type(field).validate in _level_validators
+              for field in fields.values()]
+    nested = [level and getattr(field.type.validate_plain, '_nests_', False)
+              for level, field in zip(levels, fields.values())]
+    funcname = 'check_plain' if any(nested) else 'validate_plain'
+    lines = [
+        'def {}(plainval):'.format(funcname),
+        '    if not isinstance(plainval, __dict):',
+        '        raise __Error("a dict is required, got {}".format(',
+        '            type(plainval).__name__))',
+        '    if not __names.issuperset(plainval):',
+        '        raise __Error("Extra params: \'{}\'".format(',
+        "            ', '.join(sorted(map(str, set(plainval) - __names)))))",
+        '    __missing = ()']
+    for index, (name, field) in enumerate(fields.items()):
+        if field.required:
+            lines += [
+                '    if {!r} not in plainval:'.format(name),
+                '        __missing += ({!r},)'.format(name)]
+    lines += [
+        '    if __missing:',
+        '        raise __Error("Missing params: \'{}\'".format(',
+        "            ', '.join(sorted(__missing))))"]
+    if any(nested):
+        lines.append('    __ret = []')
+    for index, (key, field) in enumerate(fields.items()):
+        if type(field).validate is Field.validate:
+            continue
+        env['__f_{}'.format(index)] = field
+        lines += [
+            '    __v = plainval.get({!r}, __S)'.format(key),
+            '    if __v is not __S:']
+        if nested[index]:
+            lines.append('        __ret.append(({!r}, __f_{}, __v))'.format(
+                key, index))
+            continue
+        lines += [
+            '        try:',
+            '            __f_{}.validate(__v)'.format(index),
+            '        except __Error as __exc:',
+            '            raise __nested(__exc, {!r}) from None'.format(key)]
+    if not any(nested):
+        ret = _compile('\n'.join(lines), funcname, env)
+        ret._nests_ = any(levels)
+        return ret
+    lines.append('    return __ret')
+    check = _compile('\n'.join(lines), funcname, env)
+
+    def validate_plain(plainval):
+        _validate(cls, plainval)
+    validate_plain._compiled_ = True
+    validate_plain._nests_ = True
+    validate_plain.check_plain = check
+    return validate_plain
+
+
+def _validate(cls, plainval):
+    # levels of nested components are (path, class, plain data), fields
+    # of flat components are checked in place
+    stack = [((), cls, plainval)]
+    while stack:
+        path, cls, plainval = stack.pop()
+        children = []
+        try:
+            for key, field, val in cls.validate_plain.check_plain(plainval):
+                try:
+                    check = getattr(field.type.validate_plain,
+                                    'check_plain', None)
+                    if check is None:
+                        field.validate(val)
+                    else:
+                        children.extend(
+                            (path + (key,) + sub, field.type, item)
+                            for sub, item in _nested_items(field, val))
+                except Error as exc:
+                    raise _nested_error(exc, key) from None
+        except Error as exc:
+            for key in reversed(path):
+                exc = _nested_error(exc, key)
+            raise exc from None
+        children.reverse()
+        stack.extend(children)
+
+
+def _nested_items(field, plainval):
+    # ((key,), item) of nested components of `plainval` for `field`
+    if type(field).validate is FieldComp.validate:
+        return [((), plainval)] if plainval is not None else []
+    if type(field).validate is FieldList.validate:
+        if not isinstance(plainval, (list, tuple)):
+            raise Error("a list is required, got {}".format(
+                builtins.type(plainval).__name__))
+        return [((index,), item) for index, item in enumerate(plainval)]
+    if not isinstance(plainval, dict):
+        raise Error("a dict is required, got {}".format(
+            builtins.type(plainval).__name__))
+    return [((key,), item) for key, item in plainval.items()]
+
+
 class ComponentMeta(type):
     @classmethod
-    def __prepare__(cls, name, bases):
+    def __prepare__(cls, name, bases, **kwargs):
         return Namespace(bases)
 
-    def __init__(cls, name, bases, dct):
+    def __new__(mcls, name, bases, dct, compact=None):
+        inherited = any(getattr(b, '_compact_', False) for b in bases)
+        if compact is None:
+            compact = inherited
+        elif not compact and inherited:
+            raise TypeError("Subclass of compact component is compact")
+        if compact and '__slots__' not in dct:
+            if inherited:
+                dct['__slots__'] = ()
+            elif any(b.__dictoffset__ for b in bases):
+                raise TypeError("Compact component cannot inherit "
+                                "classes with instance __dict__")
+            else:
+                # __dict__ is created on demand only, e.g. for caching
+                # nested components and proxies
+                dct['__slots__'] = ('_plain_', '__dict__', '__weakref__')
+        cls = super().__new__(mcls, name, bases, dct)
+        cls._compact_ = compact
+        return cls
+
+    def __init__(cls, name, bases, dct, compact=None):
         type.__init__(cls, name, bases, dct)
         cls._fields_ = dct.fields
         cls._names_ = frozenset(dct.fields.keys())
+        cls._computed_ = dct.computed
+        cls._dependents_ = _dependents(cls) if dct.computed else None
+        if cls._compact_:
+            for field in cls._fields_.values():
+                if _is_plain_field(field):
+                    field.compact = True
+        init = cls.__init__
+        if '__init__' not in dct and (getattr(init, '_compiled_', False) or
+                                      init is Component.__init__):
+            init = _compile_init(cls)
+            if init is not None:
+                cls.__init__ = init
+        validator = getattr(cls, 'validate_plain', None)
+        if 'validate_plain' not in dct and \
+                (validator is None or getattr(validator, '_compiled_', False)):
+            cls.validate_plain = staticmethod(_compile_validator(cls))
 
 
 class Component(metaclass=ComponentMeta):
+    __slots__ = ()
+    _parent_ = None
+    _owned_ = 0
+    _shared_ = 0
+    _tracker_ = None
+    _index_ = None
+    _digest_ = None
+    _dependents_ = None
+    _stored_ = False
+    # plain data of the tree may hold read-only views, see _export()
+    _views_ = False
+    # changes are reported to owners, see _watch()
+    _watched_ = False
 
     def __init__(self, **kwargs):
         self._plain_ = {}
@@ -297,20 +2446,330 @@ class Component(metaclass=ComponentMeta):
             raise Error("Missing params: '{}'".format(missing))
 
     @classmethod
-    def from_plain(cls, plainval):
+    def from_plain(cls, plainval, validate=False, only=None, eager=False):
+        """Wrap `plainval` without decoding it.
+
+        `only` is a Projection or dotted field paths limiting the
+        component to a part of `plainval`, see Projection.  With `eager`
+        the whole tree is decoded at once, see materialize().
+        """
+        if only is not None:
+            self = _projection(cls, only).from_plain(plainval, validate)
+        else:
+            if validate:
+                cls.validate_plain(plainval)
+            if _metrics is not None:
+                _metrics._add(cls, 'from_plain')
+            self = object.__new__(cls)
+            self._plain_ = plainval
+        if eager:
+            self.materialize()
+        return self
+
+    def materialize(self):
+        """Build wrappers of every nested component at once, return self.
+
+        The tree is walked in one pass with an explicit stack, so depth
+        is not limited by recursion, and accessing fields later finds
+        them cached.  Fields missing in plain data, lists and dicts
+        kept by a storage and dicts with a limited cache stay lazy.
+        """
+        new = object.__new__
+        stack = [self]
+        pop = stack.pop
+        push = stack.append
+        extend = stack.extend
+        while stack:
+            node = pop()
+            cls = type(node)
+            plainval = node._plain_
+            cache = node.__dict__
+            for name, field, kind in _plan(cls):
+                ret = cache.get(name, sentinel)
+                if ret is sentinel:
+                    val = plainval.get(name, sentinel)
+                    if val is sentinel:
+                        continue
+                    if kind is Field:
+                        cache[name] = val
+                        continue
+                    if kind is FieldComp:
+                        ret = None
+                        if val is not None:
+                            make = _maker(field.type)
+                            if make is None:
+                                ret = new(field.type)
+                                ret._plain_ = val
+                            else:
+                                ret = make(val)
+                    elif kind is FieldList and not isinstance(val, tuple):
+                        ret = ListProxy._from_plain(field.type, val,
+                                                    field.index)
+                    elif kind is FieldDict:
+                        ret = DictProxy._from_plain(
+                            field.type, val, field.cache, field.cache_size,
+                            field.index)
+                    else:
+                        # custom getters do their own conversions
+                        ret = field.__get__(node, cls)
+                        kind = None
+                    if kind is not None:
+                        cache[name] = ret
+                        if ret is not None:
+                            ret._parent_ = (node, name)
+                            if node._watched_:
+                                ret._watched_ = True
+                if isinstance(ret, Component):
+                    push(ret)
+                elif isinstance(ret, (ListProxy, DictProxy)) and \
+                        not ret._stored_:
+                    extend(ret._fill())
+        return self
+
+    @classmethod
+    def from_plain_many(cls, plainvals, validate=False, decode=(),
+                        lazy=False, intern=None):
+        """Wrap every item of `plainvals`.
+
+        Names listed in `decode` are decoded right away.  With `lazy`
+        a generator is returned instead of a list.  `intern` is True or
+        an Interner sharing equal subtrees of items, see
+        steward.interning.
+        """
+        if intern is not None:
+            return cls._from_plain_interned(plainvals, validate, decode,
+                                            lazy, intern)
+        fields = cls._fields_
+        direct = []
+        getters = []
+        for name in decode:
+            field = fields.get(name)
+            if field is None:
+                raise Error("Unknown field '{}' cannot be decoded".format(
+                    name))
+            if _is_plain_field(field):
+                direct.append(field)
+            else:
+                getters.append(field.__get__)
+        validator = cls.validate_plain if validate else None
+        if lazy:
+            return (cls._from_plain_one(plainval, index, validator,
+                                        direct, getters)
+                    for index, plainval in enumerate(plainvals))
+        if validator is None and not direct and not getters:
+            new = object.__new__
+            ret = []
+            append = ret.append
+            for plainval in plainvals:
+                self = new(cls)
+                self._plain_ = plainval
+                append(self)
+            if _metrics is not None:
+                _metrics._add(cls, 'from_plain', len(ret))
+            return ret
+        one = cls._from_plain_one
+        return [one(plainval, index, validator, direct, getters)
+                for index, plainval in enumerate(plainvals)]
+
+    @classmethod
+    def _from_plain_interned(cls, plainvals, validate, decode, lazy,
+                             interner):
+        global _cow_epoch
+        if interner is True:
+            from .interning import Interner
+            interner = Interner()
+        plainvals = (interner.intern(cls, plainval) for plainval in plainvals)
+        items = cls.from_plain_many(plainvals, validate, decode, lazy=True)
+        # shared subtrees are copied on first change like for cow_clone()
+        _cow_epoch += 1
+        ret = _mark_shared(items, _cow_epoch)
+        return ret if lazy else list(ret)
+
+    @classmethod
+    def _from_plain_one(cls, plainval, index, validator, direct, getters):
+        if validator is not None:
+            try:
+                validator(plainval)
+            except Error as exc:
+                raise _nested_error(exc, index) from None
+        if _metrics is not None:
+            _metrics._add(cls, 'from_plain')
         self = object.__new__(cls)
         self._plain_ = plainval
+        if direct:
+            # compact components keep plain fields in _plain_ only
+            cache = None if cls._compact_ else self.__dict__
+            for field in direct:
+                name = field.name
+                val = plainval.get(name, sentinel)
+                if val is sentinel:
+                    field.__get__(self, cls)
+                elif cache is not None:
+                    cache[name] = val
+        for getter in getters:
+            getter(self, cls)
         return self
 
-    def as_plain(self):
-        return self._plain_
+    @classmethod
+    def as_plain_many(cls, components, lazy=False):
+        """Return plain data for every item of `components`."""
+        items = (cls._as_plain(item) for item in components)
+        return items if lazy else list(items)
+
+    @classmethod
+    def _as_plain(cls, item):
+        if not isinstance(item, cls):
+            raise TypeError("an {} is required, got {}".format(
+                cls.__name__, type(item).__name__))
+        return item.as_plain()
+
+    @classmethod
+    def from_buffer(cls, buffer):
+        """Wrap binary data made by as_buffer() without decoding it.
+
+        `buffer` may be bytes, memoryview or mmap.  Fields are decoded on
+        first access, plain data is read-only views copied on first change
+        like for cow_clone().
+        """
+        global _cow_epoch
+        from .binary import load
+        self = cls.from_plain(load(buffer, cls))
+        _cow_epoch += 1
+        self._shared_ = _cow_epoch
+        self._views_ = True
+        return self
+
+    def as_buffer(self):
+        """Encode component tree into bytes, see from_buffer()."""
+        from .binary import dumps
+        return dumps(self._plain_, type(self))
+
+    @classmethod
+    def from_json(cls, text):
+        """Wrap JSON text without decoding it.
+
+        `text` is str or UTF-8 bytes.  Keys are looked for when used and
+        fields are decoded on first access, plain data is read-only views
+        copied on first change like for from_buffer().
+        """
+        global _cow_epoch
+        from .rawjson import load
+        self = cls.from_plain(load(text, cls))
+        _cow_epoch += 1
+        self._shared_ = _cow_epoch
+        self._views_ = True
+        return self
+
+    def as_json(self):
+        """Encode component tree into JSON text.
+
+        Text of values not used since from_json() is written as is.
+        """
+        from .rawjson import dumps
+        return dumps(self._plain_)
+
+    def as_plain(self, only=None):
+        """Return plain data, dicts and lists all the way down.
+
+        Data read by from_buffer() or from_json() is decoded for the
+        whole tree on first call.  Arrays are given as lists and stores
+        of fields with storage are read into new lists and dicts.
+        """
+        _export(self)
+        plainval = _output(self)
+        if only is not None:
+            return _projection(type(self), only).prune(plainval)
+        return plainval
+
+    def digest(self):
+        """Return digest of plain data, cached until a change is made.
+
+        Data equal in Python, e.g. 1 and 1.0, gives the same digest.
+        Needs Python 3.6 or newer for hashlib.blake2b.
+        Changes made in place to values of plain fields, e.g. appending
+        to a list, are not seen.
+        """
+        ret = self._digest_
+        if ret is None:
+            _watch(self)
+            ret = self._digest_ = _digest(_output(self))
+        return ret
+
+    def __eq__(self, other):
+        if type(self) is not type(other):
+            return NotImplemented
+        if self._plain_ is other._plain_:
+            return True
+        if self._digest_ is not None and other._digest_ is not None and \
+                self._digest_ != other._digest_:
+            # cached digests tell different data apart at once
+            return False
+        return _equal(_output(self), _output(other))
+
+    # hashed by identity as before equality was added: equal components
+    # may hash apart, e.g. a set keeps both of them
+    __hash__ = object.__hash__
+
+    def __reduce__(self):
+        # plain data only, wrappers are made again on first access
+        return _restore, (type(self), self._plain_)
+
+    def _child(self, name):
+        ret = getattr(self, '__dict__', {}).get(name)
+        if isinstance(ret, (Component, ListProxy, DictProxy)):
+            return ret
+        return None
+
+    def _wrappers(self):
+        return [val for val in getattr(self, '__dict__', {}).values()
+                if isinstance(val, (Component, ListProxy, DictProxy)) and
+                val._parent_ is not None and val._parent_[0] is self]
 
     def clone(self, **kwargs):
-        ret = self.__class__(**deepcopy(self.as_plain()))
+        # stores are copied by the storage
+        _export(self)
+        if _metrics is None:
+            plainval = _deepcopy(self._plain_)
+        else:
+            plainval = _metrics._call(type(self), 'clone', _deepcopy,
+                                      self._plain_)
+            _metrics._add(type(self), 'clone_bytes', _sizeof(plainval))
+        ret = self.from_plain(plainval)
+        if self._digest_ is not None:
+            ret._digest_ = self._digest_
+            _watch(ret)
+        ret._update(kwargs)
+        return ret
+
+    def cow_clone(self, **kwargs):
+        """Clone sharing plain data with the original until changed.
+
+        Both trees copy a nested plain dict or list right before the
+        first change made through a component or proxy.  Values of plain
+        fields are shared as is, arrays are copied.
+        """
+        global _cow_epoch
+        _cow_epoch += 1
+        ret = object.__new__(self.__class__)
+        if _needs_listing(type(self)):
+            # arrays are changed in place, the clone gets copies
+            ret._plain_ = _listed(FieldComp, type(self), self._plain_, True)
+        else:
+            ret._plain_ = self._plain_.copy()
+        ret._owned_ = _cow_epoch
+        ret._shared_ = self._shared_ = _cow_epoch
+        if _root(self)._views_:
+            ret._views_ = True
+        if self._digest_ is not None:
+            ret._digest_ = self._digest_
+            _watch(ret)
+        ret._update(kwargs)
+        return ret
+
+    def _update(self, kwargs):
         fields = self._fields_
         for k, v in kwargs.items():
             field = fields.get(k)
             if field is None:
                 raise Error("Unknown field '{}' cannot be set".format(k))
-            field.__set__(ret, v, check_const=False)
-        return ret
+            field.__set__(self, v, check_const=False)
@@ -0,0 +1,118 @@
+"""Reading and writing NDJSON feeds of components over asyncio streams.
+
+Records are handled in batches of the lines received so far, the event
+loop gets control back after every batch::
+
+    reader, writer = await asyncio.open_connection(host, port)
+    async for order in iter_components(Order, reader, validate=True,
+                                       executor=pool):
+        ...
+    await write_components(writer, orders)
+
+Lines keep arriving into the StreamReader while a batch is decoded and
+checked by `executor`, they make the next batch.  The length of a line
+is bounded by CHUNK_SIZE plus the limit of the StreamReader.
+"""
+import asyncio
+import json
+
+from . import json_default
+from .parallel import _check_chunk
+
+
+# records per batch, the loop is blocked by one batch at most
+BATCH_SIZE = 256
+# bytes taken from the reader at once
+CHUNK_SIZE = 2 ** 16
+
+_encode = json.JSONEncoder(default=json_default).encode
+
+
+def _decode(cls, start, lines, validate):
+    if not validate:
+        return list(map(json.loads, lines))
+    plainvals, errors = _check_chunk(cls, start, lines, False, True)
+    if errors:
+        raise errors[0]
+    return plainvals
+
+
+async def _read(reader, lines):
+    """Add lines received so far to `lines`, waiting for one at least.
+
+    An incomplete last line is finished by readline().  Returns False at
+    the end of the stream.
+    """
+    data = await reader.read(CHUNK_SIZE)
+    if not data:
+        return False
+    if not data.endswith(b'\n'):
+        data += await reader.readline()
+    lines.extend(line for line in data.split(b'\n') if line.strip())
+    return True
+
+
+async def iter_components(cls, reader, validate=False, executor=None,
+                          batch_size=BATCH_SIZE):
+    """Yield `cls` instances decoded from NDJSON StreamReader `reader`.
+
+    Blank lines are skipped.  A batch is made of the lines received so
+    far, `batch_size` at most, and is yielded once decoded.  Records are
+    decoded and optionally validated by `executor` when given, errors
+    have the index of the record first in ``path``.
+    """
+    loop = asyncio.get_running_loop()
+    start = 0
+    received = []
+    more = True
+    while True:
+        while not received and more:
+            more = await _read(reader, received)
+        if not received:
+            return
+        lines = received[:batch_size]
+        del received[:batch_size]
+        if executor is None:
+            plainvals = _decode(cls, start, lines, validate)
+        else:
+            plainvals = await loop.run_in_executor(
+                executor, _decode, cls, start, lines, validate)
+        start += len(lines)
+        for component in cls.from_plain_many(plainvals):
+            yield component
+        await asyncio.sleep(0)
+
+
+async def _aiter(components):
+    for component in components:
+        yield component
+
+
+async def write_components(writer, components, batch_size=BATCH_SIZE):
+    """Write components to StreamWriter `writer` as NDJSON.
+
+    `components` is an iterable or an async iterable.  Every batch of
+    records is written at once and waits for the transport to drain.
+    Returns the number of records written.
+    """
+    if not hasattr(components, '__aiter__'):
+        components = _aiter(components)
+    count = 0
+    batch = []
+    async for component in components:
+        batch.append(_encode(component.as_plain()))
+        if len(batch) >= batch_size:
+            count += await _write(writer, batch)
+            batch = []
+    if batch:
+        count += await _write(writer, batch)
+    return count
+
+
+async def _write(writer, batch):
+    batch.append('')
+    writer.write('\n'.join(batch).encode('utf-8'))
+    await writer.drain()
+    # drain() returns at once until the buffer is over the high mark
+    await asyncio.sleep(0)
+    return len(batch) - 1
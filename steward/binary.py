@@ -0,0 +1,469 @@
+"""Binary encoding of component trees with lazy decoding.
+
+Components are written as records laid out by ``_fields_``: a table of
+value offsets followed by the values, so a single field, list item or
+dict entry is found without looking at the rest of buffer.  Lists keep
+an offset per item and dicts keep their keys sorted for binary search.
+
+`load()` accepts anything supporting the buffer protocol including
+``mmap`` objects and returns read-only views which decode values on
+first access.  Views keep the buffer exported, an ``mmap`` cannot be
+closed until they are garbage collected.  Offsets are 32 bit, buffers
+are limited to 4 GiB.
+"""
+import sys
+from array import array
+from copy import deepcopy
+from struct import Struct, error as StructError, unpack_from
+
+from . import (Error, FieldArray, FieldComp, FieldDict, FieldList, Mapping,
+               Sequence, sentinel)
+
+
+MAGIC = b'STWB\x01'
+
+(_NULL, _FALSE, _TRUE, _INT, _BIGINT, _FLOAT, _STR, _LIST, _DICT, _RECORD,
+ _ARRAY) = range(11)
+
+_U32 = Struct('<I')
+_HEAD = Struct('<BI')
+_INT64 = Struct('<Bq')
+_DOUBLE = Struct('<Bd')
+_ARRAY_HEAD = Struct('<BcI')
+
+# value kinds of record slots, None stands for plain JSON-like value
+_COMP, _ITEMS, _ENTRIES = range(3)
+
+_layouts = {}
+
+
+class _Layout:
+    def __init__(self, cls):
+        self.names = tuple(cls._fields_)
+        self.index = {}
+        self.kinds = {}
+        # FieldArray name -> typecode, lists are written as arrays
+        self.arrays = {}
+        for index, (name, field) in enumerate(cls._fields_.items()):
+            self.index[name] = index
+            if isinstance(field, FieldArray):
+                self.arrays[name] = field.typecode
+            if isinstance(field, FieldComp):
+                self.kinds[name] = (_COMP, field.type)
+            elif isinstance(field, FieldList):
+                self.kinds[name] = (_ITEMS, field.type)
+            elif isinstance(field, FieldDict):
+                self.kinds[name] = (_ENTRIES, field.type)
+            else:
+                self.kinds[name] = None
+
+
+def _layout(cls):
+    ret = _layouts.get(cls)
+    if ret is None:
+        ret = _layouts[cls] = _Layout(cls)
+    return ret
+
+
+# Encoding
+
+def _dump_value(out, val):
+    if val is None:
+        out.append(_NULL)
+    elif val is False:
+        out.append(_FALSE)
+    elif val is True:
+        out.append(_TRUE)
+    elif isinstance(val, int):
+        if -2 ** 63 <= val < 2 ** 63:
+            out += _INT64.pack(_INT, val)
+        else:
+            _dump_str(out, str(val), _BIGINT)
+    elif isinstance(val, float):
+        out += _DOUBLE.pack(_FLOAT, val)
+    elif isinstance(val, str):
+        _dump_str(out, val, _STR)
+    elif isinstance(val, array):
+        _dump_array(out, val)
+    elif isinstance(val, Mapping):
+        _dump_dict(out, val, None)
+    elif isinstance(val, (list, tuple, _ListView)):
+        _dump_list(out, val, None)
+    else:
+        raise TypeError("{} is not serializable".format(
+            type(val).__name__))
+
+
+def _dump_str(out, val, tag):
+    data = val.encode('utf-8')
+    out += _HEAD.pack(tag, len(data))
+    out += data
+
+
+def _dump_array(out, val):
+    out += _ARRAY_HEAD.pack(_ARRAY, val.typecode.encode('ascii'), len(val))
+    if sys.byteorder != 'little':
+        val = array(val.typecode, val)
+        val.byteswap()
+    out += val.tobytes()
+
+
+def _dump(out, val, kind):
+    if kind is None:
+        _dump_value(out, val)
+    elif kind[0] == _ITEMS:
+        _dump_list(out, val, (_COMP, kind[1]))
+    elif kind[0] == _ENTRIES:
+        _dump_dict(out, val, (_COMP, kind[1]))
+    elif val is None:
+        out.append(_NULL)
+    else:
+        _dump_record(out, val, _layout(kind[1]))
+
+
+def _dump_list(out, val, kind):
+    size = len(val)
+    out += _HEAD.pack(_LIST, size)
+    table = len(out)
+    out += bytes(4 * size)
+    for index, item in enumerate(val):
+        _U32.pack_into(out, table + 4 * index, len(out))
+        _dump(out, item, kind)
+
+
+def _dump_dict(out, val, kind, kinds=None):
+    keys = []
+    for key in val:
+        if not isinstance(key, str):
+            raise TypeError("keys must be str, got {}".format(
+                type(key).__name__))
+        keys.append(key.encode('utf-8'))
+    size = len(keys)
+    out += _HEAD.pack(_DICT, size)
+    entries = len(out)
+    out += bytes(8 * size)
+    for index in sorted(range(size), key=keys.__getitem__):
+        out += _U32.pack(index)
+    for index, (key, item) in enumerate(val.items()):
+        data = keys[index]
+        _U32.pack_into(out, entries + 8 * index, len(out))
+        out += _U32.pack(len(data))
+        out += data
+        _U32.pack_into(out, entries + 8 * index + 4, len(out))
+        _dump(out, item, kind if kinds is None else kinds.get(key))
+
+
+def _dump_record(out, val, layout):
+    index = layout.index
+    for key in val:
+        if key not in index:
+            # keys out of schema, fall back to a dict
+            _dump_dict(out, val, None, layout.kinds)
+            return
+    out += _HEAD.pack(_RECORD, len(layout.names))
+    table = len(out)
+    out += bytes(4 * len(layout.names))
+    kinds = layout.kinds
+    arrays = layout.arrays
+    for key, item in val.items():
+        _U32.pack_into(out, table + 4 * index[key], len(out))
+        if key in arrays and not isinstance(item, array):
+            item = array(arrays[key], item)
+        _dump(out, item, kinds[key])
+
+
+def dumps(plainval, cls):
+    """Encode plain data of `cls` component into bytes."""
+    out = bytearray(MAGIC)
+    try:
+        _dump_record(out, plainval, _layout(cls))
+    except StructError:
+        raise Error("Data is too large for binary format") from None
+    return bytes(out)
+
+
+# Decoding
+
+def _load_key(buf, off):
+    size = _U32.unpack_from(buf, off)[0]
+    return str(buf[off + 4:off + 4 + size], 'utf-8')
+
+
+def _load_str(buf, off):
+    return _load_key(buf, off + 1)
+
+
+def _load(buf, off):
+    """Decode plain value at `off` completely."""
+    tag = buf[off]
+    if tag == _STR:
+        return _load_str(buf, off)
+    elif tag == _INT:
+        return _INT64.unpack_from(buf, off)[1]
+    elif tag == _FLOAT:
+        return _DOUBLE.unpack_from(buf, off)[1]
+    elif tag == _NULL:
+        return None
+    elif tag == _FALSE:
+        return False
+    elif tag == _TRUE:
+        return True
+    elif tag == _BIGINT:
+        return int(_load_str(buf, off))
+    elif tag == _ARRAY:
+        typecode, size = _ARRAY_HEAD.unpack_from(buf, off)[1:]
+        ret = array(typecode.decode('ascii'))
+        start = off + _ARRAY_HEAD.size
+        ret.frombytes(buf[start:start + size * ret.itemsize])
+        if sys.byteorder != 'little':
+            ret.byteswap()
+        return ret
+    elif tag == _LIST:
+        size = _U32.unpack_from(buf, off + 1)[0]
+        offsets = unpack_from('<{}I'.format(size), buf, off + 5)
+        return [_load(buf, item) for item in offsets]
+    elif tag == _DICT:
+        size = _U32.unpack_from(buf, off + 1)[0]
+        entries = unpack_from('<{}I'.format(2 * size), buf, off + 5)
+        ret = {}
+        for index in range(0, 2 * size, 2):
+            ret[_load_key(buf, entries[index])] = \
+                _load(buf, entries[index + 1])
+        return ret
+    raise Error("Unexpected tag {} at {}".format(tag, off))
+
+
+def _decode(buf, off, kind):
+    """Decode value of `kind` at `off` completely."""
+    if kind is None:
+        return _load(buf, off)
+    code, type = kind
+    tag = buf[off]
+    if tag == _NULL and code == _COMP:
+        return None
+    size = _U32.unpack_from(buf, off + 1)[0]
+    if code == _COMP and tag == _RECORD:
+        layout = _layout(type)
+        if size != len(layout.names):
+            raise Error("Record of {} fields at {}, {} expected".format(
+                size, off, len(layout.names)))
+        offsets = unpack_from('<{}I'.format(size), buf, off + 5)
+        kinds = layout.kinds
+        return {name: _decode(buf, item, kinds[name])
+                for name, item in zip(layout.names, offsets) if item}
+    if code != _COMP and tag == _LIST:
+        offsets = unpack_from('<{}I'.format(size), buf, off + 5)
+        kind = (_COMP, type)
+        return [_decode(buf, item, kind) for item in offsets]
+    if tag == _DICT:
+        entries = unpack_from('<{}I'.format(2 * size), buf, off + 5)
+        kinds = _layout(type).kinds if code == _COMP else None
+        kind = (_COMP, type)
+        ret = {}
+        for index in range(0, 2 * size, 2):
+            key = _load_key(buf, entries[index])
+            ret[key] = _decode(buf, entries[index + 1],
+                               kind if kinds is None else kinds.get(key))
+        return ret
+    raise Error("Unexpected tag {} at {}".format(tag, off))
+
+
+def _load_slot(buf, off, kind):
+    if kind is None:
+        return _load(buf, off)
+    tag = buf[off]
+    if kind[0] == _COMP:
+        if tag == _RECORD:
+            return _RecordView(buf, off, kind)
+        if tag == _DICT:
+            return _DictView(buf, off, kind)
+        if tag == _NULL:
+            return None
+    elif kind[0] == _ITEMS and tag == _LIST:
+        return _ListView(buf, off, kind)
+    elif kind[0] == _ENTRIES and tag == _DICT:
+        return _DictView(buf, off, kind)
+    raise Error("Unexpected tag {} at {}".format(tag, off))
+
+
+class _View:
+    """Read-only plain container over a buffer.
+
+    Decoded values are cached, so the same object is returned on every
+    access.  ``copy()`` returns a shallow dict or list like the plain
+    containers do.
+    """
+    __slots__ = ('_buf', '_off', '_kind', '_size', '_cache')
+
+    def __init__(self, buf, off, kind):
+        self._buf = buf
+        self._off = off
+        self._kind = kind
+        self._size = _U32.unpack_from(buf, off + 1)[0]
+        self._cache = {}
+
+    def _offset(self, index):
+        # offsets table follows the tag and size
+        return _U32.unpack_from(self._buf, self._off + 5 + 4 * index)[0]
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def __reduce__(self):
+        # pickled as a plain container, nested views reduce the same way
+        ret = self.copy()
+        return type(ret), (ret,)
+
+    def __deepcopy__(self, memo):
+        if not self._cache:
+            # nothing was handed out yet, decode straight from buffer
+            return _decode(self._buf, self._off, self._kind)
+        return deepcopy(self.copy(), memo)
+
+
+class _RecordView(_View, Mapping):
+    __slots__ = ('_layout',)
+
+    def __init__(self, buf, off, kind):
+        super().__init__(buf, off, kind)
+        self._layout = _layout(kind[1])
+        if self._size != len(self._layout.names):
+            raise Error("Record of {} fields at {}, {} expected".format(
+                self._size, off, len(self._layout.names)))
+
+    def __getitem__(self, key):
+        ret = self._cache.get(key, sentinel)
+        if ret is not sentinel:
+            return ret
+        index = self._layout.index.get(key)
+        off = self._offset(index) if index is not None else 0
+        if not off:
+            raise KeyError(key)
+        ret = _load_slot(self._buf, off, self._layout.kinds[key])
+        self._cache[key] = ret
+        return ret
+
+    def __contains__(self, key):
+        index = self._layout.index.get(key)
+        return index is not None and self._offset(index) != 0
+
+    def __iter__(self):
+        for index, name in enumerate(self._layout.names):
+            if self._offset(index):
+                yield name
+
+    def __len__(self):
+        return sum(1 for name in self)
+
+    def copy(self):
+        return {key: self[key] for key in self}
+
+
+class _DictView(_View, Mapping):
+    __slots__ = ('_kinds',)
+
+    def __init__(self, buf, off, kind):
+        super().__init__(buf, off, kind)
+        if kind[0] == _COMP:
+            # component with keys out of schema
+            self._kinds = _layout(kind[1]).kinds
+        else:
+            self._kinds = None
+
+    def _key(self, index):
+        off = self._offset(2 * index)
+        size = _U32.unpack_from(self._buf, off)[0]
+        return self._buf[off + 4:off + 4 + size]
+
+    def _find(self, key):
+        if not isinstance(key, str):
+            return None
+        data = key.encode('utf-8')
+        lo, hi = 0, self._size
+        while lo < hi:
+            mid = (lo + hi) // 2
+            # sorted entry numbers follow the entries
+            index = self._offset(2 * self._size + mid)
+            current = bytes(self._key(index))
+            if current == data:
+                return index
+            if current < data:
+                lo = mid + 1
+            else:
+                hi = mid
+        return None
+
+    def __getitem__(self, key):
+        ret = self._cache.get(key, sentinel)
+        if ret is not sentinel:
+            return ret
+        index = self._find(key)
+        if index is None:
+            raise KeyError(key)
+        if self._kinds is None:
+            kind = (_COMP, self._kind[1])
+        else:
+            kind = self._kinds.get(key)
+        ret = _load_slot(self._buf, self._offset(2 * index + 1), kind)
+        self._cache[key] = ret
+        return ret
+
+    def __contains__(self, key):
+        return key in self._cache or self._find(key) is not None
+
+    def __iter__(self):
+        for index in range(self._size):
+            yield str(self._key(index), 'utf-8')
+
+    def __len__(self):
+        return self._size
+
+    def copy(self):
+        return {key: self[key] for key in self}
+
+
+class _ListView(_View, Sequence):
+    __slots__ = ()
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(self._size))]
+        if index < 0:
+            index += self._size
+        if not 0 <= index < self._size:
+            raise IndexError("list index out of range")
+        ret = self._cache.get(index, sentinel)
+        if ret is sentinel:
+            ret = _load_slot(self._buf, self._offset(index),
+                             (_COMP, self._kind[1]))
+            self._cache[index] = ret
+        return ret
+
+    def __len__(self):
+        return self._size
+
+    def __eq__(self, other):
+        if isinstance(other, (list, _ListView)):
+            return self.copy() == list(other)
+        return NotImplemented
+
+    __hash__ = None
+
+    def copy(self):
+        return [self[index] for index in range(self._size)]
+
+
+def load(buffer, cls):
+    """Return lazy read-only plain data of `cls` stored in `buffer`."""
+    buf = memoryview(buffer)
+    if buf.format != 'B' or buf.ndim != 1:
+        buf = buf.cast('B')
+    if buf[:len(MAGIC)] != MAGIC:
+        raise Error("Not a steward binary buffer")
+    ret = _load_slot(buf, len(MAGIC), (_COMP, cls))
+    if ret is None:
+        raise Error("Component expected at {}".format(len(MAGIC)))
+    return ret
@@ -0,0 +1,142 @@
+"""Sharing of equal plain subtrees between components.
+
+Interner replaces plain data of nested components, item lists and
+dicts of components equal to already seen ones by the same objects and
+does the same for strings.  Components wrapping interned data copy
+shared containers before the first change like cow_clone() does::
+
+    interner = Interner()
+    orders = Order.from_plain_many(plainvals, intern=interner)
+    print(interner.saved, 'bytes saved')
+
+Values of plain fields are shared as is by cow_clone(), so a subtree
+holding a dict, list or array in a plain field is never shared; strings
+inside of such values are interned still.  Top-level records are never
+shared either.  Dict keys are left as they are.
+"""
+from sys import getsizeof
+
+from . import FieldComp, FieldDict, FieldList
+
+
+_SCALARS = (int, float, bool, type(None))
+
+
+class Interner:
+    """Table of canonical subtrees, use the same one for a batch.
+
+    `saved` is the size of strings and containers replaced by canonical
+    ones, in bytes as reported by sys.getsizeof().
+    """
+
+    def __init__(self):
+        self._strings = {}
+        self._table = {}
+        self.saved = 0
+        self.hits = 0
+
+    def __len__(self):
+        return len(self._strings) + len(self._table)
+
+    def clear(self):
+        self._strings.clear()
+        self._table.clear()
+
+    def intern(self, cls, plainval):
+        """Intern subtrees of `cls` instance data, return `plainval`.
+
+        Data is changed in place and should not be wrapped yet, wrappers
+        of replaced subtrees would be stale.  Components made by
+        from_plain() do not copy shared subtrees on change, use
+        from_plain_many() with `intern` to wrap data.
+        """
+        if isinstance(plainval, dict):
+            self._fields(cls, plainval)
+        return plainval
+
+    def _canonical(self, key, val):
+        ret = self._table.setdefault(key, val)
+        if ret is not val:
+            self.hits += 1
+            # children are canonical already, only the shell is freed
+            self.saved += getsizeof(val)
+        return ret
+
+    def _string(self, val):
+        ret = self._strings.setdefault(val, val)
+        if ret is not val:
+            self.hits += 1
+            self.saved += getsizeof(val)
+        return ret
+
+    def _plain(self, val):
+        # return canonical value and whether it may be shared
+        if isinstance(val, str):
+            return self._string(val), True
+        if isinstance(val, _SCALARS):
+            return val, True
+        if isinstance(val, dict):
+            for key, item in val.items():
+                val[key] = self._plain(item)[0]
+        elif isinstance(val, list):
+            for index, item in enumerate(val):
+                val[index] = self._plain(item)[0]
+        return val, False
+
+    def _fields(self, cls, plainval):
+        # intern values of component data, return whether it may be
+        # shared and the key identifying it
+        fields = cls._fields_
+        shareable = True
+        key = [cls]
+        for name, val in plainval.items():
+            field = fields.get(name)
+            if val is None:
+                ok = True
+            elif isinstance(field, FieldComp):
+                val, ok = self._component(field.type, val)
+            elif isinstance(field, FieldList):
+                val, ok = self._items(field.type, val)
+            elif isinstance(field, FieldDict):
+                val, ok = self._entries(field.type, val)
+            else:
+                val, ok = self._plain(val)
+            plainval[name] = val
+            shareable = shareable and ok
+            if shareable:
+                key.append((name, type(val), val if isinstance(
+                    val, _SCALARS + (str,)) else id(val)))
+        return shareable, tuple(key)
+
+    def _component(self, cls, val):
+        if not isinstance(val, dict):
+            return val, False
+        ok, key = self._fields(cls, val)
+        if not ok:
+            return val, False
+        return self._canonical(key, val), True
+
+    def _items(self, cls, val):
+        if not isinstance(val, list):
+            return val, False
+        shareable = True
+        for index, item in enumerate(val):
+            val[index], ok = self._component(cls, item)
+            shareable = shareable and ok
+        if not shareable:
+            return val, False
+        key = (list, cls) + tuple(map(id, val))
+        return self._canonical(key, val), True
+
+    def _entries(self, cls, val):
+        if not isinstance(val, dict):
+            return val, False
+        shareable = True
+        for name, item in val.items():
+            val[name], ok = self._component(cls, item)
+            shareable = shareable and ok
+        if not shareable:
+            return val, False
+        key = (dict, cls) + tuple((name, id(item))
+                                  for name, item in val.items())
+        return self._canonical(key, val), True
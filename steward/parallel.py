@@ -0,0 +1,155 @@
+"""Validation of big datasets in a pool of processes.
+
+Records are split into chunks validated by worker processes::
+
+    with open('orders.ndjson', 'rb') as fp:
+        ret = validate_many(Order, fp)
+    for exc in ret.errors:
+        log.warning("record %d: %s", exc.path[0], exc.reason)
+
+The class is pickled by reference, so it has to be importable by the
+workers.  Records are read and handed to workers a chunk at a time,
+only a few chunks per worker are waiting at once, so big files are not
+loaded as a whole.  Records are pickled on the way to workers and back
+by the calling process, pickling a plain record costs more than
+validating it.  The work scales with the number of workers when
+records are JSON text decoded by the workers and only errors come
+back, with `collect` false.
+"""
+import json
+import os
+from collections import deque, namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
+from . import Component, DictProxy, Error, ListProxy, _nested_error
+
+
+# chunks per worker, more chunks balance uneven records better; as many
+# are submitted ahead of the one waited for
+CHUNKS_PER_WORKER = 4
+MAX_CHUNK_SIZE = 10000
+# chunk size for records of unknown number, e.g. lines of a file
+STREAM_CHUNK_SIZE = 1000
+
+Result = namedtuple('Result', 'plainvals errors')
+
+
+def _chunk_size(size, workers):
+    return max(1, min(MAX_CHUNK_SIZE,
+                      -(-size // (workers * CHUNKS_PER_WORKER))))
+
+
+def _normalize(cls, plainval):
+    # reading every field stores defaults and empty containers, nested
+    # components included
+    root = cls.from_plain(plainval)
+    stack = [root]
+    while stack:
+        self = stack.pop()
+        owner = type(self)
+        for field in owner._fields_.values():
+            value = field.__get__(self, owner)
+            if isinstance(value, Component):
+                stack.append(value)
+            elif isinstance(value, ListProxy):
+                stack.extend(value)
+            elif isinstance(value, DictProxy):
+                stack.extend(value.values())
+    return root.as_plain()
+
+
+def _check(cls, record, normalize):
+    if isinstance(record, (str, bytes)):
+        if not record.strip():
+            # blank line of NDJSON
+            return None
+        try:
+            record = json.loads(record)
+        except ValueError as exc:
+            raise Error(str(exc)) from None
+    cls.validate_plain(record)
+    if normalize:
+        record = _normalize(cls, record)
+    return record
+
+
+def _check_chunk(cls, start, records, normalize, collect):
+    # decoded records are dropped right away unless collected, keeping
+    # them alive makes the garbage collector slow the loop down
+    ret = [] if collect else None
+    errors = []
+    for index, record in enumerate(records, start):
+        try:
+            plainval = _check(cls, record, normalize)
+        except Error as exc:
+            errors.append(_nested_error(exc, index))
+            plainval = None
+        if collect:
+            ret.append(plainval)
+    return ret, errors
+
+
+def _chunks(records, size):
+    # consecutive chunks of `records` with the index of the first one
+    records = iter(records)
+    start = 0
+    while True:
+        chunk = list(islice(records, size))
+        if not chunk:
+            return
+        yield start, chunk
+        start += len(chunk)
+
+
+def _collect(ret, future, collect):
+    chunk, errors = future.result()
+    if collect:
+        ret.plainvals.extend(chunk)
+    ret.errors.extend(errors)
+
+
+def validate_many(cls, records, normalize=True, collect=True,
+                  executor=None, max_workers=None, chunk_size=None):
+    """Validate every item of `records` against `cls` in processes.
+
+    Records are plain data or JSON text of it, e.g. lines of NDJSON
+    file.  Returns Result of plain data and the list of errors having
+    index of the record first in ``path``; invalid records are None in
+    plain data.  With `normalize` missing fields of records and of their
+    nested components are filled by defaults.  Plain data is None unless
+    `collect` is true.  `executor` is a running pool to use instead of a
+    new one, a pool of threads changes plain records in place;
+    `max_workers` is its size if known, the number of CPUs is assumed
+    otherwise.  Chunk size depends on the number of records if they
+    have len(), STREAM_CHUNK_SIZE is used for iterators.
+    """
+    workers = max_workers or os.cpu_count() or 1
+    if chunk_size is None:
+        try:
+            size = len(records)
+        except TypeError:
+            chunk_size = STREAM_CHUNK_SIZE
+        else:
+            chunk_size = _chunk_size(size, workers)
+    elif chunk_size < 1:
+        raise ValueError("chunk_size should be positive")
+    pool = executor
+    if pool is None:
+        pool = ProcessPoolExecutor(max_workers)
+    ret = Result([] if collect else None, [])
+    pending = deque()
+    try:
+        for start, chunk in _chunks(records, chunk_size):
+            if len(pending) >= workers * CHUNKS_PER_WORKER:
+                _collect(ret, pending.popleft(), collect)
+            pending.append(pool.submit(_check_chunk, cls, start, chunk,
+                                       normalize, collect))
+        while pending:
+            _collect(ret, pending.popleft(), collect)
+    finally:
+        for future in pending:
+            future.cancel()
+        if executor is None:
+            pool.shutdown()
+    return ret
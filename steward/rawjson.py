@@ -0,0 +1,313 @@
+"""Lazy decoding of JSON text.
+
+`load()` returns read-only views over the text instead of decoded
+data.  A view of component or dict of components scans its text once
+on first use, recording the text span of every value; the root view is
+scanned right away to make sure nothing follows it.  A repeated key
+takes the last value like json.loads() does.  Values are decoded on
+first access, item lists and plain values at once by the json module:
+going item by item in Python costs more.  Values are passed by the
+scan with a single regular expression without decoding.  `dumps()`
+writes the text of views nothing was taken from as is.
+
+Passing a value by still reads all of its characters, it is cheaper
+than decoding since nothing is allocated.  The gain is large when the
+untouched values are big.  Broken text inside of nested views is
+reported when they are used.
+"""
+import json
+import re
+import sys
+from copy import deepcopy
+from json.decoder import scanstring
+
+from . import Error, Mapping, json_default, sentinel
+from .binary import _COMP, _ENTRIES, _ITEMS, _layout
+
+
+# possessive quantifiers keep the engine from backtracking, Python 3.11+
+_P = '+' if sys.version_info >= (3, 11) else ''
+# text between brackets: anything but brackets and complete strings
+_RUN = r'[^"\[\]{{}}]*{0}(?:"[^"\\]*{0}(?:\\.[^"\\]*{0})*{0}"' \
+       r'[^"\[\]{{}}]*{0})*{0}'.format(_P)
+# containers nested deeper are passed by in Python, see _skip_nested()
+MAX_DEPTH = 20
+
+_WS = re.compile(r'[ \t\n\r]*')
+_STRING = re.compile(r'"[^"\\]*{0}(?:\\.[^"\\]*{0})*{0}"'.format(_P))
+_SCALAR = re.compile(r'[^,\]}: \t\n\r]+')
+_PART = re.compile(_RUN)
+
+
+def _nested_pattern(depth):
+    ret = r'[\[{]' + _RUN + r'[\]}]'
+    for i in range(depth):
+        ret = r'[\[{]' + _RUN + '(?:' + ret + _RUN + ')*' + _P + r'[\]}]'
+    return re.compile(ret)
+
+
+_NESTED = _nested_pattern(MAX_DEPTH)
+
+
+class _Nested(Exception):
+    """View met by the encoder, its text is written by _dump()."""
+
+
+def _default(obj):
+    if isinstance(obj, _Object):
+        raise _Nested
+    return json_default(obj)
+
+
+_decoder = json.JSONDecoder()
+_encode = json.JSONEncoder(separators=(',', ':'), default=_default).encode
+
+
+def _error(msg, text, pos):
+    if pos >= len(text):
+        return Error("{} at end of text".format(msg))
+    return Error("{} at char {}".format(msg, pos))
+
+
+def _decode(text, pos):
+    try:
+        return _decoder.raw_decode(text, pos)
+    except ValueError as exc:
+        raise Error(str(exc)) from None
+
+
+def _skip_nested(text, pos):
+    match = _NESTED.match(text, pos)
+    if match is not None:
+        return match.end()
+    # too deep or broken, go bracket by bracket
+    part = _PART.match
+    depth = 0
+    while pos < len(text):
+        char = text[pos]
+        if char == '"':
+            raise _error("Unterminated string", text, pos)
+        if char in '[{':
+            depth += 1
+        else:
+            depth -= 1
+            if depth == 0:
+                return pos + 1
+        pos = part(text, pos + 1).end()
+    raise _error("Unterminated container", text, pos)
+
+
+def _skip(text, pos):
+    """Return end of value starting at `pos`."""
+    char = text[pos:pos + 1]
+    if char == '[' or char == '{':
+        return _skip_nested(text, pos)
+    match = (_STRING if char == '"' else _SCALAR).match(text, pos)
+    if match is None:
+        raise _error("Value expected", text, pos)
+    return match.end()
+
+
+def _load_slot(text, pos, kind):
+    """Return value starting at `pos`."""
+    if kind is None:
+        return _decode(text, pos)[0]
+    char = text[pos:pos + 1]
+    if kind[0] == _COMP:
+        if char == '{':
+            return _Object(text, pos, _layout(kind[1]).kinds, None)
+        if text.startswith('null', pos):
+            return None
+    elif kind[0] == _ITEMS and char == '[':
+        return _decode(text, pos)[0]
+    elif kind[0] == _ENTRIES and char == '{':
+        return _Object(text, pos, {}, (_COMP, kind[1]))
+    raise _error("Unexpected value", text, pos)
+
+
+class _Object(Mapping):
+    """Read-only plain dict over JSON text.
+
+    Decoded values are cached, so the same object is returned on every
+    access.  ``copy()`` returns a shallow dict like plain dicts do.
+    """
+    __slots__ = ('_text', '_start', '_end', '_kinds', '_default', '_spans',
+                 '_cache')
+
+    def __init__(self, text, start, kinds, default):
+        self._text = text
+        self._start = start
+        # both are known after the scan
+        self._end = None
+        self._spans = None
+        self._kinds = kinds
+        self._default = default
+        self._cache = {}
+
+    def _scan(self):
+        """Record spans of all values, a repeated key takes the last one."""
+        text = self._text
+        spans = {}
+        ws = _WS.match
+        pos = ws(text, self._start + 1).end()
+        if text[pos:pos + 1] == '}':
+            pos += 1
+        else:
+            while True:
+                if text[pos:pos + 1] != '"':
+                    raise _error("Key expected", text, pos)
+                try:
+                    name, pos = scanstring(text, pos + 1)
+                except ValueError as exc:
+                    raise Error(str(exc)) from None
+                pos = ws(text, pos).end()
+                if text[pos:pos + 1] != ':':
+                    raise _error("':' expected", text, pos)
+                pos = ws(text, pos + 1).end()
+                end = _skip(text, pos)
+                spans[name] = (pos, end)
+                pos = ws(text, end).end()
+                char = text[pos:pos + 1]
+                if char == '}':
+                    pos += 1
+                    break
+                if char != ',':
+                    raise _error("',' or '}' expected", text, pos)
+                pos = ws(text, pos + 1).end()
+        self._end = pos
+        self._spans = spans
+        return spans
+
+    def __getitem__(self, key):
+        ret = self._cache.get(key, sentinel)
+        if ret is not sentinel:
+            return ret
+        spans = self._spans
+        if spans is None:
+            spans = self._scan()
+        span = spans.get(key)
+        if span is None:
+            raise KeyError(key)
+        ret = _load_slot(self._text, span[0],
+                         self._kinds.get(key, self._default))
+        self._cache[key] = ret
+        return ret
+
+    def __contains__(self, key):
+        spans = self._spans
+        if spans is None:
+            spans = self._scan()
+        return key in spans
+
+    def __iter__(self):
+        spans = self._spans
+        if spans is None:
+            spans = self._scan()
+        return iter(spans)
+
+    def __len__(self):
+        spans = self._spans
+        if spans is None:
+            spans = self._scan()
+        return len(spans)
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def copy(self):
+        return {key: self[key] for key in self}
+
+    def __reduce__(self):
+        # pickled as a plain dict, nested views reduce the same way
+        return dict, (self.copy(),)
+
+    def __deepcopy__(self, memo):
+        if not self._cache:
+            # nothing was handed out yet, decode the text at once
+            return _decode(self._text, self._start)[0]
+        return deepcopy(self.copy(), memo)
+
+
+def load(text, cls):
+    """Return lazy read-only plain data of `cls` stored in JSON `text`.
+
+    `text` is str or UTF-8 encoded bytes-like object.
+    """
+    if not isinstance(text, str):
+        text = bytes(text).decode('utf-8')
+    pos = _WS.match(text).end()
+    if text[pos:pos + 1] != '{':
+        raise _error("Object expected", text, pos)
+    ret = _Object(text, pos, _layout(cls).kinds, None)
+    ret._scan()
+    pos = _WS.match(text, ret._end).end()
+    if pos != len(text):
+        raise _error("Extra data", text, pos)
+    return ret
+
+
+def _dump(out, val):
+    if isinstance(val, _Object):
+        if val._cache:
+            _dump_view(out, val)
+            return
+        if val._spans is None:
+            val._scan()
+        out.append(val._text[val._start:val._end])
+        return
+    try:
+        out.append(_encode(val))
+        return
+    except _Nested:
+        pass
+    if isinstance(val, Mapping):
+        out.append('{')
+        for key, item in val.items():
+            if not isinstance(key, str):
+                key = _encode(key)
+            out.append(_encode(key))
+            out.append(':')
+            _dump(out, item)
+            out.append(',')
+        _close(out, '}')
+    else:
+        out.append('[')
+        for item in val:
+            _dump(out, item)
+            out.append(',')
+        _close(out, ']')
+
+
+def _dump_view(out, view):
+    # values taken from the view are written anew, they could be changed
+    text = view._text
+    cache = view._cache
+    len(view)
+    out.append('{')
+    for key, (start, end) in view._spans.items():
+        out.append(_encode(key))
+        out.append(':')
+        val = cache.get(key, sentinel)
+        if val is sentinel:
+            out.append(text[start:end])
+        else:
+            _dump(out, val)
+        out.append(',')
+    _close(out, '}')
+
+
+def _close(out, char):
+    if out[-1] == ',':
+        out[-1] = char
+    else:
+        out.append(char)
+
+
+def dumps(plainval):
+    """Return JSON text of `plainval`, text of untouched views is reused."""
+    out = []
+    _dump(out, plainval)
+    return ''.join(out)
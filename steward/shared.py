@@ -0,0 +1,168 @@
+"""Passing batches of components to other processes in shared memory.
+
+share() encodes components into a block of shared memory in the binary
+format of Component.as_buffer().  A batch and its slices are pickled as
+the name of the block, sending them costs the same for any amount of
+data; workers attach to the block and decode fields lazily without
+copying::
+
+    batch = share(Order, orders)
+    try:
+        with ProcessPoolExecutor() as pool:
+            totals = list(pool.map(process, batch.split(8)))
+    finally:
+        batch.unlink()
+
+Components of a batch are read-only views copied on first change like
+ones made by from_buffer(), the block is kept mapped while they are
+alive.  Blocks of earlier batches nothing refers to anymore are closed
+when a new batch is made or attached to.  Attaching registers the
+block with the resource tracker of the process, workers should be
+started by the process owning the batch.
+"""
+from collections.abc import Sequence
+from multiprocessing.shared_memory import SharedMemory
+from struct import Struct
+from weakref import WeakSet
+
+from . import Error
+from .binary import dumps
+
+
+MAGIC = b'STWS'
+
+# magic and number of components, followed by count + 1 offsets
+_HEAD = Struct('<4sQ')
+_OFFSET = Struct('<Q')
+
+# name -> SharedMemory opened by this process; blocks are never left to
+# the garbage collector, closing them fails while components use them
+_blocks = {}
+_batches = WeakSet()
+
+
+def share(cls, components):
+    """Encode `cls` instances into a new block of shared memory.
+
+    Returns SharedBatch owning the block, call its unlink() when
+    workers are done.
+    """
+    parts = []
+    for component in components:
+        if not isinstance(component, cls):
+            raise TypeError("an {} is required, got {}".format(
+                cls.__name__, type(component).__name__))
+        parts.append(dumps(component._plain_, cls))
+    offsets = [_HEAD.size + _OFFSET.size * (len(parts) + 1)]
+    for part in parts:
+        offsets.append(offsets[-1] + len(part))
+    _release()
+    shm = SharedMemory(create=True, size=offsets[-1])
+    _blocks[shm.name] = shm
+    try:
+        buf = shm.buf
+        _HEAD.pack_into(buf, 0, MAGIC, len(parts))
+        for index, offset in enumerate(offsets):
+            _OFFSET.pack_into(buf, _HEAD.size + _OFFSET.size * index, offset)
+        for offset, part in zip(offsets, parts):
+            buf[offset:offset + len(part)] = part
+    except BaseException:
+        del _blocks[shm.name]
+        shm.close()
+        shm.unlink()
+        raise
+    return SharedBatch(cls, shm)
+
+
+def _attach(cls, name, start, stop):
+    # unpickle batch in a worker, see SharedBatch.__reduce__()
+    shm = _blocks.get(name)
+    if shm is None:
+        _release()
+        shm = _blocks[name] = SharedMemory(name)
+    return SharedBatch(cls, shm, start, stop)
+
+
+def _release():
+    # close blocks of gone batches unless components still use them
+    used = set(batch.name for batch in _batches)
+    for name, shm in list(_blocks.items()):
+        if name not in used:
+            try:
+                shm.close()
+            except BufferError:
+                continue
+            del _blocks[name]
+
+
+class SharedBatch(Sequence):
+    """Components stored in a block of shared memory.
+
+    Items are decoded on access, slices are batches over the same
+    block.
+    """
+
+    def __init__(self, cls, shm, start=0, stop=None):
+        buf = shm.buf
+        magic, count = _HEAD.unpack_from(buf)
+        if magic != MAGIC:
+            raise Error("Not a steward shared batch")
+        self.type = cls
+        self._shm = shm
+        self._start, self._stop, _ = slice(start, stop).indices(count)
+        self._stop = max(self._start, self._stop)
+        _batches.add(self)
+
+    @property
+    def name(self):
+        return self._shm.name
+
+    def __len__(self):
+        return self._stop - self._start
+
+    def _offset(self, index):
+        return _OFFSET.unpack_from(
+            self._shm.buf, _HEAD.size + _OFFSET.size * index)[0]
+
+    def __getitem__(self, index):
+        size = len(self)
+        if isinstance(index, slice):
+            start, stop, step = index.indices(size)
+            if step != 1:
+                raise ValueError("slice step is not supported")
+            return SharedBatch(self.type, self._shm, self._start + start,
+                               self._start + max(start, stop))
+        if index < 0:
+            index += size
+        if not 0 <= index < size:
+            raise IndexError("batch index out of range")
+        index += self._start
+        start = self._offset(index)
+        stop = self._offset(index + 1)
+        return self.type.from_buffer(self._shm.buf[start:stop])
+
+    def split(self, parts):
+        """Return up to `parts` slices of about the same length."""
+        size = len(self)
+        step = max(1, -(-size // parts))
+        return [self[start:start + step] for start in range(0, size, step)]
+
+    def __reduce__(self):
+        return _attach, (self.type, self.name, self._start, self._stop)
+
+    def close(self):
+        """Close the block in this process.
+
+        Components of the batch have to be gone, BufferError is raised
+        otherwise.
+        """
+        self._shm.close()
+        _blocks.pop(self.name, None)
+
+    def unlink(self):
+        """Free the block once every process has closed it."""
+        self._shm.unlink()
+
+    def __repr__(self):
+        return '<SharedBatch {} of {} {}>'.format(
+            self.name, len(self), self.type.__name__)
@@ -0,0 +1,530 @@
+"""Lists and dicts of components kept out of memory.
+
+FieldList and FieldDict given `storage` keep plain items in a store
+paging them in on access instead of a list or dict::
+
+    db = SqliteStorage('spill.db')
+
+    class Customer(Component):
+        orders = FieldList(Order, storage=db)
+        events = FieldDict(Event, storage=db, cache='lru')
+
+Stores keep `cache_size` recently read items and write changes in
+batches of `batch_size`; flush() writes pending changes right away.
+Items changed through wrappers are written again, changes are reported
+by the owner walk, see steward._changed().  As everywhere, changes made
+in place to values of plain fields are not seen.
+
+Proxies remember wrappers of touched and added items, iterating a list
+keeps none, like ListProxy.stream().  To keep memory bounded fill big
+stores with plain items and use ``cache='lru'`` for dicts::
+
+    customer = Customer.from_plain({'orders': db.list(plain_orders)})
+    for order in customer.orders:
+        ...
+
+Plain data of the field is the store itself, a MutableSequence or a
+MutableMapping; as_plain() and json_default() read it whole into a new
+list or dict.  List stores compare equal to lists like lists do.
+
+A storage is any object having ``list(items)``, ``dict(items)`` and
+``owns(plainval)`` methods, the latter tells if `plainval` is a store
+made by it.  Stores have ``touch(key, plainitem)`` telling that the
+item was changed in place.
+"""
+import json
+import os
+import sqlite3
+import tempfile
+from collections import OrderedDict
+from collections.abc import (ItemsView, MutableMapping, MutableSequence,
+                             ValuesView)
+from weakref import WeakValueDictionary, finalize
+
+from . import json_default, sentinel
+
+
+CACHE_SIZE = 1024
+BATCH_SIZE = 1000
+# rows read by one query while iterating
+SCAN_SIZE = 1000
+
+_dumps = json.JSONEncoder(separators=(',', ':'),
+                          default=json_default).encode
+_loads = json.loads
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS stores (id INTEGER PRIMARY KEY);
+CREATE TABLE IF NOT EXISTS items (
+    store INTEGER, pos INTEGER, data TEXT,
+    PRIMARY KEY (store, pos)) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS entries (
+    store INTEGER, key TEXT, seq INTEGER, data TEXT,
+    PRIMARY KEY (store, key)) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS entries_seq ON entries (store, seq);
+"""
+
+
+def _drop(db, table, store):
+    try:
+        db.execute('DELETE FROM {} WHERE store = ?'.format(table), (store,))
+        db.execute('DELETE FROM stores WHERE id = ?', (store,))
+    except sqlite3.ProgrammingError:
+        # the storage is closed already
+        pass
+
+
+def _remove(db, path):
+    db.close()
+    if path is not None:
+        os.unlink(path)
+
+
+class SqliteStorage:
+    """Stores kept in sqlite database at `path`, a temporary file by default.
+
+    Data of a store is deleted when the store is garbage collected, the
+    database is a spill area rather than a persistent one.
+    """
+
+    def __init__(self, path=None, cache_size=CACHE_SIZE,
+                 batch_size=BATCH_SIZE):
+        if cache_size < 0 or batch_size < 1:
+            raise ValueError("`cache_size` should not be negative and "
+                             "`batch_size` should be positive")
+        temp = None
+        if path is None:
+            fd, path = tempfile.mkstemp(suffix='.db')
+            os.close(fd)
+            temp = path
+        self.cache_size = cache_size
+        self.batch_size = batch_size
+        self._db = sqlite3.connect(path, isolation_level=None)
+        self._db.execute('PRAGMA journal_mode = MEMORY')
+        self._db.execute('PRAGMA synchronous = OFF')
+        self._db.executescript(_SCHEMA)
+        self._stores = WeakValueDictionary()
+        self._close = finalize(self, _remove, self._db, temp)
+
+    def close(self):
+        """Close the database, stores made by the storage are unusable."""
+        self._close()
+
+    def flush(self):
+        """Write pending changes of every store."""
+        for store in list(self._stores.values()):
+            store.flush()
+
+    def owns(self, plainval):
+        return isinstance(plainval, _Store) and plainval._storage is self
+
+    def list(self, items=()):
+        """Return a new list store holding `items`."""
+        ret = _SqliteList(self, self._new('items'))
+        ret.extend(items)
+        return ret
+
+    def dict(self, items=()):
+        """Return a new dict store holding `items`."""
+        ret = _SqliteDict(self, self._new('entries'))
+        ret.update(items)
+        return ret
+
+    def _new(self, table):
+        cursor = self._db.execute('INSERT INTO stores DEFAULT VALUES')
+        return table, cursor.lastrowid
+
+    def _write(self, *statements):
+        # run (sql, rows) pairs in one transaction
+        db = self._db
+        db.execute('BEGIN')
+        try:
+            for sql, rows in statements:
+                db.executemany(sql, rows)
+        except BaseException:
+            db.execute('ROLLBACK')
+            raise
+        db.execute('COMMIT')
+
+
+class _Store:
+    def __init__(self, storage, new):
+        self._storage = storage
+        self._db = storage._db
+        self._table, self._id = new
+        # recently read items, changed ones are kept in _dirty
+        self._hot = OrderedDict()
+        self._dirty = {}
+        storage._stores[self._id] = self
+        finalize(self, _drop, self._db, self._table, self._id)
+
+    def _cache(self, key, plainitem):
+        hot = self._hot
+        hot[key] = plainitem
+        hot.move_to_end(key)
+        if len(hot) > self._storage.cache_size:
+            hot.popitem(last=False)
+
+    def _pending(self):
+        return len(self._dirty)
+
+    def _check(self):
+        if self._pending() >= self._storage.batch_size:
+            self.flush()
+
+    def _copy(self, shallow):
+        self.flush()
+        ret = type(self)(self._storage, self._storage._new(self._table))
+        columns = {'items': 'pos, data', 'entries': 'key, seq, data'}[
+            self._table]
+        self._db.execute(
+            'INSERT INTO {0} (store, {1}) SELECT ?, {1} FROM {0} '
+            'WHERE store = ?'.format(self._table, columns),
+            (ret._id, self._id))
+        ret._size = self._size
+        if shallow:
+            # like list.copy() items are the same objects
+            ret._hot.update(self._hot)
+        return ret
+
+    def copy(self):
+        return self._copy(True)
+
+    def __reduce__(self):
+        # pickled as a plain container, moved to a store again by the
+        # field on the other side
+        ret = dict(self.items()) if self._table == 'entries' else list(self)
+        return type(ret), (ret,)
+
+    def __deepcopy__(self, memo):
+        return self._copy(False)
+
+
+class _SqliteList(_Store, MutableSequence):
+    def __init__(self, storage, new):
+        super().__init__(storage, new)
+        # rows stored so far, appended items are kept in _appends
+        self._size = 0
+        self._appends = []
+
+    def _pending(self):
+        return len(self._dirty) + len(self._appends)
+
+    def __len__(self):
+        return self._size + len(self._appends)
+
+    def _index(self, index):
+        size = len(self)
+        if index < 0:
+            index += size
+        if not 0 <= index < size:
+            raise IndexError("list index out of range")
+        return index
+
+    def _get(self, pos):
+        if pos >= self._size:
+            return self._appends[pos - self._size]
+        ret = self._dirty.get(pos, sentinel)
+        if ret is sentinel:
+            ret = self._hot.get(pos, sentinel)
+            if ret is sentinel:
+                row = self._db.execute(
+                    'SELECT data FROM items WHERE store = ? AND pos = ?',
+                    (self._id, pos)).fetchone()
+                ret = _loads(row[0])
+            self._cache(pos, ret)
+        return ret
+
+    def _set(self, pos, plainitem):
+        if pos >= self._size:
+            self._appends[pos - self._size] = plainitem
+        else:
+            self._hot.pop(pos, None)
+            self._dirty[pos] = plainitem
+            self._check()
+
+    def touch(self, pos, plainitem):
+        if 0 <= pos < len(self):
+            self._set(pos, plainitem)
+
+    def flush(self):
+        dirty = self._dirty
+        appends = self._appends
+        if not dirty and not appends:
+            return
+        store = self._id
+        self._storage._write(
+            ('UPDATE items SET data = ? WHERE store = ? AND pos = ?',
+             [(_dumps(val), store, pos) for pos, val in dirty.items()]),
+            ('INSERT INTO items VALUES (?, ?, ?)',
+             [(store, pos, _dumps(val))
+              for pos, val in enumerate(appends, self._size)]))
+        # written items stay in memory, wrappers may hold them
+        for pos, val in dirty.items():
+            self._cache(pos, val)
+        tail = appends[-self._storage.cache_size:]
+        for pos, val in enumerate(tail, len(self) - len(tail)):
+            self._cache(pos, val)
+        self._size += len(appends)
+        self._dirty = {}
+        self._appends = []
+
+    def _shift(self, start, delta):
+        # move rows at `start` and later by `delta`, through negative
+        # positions to never have two rows at the same one
+        self._db.execute(
+            'UPDATE items SET pos = -(pos + ?) - 1 '
+            'WHERE store = ? AND pos >= ?', (delta, self._id, start))
+        self._db.execute(
+            'UPDATE items SET pos = -pos - 1 WHERE store = ? AND pos < 0',
+            (self._id,))
+        hot = OrderedDict()
+        for pos, val in self._hot.items():
+            if pos >= start:
+                hot[pos + delta] = val
+            elif pos < start + min(delta, 0):
+                hot[pos] = val
+        self._hot = hot
+        self._size += delta
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self._get(pos) for pos in range(*index.indices(len(self)))]
+        return self._get(self._index(index))
+
+    def __setitem__(self, index, value):
+        if not isinstance(index, slice):
+            self._set(self._index(index), value)
+            return
+        start, stop, step = index.indices(len(self))
+        if step != 1:
+            positions = range(start, stop, step)
+            value = list(value)
+            if len(value) != len(positions):
+                raise ValueError("attempt to assign sequence of size {} to "
+                                 "extended slice of size {}".format(
+                                     len(value), len(positions)))
+            for pos, val in zip(positions, value):
+                self._set(pos, val)
+            return
+        value = list(value)
+        del self[start:max(start, stop)]
+        if start == len(self):
+            self.extend(value)
+            return
+        self.flush()
+        self._shift(start, len(value))
+        self._storage._write(
+            ('INSERT INTO items VALUES (?, ?, ?)',
+             [(self._id, pos, _dumps(val))
+              for pos, val in enumerate(value, start)]))
+
+    def __delitem__(self, index):
+        if isinstance(index, slice):
+            start, stop, step = index.indices(len(self))
+            if step != 1:
+                for pos in sorted(range(start, stop, step), reverse=True):
+                    del self[pos]
+                return
+        else:
+            start = self._index(index)
+            stop = start + 1
+        if start >= stop:
+            return
+        self.flush()
+        self._db.execute(
+            'DELETE FROM items WHERE store = ? AND pos >= ? AND pos < ?',
+            (self._id, start, stop))
+        self._shift(stop, start - stop)
+
+    def insert(self, index, value):
+        size = len(self)
+        if index < 0:
+            index = max(size + index, 0)
+        if index >= size:
+            self._appends.append(value)
+            self._check()
+            return
+        self[index:index] = [value]
+
+    def append(self, value):
+        self._appends.append(value)
+        self._check()
+
+    def extend(self, values):
+        for value in values:
+            self.append(value)
+
+    def clear(self):
+        self._dirty = {}
+        self._appends = []
+        self._hot.clear()
+        self._db.execute('DELETE FROM items WHERE store = ?', (self._id,))
+        self._size = 0
+
+    def _scan(self, start=0, stop=None):
+        # yield (position, item) reading rows in chunks
+        self.flush()
+        stop = len(self) if stop is None else stop
+        while start < stop:
+            rows = self._db.execute(
+                'SELECT pos, data FROM items WHERE store = ? AND pos >= ? '
+                'ORDER BY pos LIMIT ?',
+                (self._id, start, min(SCAN_SIZE, stop - start))).fetchall()
+            if not rows:
+                return
+            hot = self._hot
+            dirty = self._dirty
+            for pos, data in rows:
+                ret = dirty.get(pos, hot.get(pos, sentinel))
+                yield pos, _loads(data) if ret is sentinel else ret
+            start = rows[-1][0] + 1
+
+    def __iter__(self):
+        for pos, val in self._scan():
+            yield val
+
+    def index(self, value, start=0, stop=None):
+        start, stop, step = slice(start, stop).indices(len(self))
+        for pos, val in self._scan(start, stop):
+            if val is value or val == value:
+                return pos
+        raise ValueError("{!r} is not in list".format(value))
+
+    def __eq__(self, other):
+        # equal to lists and list stores with equal items like a list
+        if not isinstance(other, (list, _SqliteList)):
+            return NotImplemented
+        if len(self) != len(other):
+            return False
+        return all(a is b or a == b for a, b in zip(self, other))
+
+    __hash__ = None
+
+    def __repr__(self):
+        return '<stored list of {} items>'.format(len(self))
+
+
+class _Items(ItemsView):
+    def __iter__(self):
+        return self._mapping._scan()
+
+
+class _Values(ValuesView):
+    def __iter__(self):
+        for key, val in self._mapping._scan():
+            yield val
+
+
+class _SqliteDict(_Store, MutableMapping):
+    def __init__(self, storage, new):
+        super().__init__(storage, new)
+        self._size = 0
+        self._seq = 0
+
+    def __len__(self):
+        return self._size
+
+    def _load(self, key):
+        row = self._db.execute(
+            'SELECT data FROM entries WHERE store = ? AND key = ?',
+            (self._id, _dumps(key))).fetchone()
+        return sentinel if row is None else _loads(row[0])
+
+    def __getitem__(self, key):
+        ret = self._dirty.get(key, sentinel)
+        if ret is sentinel:
+            ret = self._hot.get(key, sentinel)
+            if ret is sentinel:
+                ret = self._load(key)
+                if ret is sentinel:
+                    raise KeyError(key)
+            self._cache(key, ret)
+        return ret
+
+    def __contains__(self, key):
+        return key in self._dirty or key in self._hot or \
+            self._db.execute(
+                'SELECT 1 FROM entries WHERE store = ? AND key = ?',
+                (self._id, _dumps(key))).fetchone() is not None
+
+    def __setitem__(self, key, value):
+        if key not in self:
+            self._size += 1
+        self._hot.pop(key, None)
+        self._dirty[key] = value
+        self._check()
+
+    def touch(self, key, plainitem):
+        if key in self:
+            self._hot.pop(key, None)
+            self._dirty[key] = plainitem
+            self._check()
+
+    def __delitem__(self, key):
+        if key not in self:
+            raise KeyError(key)
+        self._dirty.pop(key, None)
+        self._hot.pop(key, None)
+        self._db.execute('DELETE FROM entries WHERE store = ? AND key = ?',
+                         (self._id, _dumps(key)))
+        self._size -= 1
+
+    def _copy(self, shallow):
+        ret = super()._copy(shallow)
+        ret._seq = self._seq
+        return ret
+
+    def flush(self):
+        dirty = self._dirty
+        if not dirty:
+            return
+        rows = []
+        for key, val in dirty.items():
+            self._seq += 1
+            rows.append((self._id, _dumps(key), self._seq, _dumps(val)))
+        # existing keys keep their place in the order
+        self._storage._write(
+            ('INSERT INTO entries VALUES (?, ?, ?, ?) '
+             'ON CONFLICT (store, key) DO UPDATE SET data = excluded.data',
+             rows))
+        for key, val in dirty.items():
+            self._cache(key, val)
+        self._dirty = {}
+
+    def clear(self):
+        self._dirty = {}
+        self._hot.clear()
+        self._db.execute('DELETE FROM entries WHERE store = ?', (self._id,))
+        self._size = 0
+
+    def _scan(self):
+        # yield (key, item) in insertion order reading rows in chunks
+        self.flush()
+        seq = -1
+        while True:
+            rows = self._db.execute(
+                'SELECT seq, key, data FROM entries WHERE store = ? AND '
+                'seq > ? ORDER BY seq LIMIT ?',
+                (self._id, seq, SCAN_SIZE)).fetchall()
+            if not rows:
+                return
+            hot = self._hot
+            dirty = self._dirty
+            for seq, key, data in rows:
+                key = _loads(key)
+                ret = dirty.get(key, hot.get(key, sentinel))
+                yield key, _loads(data) if ret is sentinel else ret
+
+    def __iter__(self):
+        for key, val in self._scan():
+            yield key
+
+    def items(self):
+        return _Items(self)
+
+    def values(self):
+        return _Values(self)
+
+    def __repr__(self):
+        return '<stored dict of {} items>'.format(len(self))
@@ -0,0 +1,248 @@
+"""Streaming decoding of huge JSON documents.
+
+Items of a JSON array (either the top-level one or one found by key
+path) are decoded one at a time from a binary file object; only the
+text of the current item is kept in memory::
+
+    with open('export.json', 'rb') as fp:
+        for order in iter_components(Order, fp, path=['orders']):
+            ...
+"""
+import codecs
+import json
+import re
+
+from . import Error
+
+
+CHUNK_SIZE = 64 * 1024
+
+_WS = re.compile(r'[ \t\n\r]*')
+_STRING = re.compile(r'["\\]')
+_STRUCT = re.compile(r'[\[\]{}"]')
+_SCALAR_END = re.compile(r'[,\]}: \t\n\r]')
+_DELIMITER = re.compile(r'[,\]}:]')
+
+
+class _Scanner:
+    def __init__(self, fp, chunk_size):
+        self.fp = fp
+        self.chunk_size = chunk_size
+        self.decoder = codecs.getincrementaldecoder('utf-8')()
+        self.buf = ''
+        self.pos = 0
+        # start of the value being captured, None when skipping
+        self.mark = None
+        # absolute offset of buf[0], for error reporting
+        self.offset = 0
+        self.eof = False
+        self.raw_decode = json.JSONDecoder().raw_decode
+
+    def error(self, msg):
+        return Error("{} at char {}".format(msg, self.offset + self.pos))
+
+    def fill(self, size=None):
+        if self.eof:
+            return False
+        data = self.fp.read(size or self.chunk_size)
+        if not data:
+            self.eof = True
+            data = self.decoder.decode(b'', True)
+        else:
+            data = self.decoder.decode(data)
+        keep = self.pos if self.mark is None else self.mark
+        if keep:
+            self.buf = self.buf[keep:]
+            self.offset += keep
+            self.pos -= keep
+            if self.mark is not None:
+                self.mark -= keep
+        self.buf += data
+        return True
+
+    def peek(self):
+        while True:
+            self.pos = _WS.match(self.buf, self.pos).end()
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if not self.fill():
+                return None
+
+    def expect(self, char):
+        if self.peek() != char:
+            raise self.error("'{}' expected".format(char))
+        self.pos += 1
+
+    def value(self):
+        """Decode one value."""
+        if self.peek() is None:
+            raise self.error("Unexpected end of data")
+        self.mark = self.pos
+        try:
+            while True:
+                try:
+                    ret, end = self.raw_decode(self.buf, self.pos)
+                except ValueError as exc:
+                    if self.eof or not self._incomplete(exc):
+                        raise
+                else:
+                    # a number may continue in the next chunk
+                    if self.eof or _DELIMITER.search(self.buf, end):
+                        self.pos = end
+                        return ret
+                # read as much as we already have for amortized O(n)
+                self.fill(max(self.chunk_size, len(self.buf) - self.mark))
+        finally:
+            self.mark = None
+
+    def _incomplete(self, exc):
+        # Errors close to the end of buffer may be caused by truncated
+        # literals, numbers or escapes rather than by broken input.
+        return (exc.pos >= len(self.buf) - 16 or
+                exc.msg.startswith('Unterminated string'))
+
+    def skip(self):
+        """Scan over one value without keeping it in memory."""
+        first = self.peek()
+        if first is None:
+            raise self.error("Unexpected end of data")
+        if first == '"':
+            self._string()
+        elif first in '[{':
+            self._nested()
+        else:
+            self._scalar()
+
+    def _string(self):
+        self.pos += 1
+        while True:
+            match = _STRING.search(self.buf, self.pos)
+            if match is None:
+                self.pos = len(self.buf)
+            elif match.group() == '"':
+                self.pos = match.end()
+                return
+            elif match.end() < len(self.buf):
+                # skip escaped char
+                self.pos = match.end() + 1
+                continue
+            else:
+                self.pos = match.start()
+            if not self.fill():
+                raise self.error("Unterminated string")
+
+    def _nested(self):
+        depth = 0
+        while True:
+            match = _STRUCT.search(self.buf, self.pos)
+            if match is None:
+                self.pos = len(self.buf)
+                if not self.fill():
+                    raise self.error("Unterminated container")
+                continue
+            char = match.group()
+            if char == '"':
+                self.pos = match.start()
+                self._string()
+                continue
+            self.pos = match.end()
+            if char in '[{':
+                depth += 1
+            else:
+                depth -= 1
+                if depth == 0:
+                    return
+
+    def _scalar(self):
+        while True:
+            match = _SCALAR_END.search(self.buf, self.pos)
+            if match is not None:
+                self.pos = match.start()
+                return
+            self.pos = len(self.buf)
+            if not self.fill():
+                return
+
+    def seek(self, path):
+        """Position scanner at the value found by `path`."""
+        for key in path:
+            if isinstance(key, int):
+                self.expect('[')
+                for index in range(key + 1):
+                    if self.peek() == ']':
+                        raise self.error("Index {} not found".format(key))
+                    if index:
+                        self.expect(',')
+                    if index < key:
+                        self.skip()
+            else:
+                self.expect('{')
+                first = True
+                while True:
+                    if self.peek() == '}':
+                        raise self.error("Key {!r} not found".format(key))
+                    if not first:
+                        self.expect(',')
+                    first = False
+                    name = self.value()
+                    self.expect(':')
+                    if name == key:
+                        break
+                    self.skip()
+
+    def items(self):
+        self.expect('[')
+        if self.peek() == ']':
+            self.pos += 1
+            return
+        while True:
+            yield self.value()
+            char = self.peek()
+            if char == ']':
+                self.pos += 1
+                return
+            if char != ',':
+                raise self.error("',' or ']' expected")
+            self.pos += 1
+
+
+def _path(path):
+    if path is None:
+        return ()
+    if isinstance(path, (str, int)):
+        return (path,)
+    return tuple(path)
+
+
+def iter_plain(fp, path=None, chunk_size=CHUNK_SIZE):
+    """Yield items of JSON array stored in binary file `fp`.
+
+    `path` is a sequence of object keys and array indexes leading to
+    the array, the top-level value is used by default.
+    """
+    scanner = _Scanner(fp, chunk_size)
+    scanner.seek(_path(path))
+    yield from scanner.items()
+
+
+def iter_ndjson(fp):
+    """Yield values of newline delimited JSON stream `fp`."""
+    loads = json.loads
+    for line in fp:
+        if line.strip():
+            yield loads(line)
+
+
+def iter_components(cls, fp, path=None, ndjson=False, validate=False,
+                    chunk_size=CHUNK_SIZE, intern=None):
+    """Yield `cls` instances decoded one by one from `fp`.
+
+    `intern` is True or an Interner sharing equal subtrees of items,
+    see steward.interning.
+    """
+    if ndjson:
+        plainvals = iter_ndjson(fp)
+    else:
+        plainvals = iter_plain(fp, path, chunk_size)
+    return cls.from_plain_many(plainvals, validate=validate, lazy=True,
+                               intern=intern)
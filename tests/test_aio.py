@@ -0,0 +1,103 @@
+import asyncio
+import socket
+import unittest
+from array import array
+from concurrent.futures import ThreadPoolExecutor
+from steward import Component, Field, FieldList, Error
+from steward.aio import CHUNK_SIZE, iter_components, write_components
+
+
+class A(Component):
+    a = Field()
+
+
+class B(Component):
+    items = FieldList(A)
+
+
+def feed(data, limit=2 ** 16):
+    reader = asyncio.StreamReader(limit=limit)
+    reader.feed_data(data)
+    reader.feed_eof()
+    return reader
+
+
+async def collect(*args, **kwargs):
+    return [item async for item in iter_components(*args, **kwargs)]
+
+
+class TestIterComponents(unittest.TestCase):
+    def test_batches(self):
+        data = b''.join(b'{"items": [{"a": %d}]}\n\n' % i for i in range(10))
+
+        async def go():
+            with ThreadPoolExecutor(1) as executor:
+                for kwargs in ({}, {'validate': True},
+                               {'executor': executor},
+                               {'validate': True, 'executor': executor}):
+                    ret = await collect(B, feed(data), batch_size=3,
+                                        **kwargs)
+                    self.assertEqual(list(range(10)),
+                                     [b.items[0].a for b in ret])
+        asyncio.run(go())
+
+    def test_errors(self):
+        data = b'{"items": []}\n\n{"items": [{}]}\n{"a": 1}\n'
+
+        async def go():
+            with ThreadPoolExecutor(1) as executor:
+                for pool in (None, executor):
+                    with self.assertRaises(Error) as ctx:
+                        await collect(B, feed(data), validate=True,
+                                      executor=pool, batch_size=1)
+                    self.assertEqual((1, 'items', 0), ctx.exception.path)
+            self.assertEqual(3, len(await collect(B, feed(data))))
+            with self.assertRaises(ValueError):
+                await collect(B, feed(b'{"a": 1}\n{"a":\n'))
+            with self.assertRaises(ValueError):
+                await collect(A, feed(b'{"a": "%s"}\n' % (
+                    b'x' * (CHUNK_SIZE + 100)), limit=50))
+        asyncio.run(go())
+
+    def test_received(self):
+        async def go():
+            reader = asyncio.StreamReader()
+            reader.feed_data(b'{"a": 1}\n{"a": 2}\n')
+            items = iter_components(A, reader)
+            ret = [await asyncio.wait_for(items.__anext__(), 1)
+                   for i in range(2)]
+            reader.feed_data(b'{"a": 3}')
+            reader.feed_eof()
+            ret += [item async for item in items]
+            return [a.a for a in ret]
+        self.assertEqual([1, 2, 3], asyncio.run(go()))
+
+    def test_empty(self):
+        async def go():
+            return await collect(A, feed(b'\n'))
+        self.assertEqual([], asyncio.run(go()))
+
+
+class TestWriteComponents(unittest.TestCase):
+    def test_roundtrip(self):
+        async def source():
+            for i in range(5):
+                yield A(a=i)
+
+        async def go():
+            left, right = socket.socketpair()
+            _, writer = await asyncio.open_connection(sock=left)
+            reader, other = await asyncio.open_connection(sock=right)
+            items = [A(a='ü'), A(a=array('i', [1, 2])), A(a={'x': None})]
+            self.assertEqual(3, await write_components(writer, items,
+                                                       batch_size=2))
+            self.assertEqual(5, await write_components(writer, source()))
+            writer.close()
+            await writer.wait_closed()
+            ret = await collect(A, reader)
+            other.close()
+            return ret
+
+        ret = asyncio.run(go())
+        self.assertEqual(['ü', [1, 2], {'x': None}, 0, 1, 2, 3, 4],
+                         [a.a for a in ret])
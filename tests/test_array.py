@@ -0,0 +1,135 @@
+import json
+import pickle
+import unittest
+from array import array
+from steward import (Component, Field, FieldArray, FieldComp, FieldList,
+                     Error, Tracker, json_default)
+
+
+class Samples(Component):
+    name = Field()
+    values = FieldArray('d')
+    counts = FieldArray('q')
+
+
+class Batch(Component):
+    items = FieldList(Samples)
+
+
+class TestArray(unittest.TestCase):
+    def test_from_plain(self):
+        plain = {'name': 'n', 'values': [1, 2.5]}
+        s = Samples.from_plain(plain)
+        self.assertEqual(array('d', [1.0, 2.5]), s.values)
+        self.assertIs(s.values, s.values)
+        self.assertIs(s.values, plain['values'])
+        self.assertEqual(array('q'), s.counts)
+        s.values.append(4)
+        self.assertEqual({'name': 'n', 'values': [1.0, 2.5, 4.0],
+                          'counts': []}, s.as_plain())
+        self.assertIs(s.values, plain['values'])
+
+    def test_init(self):
+        s = Samples(name='n', values=[1.5], counts=range(3))
+        self.assertEqual(array('d', [1.5]), s.values)
+        self.assertEqual(array('q', [0, 1, 2]), s.counts)
+
+    def test_set_buffer(self):
+        s = Samples(name='n')
+        source = array('d', [1.0, 2.0, 3.0])
+        s.values = memoryview(source)[::2]
+        self.assertEqual(array('d', [1.0, 3.0]), s.values)
+        s.values = source
+        self.assertIs(source, s.values)
+        s.counts = array('i', [5, 6])
+        self.assertEqual(array('q', [5, 6]), s.counts)
+        with self.assertRaises(TypeError):
+            s.values = ['x']
+
+    def test_bulk(self):
+        s = Samples(name='n', values=[0] * 5)
+        s.values[1:3] = array('d', [7, 8])
+        self.assertEqual([0, 7, 8, 0, 0], s.as_plain()['values'])
+        view = memoryview(s.values)
+        self.assertEqual('d', view.format)
+        self.assertEqual(7.0, view[1])
+
+    def test_json(self):
+        s = Samples(name='n', values=[1.5])
+        text = json.dumps(s.as_plain())
+        self.assertEqual({'name': 'n', 'values': [1.5], 'counts': []},
+                         json.loads(text))
+        s.values.append(2)
+        self.assertEqual([1.5, 2.0], json.loads(s.as_json())['values'])
+        self.assertEqual(array('d', [1.5, 2.0]),
+                         pickle.loads(pickle.dumps(s)).values)
+        text = json.dumps(array('d', [1.5]), default=json_default)
+        self.assertEqual('[1.5]', text)
+        with self.assertRaises(TypeError):
+            json.dumps({'a': object()}, default=json_default)
+
+    def test_validate(self):
+        Samples.validate_plain({'name': 'n', 'values': [1, 2.5]})
+        Samples.validate_plain({'name': 'n', 'values': array('d')})
+        with self.assertRaises(Error) as ctx:
+            Samples.validate_plain({'name': 'n', 'counts': [1.5]})
+        self.assertEqual(('counts',), ctx.exception.path)
+        with self.assertRaises(Error):
+            Samples.validate_plain({'name': 'n', 'values': array('f')})
+        with self.assertRaises(Error):
+            Samples.validate_plain({'name': 'n', 'values': 1})
+
+    def test_bad_typecode(self):
+        with self.assertRaises(ValueError):
+            FieldArray('u')
+        with self.assertRaises(ValueError):
+            FieldArray('x')
+
+    def test_clone_and_track(self):
+        s = Samples(name='n', values=[1.0])
+        copy = s.clone()
+        copy.values[0] = 2.0
+        self.assertEqual(1.0, s.values[0])
+        copy = s.cow_clone()
+        copy.values[0] = 2.0
+        self.assertEqual(1.0, s.values[0])
+        self.assertEqual([2.0], copy.as_plain()['values'])
+        with Tracker(s) as tracker:
+            s.values = [3.0]
+        self.assertEqual([{'op': 'replace', 'path': '/values',
+                           'value': [3.0]}], tracker.patch())
+        s = Samples.from_plain({'name': 'n', 'values': [1]})
+        with Tracker(s) as tracker:
+            s.values
+        self.assertEqual([], tracker.patch())
+        batch = Batch()
+        with Tracker(batch) as tracker:
+            batch.items.append(Samples(name='n', values=[1]))
+        self.assertEqual([1.0], tracker.patch()[0]['value']['values'])
+        batch.items[0].values.append(2)
+        self.assertEqual([1.0, 2.0],
+                         json.loads(json.dumps(batch.as_plain()))[
+                             'items'][0]['values'])
+
+    def test_deep_schema(self):
+        cls = Samples
+        for level in range(500):
+            class Level(Component):
+                inner = FieldComp(cls, default=None)
+            cls = Level
+        item = cls.from_plain({})
+        self.assertEqual({}, item.as_plain())
+        self.assertEqual(item, item.cow_clone())
+
+    def test_binary(self):
+        s = Samples(name='n', values=[1.5, -2], counts=[2 ** 40])
+        ret = Samples.from_buffer(s.as_buffer())
+        self.assertEqual(array('d', [1.5, -2]), ret.values)
+        self.assertEqual(array('q', [2 ** 40]), ret.counts)
+        ret.values.append(3)
+        self.assertEqual(3, len(ret.values))
+        self.assertEqual([1.5, -2.0, 3.0], ret.as_plain()['values'])
+        # lists are written back as arrays
+        ret = Samples.from_buffer(ret.as_buffer())
+        self.assertIsInstance(ret._plain_['values'], array)
+        self.assertEqual([2 ** 40], ret.as_plain()['counts'])
@@ -0,0 +1,71 @@
+import unittest
+from types import GeneratorType
+from steward import Component, Field, FieldComp, FieldList, Error
+
+
+class A(Component):
+    a = Field()
+    b = Field(default=1)
+
+
+class B(Component):
+    x = FieldComp(A)
+    y = FieldList(A)
+
+
+class TestFromPlainMany(unittest.TestCase):
+    def test_list(self):
+        data = [{'a': 1}, {'a': 2}]
+        ret = A.from_plain_many(data)
+        self.assertIsInstance(ret, list)
+        self.assertEqual([1, 2], [i.a for i in ret])
+        self.assertIs(data[0], ret[0].as_plain())
+
+    def test_lazy(self):
+        ret = A.from_plain_many(iter([{'a': 1}]), lazy=True)
+        self.assertIsInstance(ret, GeneratorType)
+        self.assertEqual([1], [i.a for i in ret])
+
+    def test_decode(self):
+        data = [{'a': 1}, {'a': 2, 'b': 3}]
+        ret = A.from_plain_many(data, decode=['a', 'b'])
+        self.assertIs(data[0], ret[0]._plain_)
+        cache = ret[0].__dict__
+        self.assertEqual((1, 1), (cache['a'], cache['b']))
+        self.assertEqual({'a': 2, 'b': 3}, data[1])
+
+    def test_decode_nested(self):
+        data = [{'x': {'a': 1}}]
+        ret = B.from_plain_many(data, decode=['x', 'y'])
+        self.assertIsInstance(ret[0].__dict__['x'], A)
+        self.assertEqual([], data[0]['y'])
+
+    def test_decode_unknown(self):
+        with self.assertRaisesRegex(Error, "Unknown field 'z'"):
+            A.from_plain_many([], decode=['z'])
+
+    def test_validate(self):
+        with self.assertRaisesRegex(Error,
+                                    r"^\[1\]: Missing params: 'a'$"):
+            A.from_plain_many([{'a': 1}, {'b': 2}], validate=True)
+        ret = A.from_plain_many([{'a': 1}, {'b': 2}], validate=True,
+                                lazy=True)
+        self.assertEqual(1, next(ret).a)
+        with self.assertRaises(Error):
+            next(ret)
+
+
+class TestAsPlainMany(unittest.TestCase):
+    def test_as_plain_many(self):
+        items = [A(a=1), A(a=2)]
+        ret = A.as_plain_many(items)
+        self.assertEqual([{'a': 1, 'b': 1}, {'a': 2, 'b': 1}], ret)
+        self.assertIs(items[0].as_plain(), ret[0])
+
+    def test_lazy(self):
+        ret = A.as_plain_many(iter([A(a=1)]), lazy=True)
+        self.assertEqual([{'a': 1, 'b': 1}], list(ret))
+
+    def test_wrong_type(self):
+        with self.assertRaises(TypeError):
+            A.as_plain_many([B(x=A(a=1))])
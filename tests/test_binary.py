@@ -0,0 +1,160 @@
+import gc
+import json
+import mmap
+import tempfile
+import unittest
+from steward import (Component, Field, FieldComp, FieldList, FieldDict,
+                     Error, Tracker)
+from steward.binary import dumps, load
+
+
+class A(Component):
+    a = Field()
+    b = Field(default=0)
+
+
+class B(Component):
+    name = Field()
+    comp = FieldComp(A, default=None)
+    items = FieldList(A)
+    mapping = FieldDict(A)
+    extra = Field(default=None)
+
+
+class CompactB(Component, compact=True):
+    name = Field()
+    items = FieldList(A)
+
+
+PLAIN = {
+    'name': 'ü-name',
+    'comp': {'a': 1.5},
+    'items': [{'a': i, 'b': -i} for i in range(5)],
+    'mapping': {'x': {'a': 'x'}, 'y': {'a': None}, 'é': {'a': True}},
+    'extra': {'list': [1, 2 ** 70, -2 ** 63, False], 'nested': {}}}
+
+
+class TestBinary(unittest.TestCase):
+    def test_round_trip(self):
+        b = B.from_plain(PLAIN)
+        ret = B.from_buffer(b.as_buffer())
+        self.assertEqual(b.as_plain(), ret.clone().as_plain())
+        self.assertEqual(ret.as_plain(), b.as_plain())
+
+    def test_fields(self):
+        b = B.from_buffer(B.from_plain(PLAIN).as_buffer())
+        self.assertEqual('ü-name', b.name)
+        self.assertEqual(1.5, b.comp.a)
+        self.assertEqual(0, b.comp.b)
+        self.assertEqual(5, len(b.items))
+        self.assertEqual(-3, b.items[3].b)
+        self.assertEqual(-4, b.items[-1].b)
+        self.assertEqual([0, 1, 2, 3, 4], [i.a for i in b.items])
+        self.assertEqual(['x', 'y', 'é'], list(b.mapping))
+        self.assertEqual('x', b.mapping['x'].a)
+        self.assertTrue(b.mapping['é'].a)
+        self.assertNotIn('z', b.mapping)
+        self.assertEqual([1, 2 ** 70, -2 ** 63, False], b.extra['list'])
+        self.assertIs(b.items[2], b.items[2])
+
+    def test_lazy(self):
+        b = B.from_buffer(B.from_plain(PLAIN).as_buffer())
+        self.assertEqual(-2, b.items[2].b)
+        cache = b._plain_._cache
+        self.assertEqual(['items'], list(cache))
+        self.assertEqual([2], list(cache['items']._cache))
+
+    def test_missing(self):
+        b = B.from_buffer(B(name='n').as_buffer())
+        self.assertIsNone(b.comp)
+        self.assertEqual(0, len(b.items))
+        self.assertEqual({'name': 'n', 'comp': None, 'items': [],
+                          'mapping': {}, 'extra': None}, b.as_plain())
+
+    def test_change(self):
+        orig = B.from_plain(PLAIN)
+        b = B.from_buffer(orig.as_buffer())
+        item = b.items[1]
+        item.a = 'changed'
+        b.name = 'new'
+        del b.mapping['x']
+        b.items.append(A(a='last'))
+        self.assertIs(item, b.items[1])
+        self.assertIsInstance(b.as_plain(), dict)
+        expected = orig.clone().as_plain()
+        expected['name'] = 'new'
+        expected['items'][1]['a'] = 'changed'
+        expected['items'].append({'a': 'last', 'b': 0})
+        del expected['mapping']['x']
+        self.assertEqual(expected, b.clone().as_plain())
+
+    def test_as_plain(self):
+        b = B.from_buffer(B.from_plain(PLAIN).as_buffer())
+        mapping = b.mapping
+        item = b.items[1]
+        item.a = 'changed'
+        plain = b.as_plain()
+        self.assertEqual(plain, json.loads(json.dumps(plain)))
+        self.assertEqual(plain, B.from_plain(plain, validate=True).as_plain())
+        self.assertIs(dict, type(plain['mapping']['x']))
+        self.assertIs(plain['items'][1], item.as_plain())
+        self.assertIs(plain['mapping'], mapping.as_plain())
+        item.b = 5
+        self.assertEqual(5, plain['items'][1]['b'])
+        orig = B.from_buffer(B.from_plain(PLAIN).as_buffer())
+        clone = orig.cow_clone()
+        self.assertIs(dict, type(clone.as_plain()['comp']))
+        self.assertIsNot(dict, type(orig._plain_))
+
+    def test_tracking(self):
+        b = B.from_buffer(B.from_plain(PLAIN).as_buffer())
+        with Tracker(b) as tracker:
+            b.items[0].b = 7
+        self.assertEqual([{'op': 'replace', 'path': '/items/0/b',
+                           'value': 7}], tracker.patch())
+
+    def test_extra_keys(self):
+        b = B.from_plain({'name': 'n', 'unknown': [1], 'comp': {'a': 2}})
+        ret = B.from_buffer(b.as_buffer())
+        self.assertEqual(2, ret.comp.a)
+        self.assertEqual([1], ret.as_plain()['unknown'])
+        self.assertEqual(b.as_plain(), ret.clone().as_plain())
+
+    def test_compact(self):
+        b = CompactB(name='c')
+        b.items.append(A(a=1))
+        ret = CompactB.from_buffer(b.as_buffer())
+        self.assertEqual('c', ret.name)
+        ret.name = 'd'
+        self.assertEqual({'name': 'd', 'items': [{'a': 1, 'b': 0}]},
+                         ret.clone().as_plain())
+
+    def test_mmap(self):
+        with tempfile.TemporaryFile() as f:
+            f.write(B.from_plain(PLAIN).as_buffer())
+            f.flush()
+            m = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            b = B.from_buffer(m)
+            self.assertEqual(4, b.items[4].a)
+            self.assertEqual('ü-name', b.name)
+            # views keep the buffer exported until collected
+            del b
+            gc.collect()
+            m.close()
+
+    def test_bad_buffer(self):
+        with self.assertRaises(Error):
+            B.from_buffer(b'{"name": 1}')
+        with self.assertRaises(Error):
+            A.from_buffer(B.from_plain(PLAIN).as_buffer())
+
+    def test_not_serializable(self):
+        with self.assertRaises(TypeError):
+            dumps({'a': object()}, A)
+        with self.assertRaises(TypeError):
+            dumps({'a': {1: 2}}, A)
+
+    def test_load(self):
+        view = load(memoryview(A(a=[1, 'x']).as_buffer()), A)
+        self.assertEqual({'a': [1, 'x'], 'b': 0}, dict(view))
+        self.assertEqual(2, len(view))
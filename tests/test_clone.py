@@ -0,0 +1,185 @@
+import unittest
+from unittest import mock
+import steward
+from steward import (Component, Field, FieldComp, FieldList, FieldDict,
+                     Error)
+
+
+class A(Component):
+    a = Field()
+
+
+class B(Component):
+    x = FieldComp(A)
+    y = FieldComp(A)
+    items = FieldList(A)
+    mapping = FieldDict(A)
+
+
+class C(Component):
+    b = FieldComp(B)
+    name = Field(default='c')
+
+
+class TestDeepClone(unittest.TestCase):
+    def test_nested(self):
+        c = C.from_plain({'b': {'x': {'a': 1}, 'y': {'a': 2},
+                                'items': [{'a': 10}, {'a': 11}],
+                                'mapping': {'k': {'a': 20}}}})
+        d = c.clone(name='d')
+        self.assertEqual('d', d.name)
+        d.b.x.a = 5
+        self.assertEqual(1, c.b.x.a)
+        self.assertIsNot(c.b.as_plain(), d.b.as_plain())
+
+
+class TestCowClone(unittest.TestCase):
+    def test_shares_plain(self):
+        c = C.from_plain({'b': {'x': {'a': 1}, 'y': {'a': 2},
+                                'items': [{'a': 10}, {'a': 11}],
+                                'mapping': {'k': {'a': 20}}}})
+        d = c.cow_clone()
+        self.assertIs(C, type(d))
+        self.assertEqual(c.as_plain(), d.as_plain())
+        self.assertIsNot(c.as_plain(), d.as_plain())
+        self.assertIs(c.as_plain()['b'], d.as_plain()['b'])
+
+    def test_override(self):
+        c = C.from_plain({'b': {'x': {'a': 1}, 'y': {'a': 2},
+                                'items': [{'a': 10}, {'a': 11}],
+                                'mapping': {'k': {'a': 20}}}})
+        d = c.cow_clone(name='d')
+        self.assertEqual('d', d.name)
+        self.assertEqual('c', c.name)
+        with self.assertRaises(Error):
+            c.cow_clone(unknown=1)
+
+    def test_change_clone(self):
+        c = C.from_plain({'b': {'x': {'a': 1}, 'y': {'a': 2},
+                                'items': [{'a': 10}, {'a': 11}],
+                                'mapping': {'k': {'a': 20}}}})
+        d = c.cow_clone()
+        d.b.x.a = 5
+        self.assertEqual(5, d.b.x.a)
+        self.assertEqual(1, c.b.x.a)
+        self.assertEqual(1, c.as_plain()['b']['x']['a'])
+        # only the changed path is copied
+        self.assertIs(c.as_plain()['b']['y'], d.as_plain()['b']['y'])
+        self.assertIs(c.as_plain()['b']['items'],
+                      d.as_plain()['b']['items'])
+        self.assertIsNot(c.as_plain()['b'], d.as_plain()['b'])
+
+    def test_change_original(self):
+        c = C.from_plain({'b': {'x': {'a': 1}, 'y': {'a': 2},
+                                'items': [{'a': 10}, {'a': 11}],
+                                'mapping': {'k': {'a': 20}}}})
+        x = c.b.x
+        d = c.cow_clone()
+        x.a = 7
+        self.assertEqual(7, c.b.x.a)
+        self.assertEqual(1, d.b.x.a)
+        x.a = 8
+        self.assertEqual(8, c.as_plain()['b']['x']['a'])
+        self.assertEqual(1, d.as_plain()['b']['x']['a'])
+
+    def test_list(self):
+        c = C.from_plain({'b': {'x': {'a': 1}, 'y': {'a': 2},
+                                'items': [{'a': 10}, {'a': 11}],
+                                'mapping': {'k': {'a': 20}}}})
+        d = c.cow_clone()
+        d.b.items.append(A(a=12))
+        d.b.items[0].a = 0
+        self.assertEqual([10, 11], [i.a for i in c.b.items])
+        self.assertEqual([0, 11, 12], [i.a for i in d.b.items])
+        self.assertIs(c.as_plain()['b']['items'][1],
+                      d.as_plain()['b']['items'][1])
+        del c.b.items[0]
+        self.assertEqual([11], [i.a for i in c.b.items])
+        self.assertEqual(3, len(d.b.items))
+
+    def test_dict(self):
+        c = C.from_plain({'b': {'x': {'a': 1}, 'y': {'a': 2},
+                                'items': [{'a': 10}, {'a': 11}],
+                                'mapping': {'k': {'a': 20}}}})
+        d = c.cow_clone()
+        d.b.mapping['k'].a = 21
+        d.b.mapping['n'] = A(a=22)
+        self.assertEqual({'k': {'a': 20}}, c.as_plain()['b']['mapping'])
+        self.assertEqual({'k': {'a': 21}, 'n': {'a': 22}},
+                         d.as_plain()['b']['mapping'])
+
+    def test_replace_field(self):
+        c = C.from_plain({'b': {'x': {'a': 1}, 'y': {'a': 2},
+                                'items': [{'a': 10}, {'a': 11}],
+                                'mapping': {'k': {'a': 20}}}})
+        d = c.cow_clone()
+        d.b.x = A(a=3)
+        self.assertEqual(1, c.b.x.a)
+        self.assertEqual(3, d.b.x.a)
+
+    def test_chain(self):
+        c = C.from_plain({'b': {'x': {'a': 1}, 'y': {'a': 2},
+                                'items': [{'a': 10}, {'a': 11}],
+                                'mapping': {'k': {'a': 20}}}})
+        d = c.cow_clone()
+        e = d.cow_clone()
+        e.b.x.a = 3
+        d.b.y.a = 4
+        self.assertEqual((1, 2), (c.b.x.a, c.b.y.a))
+        self.assertEqual((1, 4), (d.b.x.a, d.b.y.a))
+        self.assertEqual((3, 2), (e.b.x.a, e.b.y.a))
+
+    def test_clone_of_nested(self):
+        c = C.from_plain({'b': {'x': {'a': 1}, 'y': {'a': 2},
+                                'items': [{'a': 10}, {'a': 11}],
+                                'mapping': {'k': {'a': 20}}}})
+        b = c.b.cow_clone()
+        b.x.a = 9
+        self.assertEqual(1, c.b.x.a)
+        c.b.y.a = 9
+        self.assertEqual(2, b.y.a)
+
+    def test_removed_item(self):
+        c = C.from_plain({'b': {'x': {'a': 1}, 'y': {'a': 2},
+                                'items': [{'a': 10}, {'a': 11}],
+                                'mapping': {'k': {'a': 20}}}})
+        item = c.b.items[0]
+        d = c.cow_clone()
+        del c.b.items[0]
+        item.a = 100
+        self.assertEqual([11], [i.a for i in c.b.items])
+        self.assertEqual([10, 11], [i.a for i in d.b.items])
+
+    def test_removed_nested(self):
+        c = C.from_plain({'b': {'x': {'a': 1}, 'y': {'a': 2},
+                                'items': [{'a': 10}, {'a': 11}],
+                                'mapping': {'k': {'a': 20}}}})
+        b = c.b
+        d = c.cow_clone()
+        c.b = B(x=A(a=0), y=A(a=0))
+        b.x.a = 100
+        b.mapping['k'].a = 100
+        self.assertEqual(1, d.b.x.a)
+        self.assertEqual({'k': {'a': 20}}, d.as_plain()['b']['mapping'])
+
+    def test_root_catches_up(self):
+        c = C.from_plain({'b': {'x': {'a': 1}, 'y': {'a': 2},
+                                'items': [{'a': 10}, {'a': 11}],
+                                'mapping': {'k': {'a': 20}}}})
+        c.cow_clone()
+        c.name = 'first'
+        with mock.patch('steward._unshare', wraps=steward._unshare) as m:
+            c.name = 'second'
+            c.b.cow_clone().x = A(a=0)
+        # roots remember the epoch like nested wrappers do
+        self.assertEqual(0, m.call_count)
+
+    def test_read_does_not_copy(self):
+        class D(Component):
+            b = FieldComp(B)
+
+        d = D.from_plain({'b': {'x': {'a': 1}, 'y': {'a': 2}}})
+        e = d.cow_clone()
+        self.assertEqual([], list(e.b.items))
+        self.assertEqual(1, e.b.x.a)
+        self.assertIs(d.as_plain()['b']['x'], e.as_plain()['b']['x'])
@@ -0,0 +1,108 @@
+import unittest
+from array import array
+from steward import Component, Field, FieldList, Error, Tracker
+
+
+class Row(Component):
+    id = Field()
+    price = Field(default=0.0)
+    tags = FieldList(Component)
+
+
+class Table(Component):
+    rows = FieldList(Row)
+
+
+class TestToColumns(unittest.TestCase):
+    def test_all_fields(self):
+        table = Table.from_plain(
+            {'rows': [{'id': i, 'price': i * 1.5} for i in range(3)]})
+        columns = table.rows.to_columns(['id', 'price'])
+        self.assertEqual({'id': [0, 1, 2], 'price': [0, 1.5, 3.0]},
+                         columns)
+        self.assertEqual(['id', 'price'], list(columns))
+
+    def test_defaults(self):
+        table = Table.from_plain(
+            {'rows': [{'id': i, 'price': i * 1.5} for i in range(3)]})
+        table.rows.append(Row(id=3))
+        del table.rows.as_plain()[3]['price']
+        columns = table.rows.to_columns()
+        self.assertEqual([0, 1.5, 3.0, 0.0], columns['price'])
+        self.assertEqual([[], [], [], []], columns['tags'])
+
+    def test_missing_required(self):
+        table = Table.from_plain({'rows': [{'id': 1}, {'price': 2}]})
+        with self.assertRaises(Error) as ctx:
+            table.rows.to_columns(['id'])
+        self.assertEqual((1,), ctx.exception.path)
+
+    def test_single_and_arrays(self):
+        table = Table.from_plain(
+            {'rows': [{'id': i, 'price': i * 1.5} for i in range(3)]})
+        columns = table.rows.to_columns(['price'], arrays={'price': 'd'})
+        self.assertEqual(array('d', [0, 1.5, 3.0]), columns['price'])
+
+    def test_no_wrappers(self):
+        table = Table.from_plain(
+            {'rows': [{'id': i, 'price': i * 1.5} for i in range(3)]})
+        rows = table.rows
+        rows.to_columns()
+        self.assertEqual({}, rows._ListProxy__shadow)
+
+    def test_empty(self):
+        rows = Table.from_plain({'rows': []}).rows
+        self.assertEqual({'id': [], 'price': []},
+                         rows.to_columns(['id', 'price']))
+        self.assertEqual({}, rows.to_columns([]))
+
+    def test_unknown(self):
+        with self.assertRaises(Error):
+            Table().rows.to_columns(['unknown'])
+
+
+class TestFromColumns(unittest.TestCase):
+    def test_replace(self):
+        table = Table.from_plain(
+            {'rows': [{'id': i, 'price': i * 1.5} for i in range(3)]})
+        old = table.rows[0]
+        table.rows.from_columns({'id': [10, 11],
+                                 'price': array('d', [1, 2])})
+        self.assertEqual([{'id': 10, 'price': 1.0},
+                          {'id': 11, 'price': 2.0}], table.as_plain()['rows'])
+        self.assertEqual(10, table.rows[0].id)
+        self.assertIsNone(old._parent_)
+
+    def test_round_trip(self):
+        table = Table.from_plain(
+            {'rows': [{'id': i, 'price': i * 1.5} for i in range(5)]})
+        other = Table()
+        other.rows.from_columns(table.rows.to_columns(['id', 'price']))
+        self.assertEqual(table.as_plain(), other.as_plain())
+
+    def test_lengths(self):
+        with self.assertRaises(Error):
+            Table().rows.from_columns({'id': [1], 'price': []})
+
+    def test_no_columns(self):
+        table = Table.from_plain(
+            {'rows': [{'id': i, 'price': i * 1.5} for i in range(2)]})
+        with self.assertRaises(Error):
+            table.rows.from_columns({})
+        self.assertEqual(2, len(table.rows))
+
+    def test_validate(self):
+        rows = Table().rows
+        with self.assertRaises(Error) as ctx:
+            rows.from_columns({'price': [1, 2]}, validate=True)
+        self.assertEqual((0,), ctx.exception.path)
+        self.assertEqual(0, len(rows))
+
+    def test_tracking(self):
+        table = Table.from_plain(
+            {'rows': [{'id': i, 'price': i * 1.5} for i in range(1)]})
+        with Tracker(table) as tracker:
+            table.rows.from_columns({'id': [5]})
+        self.assertEqual([{'op': 'remove', 'path': '/rows/0'},
+                          {'op': 'add', 'path': '/rows/0',
+                           'value': {'id': 5}}], tracker.patch())
@@ -0,0 +1,101 @@
+import unittest
+import weakref
+from steward import (Component, Field, FieldComp, FieldList, Tracker,
+                     Error)
+
+
+class A(Component, compact=True):
+    a = Field()
+    b = Field(default=1)
+    c = Field(maker=list)
+    d = Field(const=True, default='d')
+
+
+class B(Component, compact=True):
+    x = FieldComp(A)
+    items = FieldList(A)
+    n = Field(default=0)
+
+
+class Regular(Component):
+    a = Field()
+
+
+class TestCompact(unittest.TestCase):
+    def test_layout(self):
+        self.assertEqual(('_plain_', '__dict__', '__weakref__'),
+                         A.__slots__)
+        self.assertTrue(A._compact_)
+        self.assertFalse(Regular._compact_)
+        self.assertTrue(A.a.compact)
+        self.assertFalse(B.x.compact)
+
+    def test_ctor(self):
+        a = A(a=5)
+        self.assertEqual({'a': 5, 'b': 1, 'c': [], 'd': 'd'}, a.as_plain())
+        self.assertEqual(5, a.a)
+        self.assertEqual({}, a.__dict__)
+        with self.assertRaisesRegex(Error, "Missing params: 'a'"):
+            A()
+
+    def test_no_duplicated_values(self):
+        a = A.from_plain({'a': 1})
+        self.assertEqual((1, 1, []), (a.a, a.b, a.c))
+        self.assertEqual({'a': 1, 'b': 1, 'c': []}, a.as_plain())
+        # only the copy-on-write epoch may be kept, see cow_clone()
+        self.assertEqual(set(), A._names_ & set(a.__dict__))
+
+    def test_set(self):
+        a = A(a=1)
+        a.a = 2
+        self.assertEqual(2, a.a)
+        self.assertEqual(2, a.as_plain()['a'])
+        with self.assertRaises(AttributeError):
+            a.d = 'x'
+
+    def test_nested(self):
+        b = B(x=A(a=1))
+        b.items.append(A(a=2))
+        b.x.a = 3
+        self.assertEqual({'x': {'a': 3, 'b': 1, 'c': [], 'd': 'd'},
+                          'items': [{'a': 2, 'b': 1, 'c': [], 'd': 'd'}],
+                          'n': 0}, b.as_plain())
+        self.assertIs(b.x, b.x)
+
+    def test_from_plain_many(self):
+        items = A.from_plain_many([{'a': 1}], decode=['a', 'b'])
+        self.assertEqual({'a': 1, 'b': 1}, items[0].as_plain())
+        self.assertEqual(set(), A._names_ & set(items[0].__dict__))
+
+    def test_subclass(self):
+        class C(A):
+            e = Field(default='e')
+
+        self.assertTrue(C._compact_)
+        self.assertEqual((), C.__slots__)
+        self.assertEqual('e', C(a=1).e)
+        self.assertTrue(C.e.compact)
+        with self.assertRaises(TypeError):
+            class D(A, compact=False):
+                pass
+
+    def test_regular_base(self):
+        with self.assertRaises(TypeError):
+            class C(Regular, compact=True):
+                pass
+
+    def test_clone_and_tracking(self):
+        b = B(x=A(a=1))
+        c = b.cow_clone()
+        c.x.a = 2
+        self.assertEqual(1, b.x.a)
+        tracker = Tracker(b)
+        b.x.b = 5
+        self.assertEqual([{'op': 'replace', 'path': '/x/b', 'value': 5}],
+                         tracker.patch())
+        tracker.close()
+        self.assertEqual(5, b.clone().x.b)
+
+    def test_weakref(self):
+        a = A(a=1)
+        self.assertIs(a, weakref.ref(a)())
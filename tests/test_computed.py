@@ -0,0 +1,180 @@
+import unittest
+from steward import (Component, Field, FieldComp, FieldList, FieldDict,
+                     Error, computed)
+
+
+class Line(Component):
+    price = Field()
+    qty = Field(default=1)
+
+    @computed
+    def total(self):
+        return self.price * self.qty
+
+
+class Order(Component):
+    lines = FieldList(Line)
+    extra = FieldDict(Line)
+    main = FieldComp(Line, default=None)
+    name = Field(default='')
+    calls = 0
+
+    @computed(depends=['lines', 'extra', 'main'])
+    def total(self):
+        """Sum of all lines."""
+        Order.calls += 1
+        ret = sum(line.total for line in self.lines)
+        ret += sum(line.total for line in self.extra.values())
+        if self.main is not None:
+            ret += self.main.total
+        return ret
+
+    @computed
+    def key(self):
+        return self.name.lower()
+
+
+class CompactLine(Component, compact=True):
+    price = Field()
+    qty = Field(default=1)
+
+    @computed(depends=['qty'])
+    def total(self):
+        return self.price * self.qty
+
+
+class Special(Order):
+    discount = Field(default=0)
+
+
+class TestComputed(unittest.TestCase):
+    def setUp(self):
+        Order.calls = 0
+
+    def test_cached(self):
+        order = Order()
+        order.lines.append(Line(price=2, qty=3))
+        self.assertEqual(6, order.total)
+        self.assertEqual(6, order.total)
+        self.assertEqual(1, Order.calls)
+        self.assertEqual('Sum of all lines.', Order.total.__doc__)
+        self.assertIn('total', Order._computed_)
+
+    def test_fields(self):
+        order = Order(name='AB')
+        self.assertEqual('ab', order.key)
+        order.name = 'Cd'
+        self.assertEqual('cd', order.key)
+        order.total
+        order.name = 'x'
+        order.total
+        self.assertEqual(1, Order.calls)
+
+    def test_nested(self):
+        order = Order()
+        order.lines.append(Line(price=1))
+        checks = [
+            (lambda: order.lines.append(Line(price=10)), 11),
+            (lambda: setattr(order.lines[0], 'qty', 3), 13),
+            (lambda: order.extra.__setitem__('a', Line(price=5)), 18),
+            (lambda: setattr(order.extra['a'], 'price', 7), 20),
+            (lambda: setattr(order, 'main', Line(price=100)), 120),
+            (lambda: setattr(order.main, 'qty', 2), 220),
+            (lambda: order.lines.sort(key='price', reverse=True), 220),
+            (lambda: order.lines.pop(), 217),
+            (lambda: order.extra.clear(), 210),
+            (lambda: order.lines.clear(), 200),
+        ]
+        for change, total in checks:
+            change()
+            self.assertEqual(total, order.total)
+            self.assertEqual(total, order.total)
+
+    def test_single_place(self):
+        line = Line(price=1)
+        first = Order()
+        first.lines.append(line)
+        second = Order()
+        second.lines.append(line)
+        second.main = line
+        second.extra['a'] = line
+        first.lines.append(line)
+        first.lines.extend([Line(price=2)] * 2)
+        self.assertEqual((6, 3), (first.total, second.total))
+        self.assertIs(line, first.lines[0])
+        self.assertIsNot(line, second.main)
+        line.price = 4
+        self.assertEqual((9, 3), (first.total, second.total))
+        second.lines[0].price = 5
+        self.assertEqual((9, 7), (first.total, second.total))
+        first.lines[0] = line
+        self.assertIs(line, first.lines[0])
+        second.lines.append(first.lines.pop(0))
+        line.price = 6
+        self.assertEqual((5, 13), (first.total, second.total))
+
+    def test_swap(self):
+        order = Order.from_plain({'lines': [{'price': 1}, {'price': 2}]})
+        lines = order.lines
+        lines[0], lines[1] = lines[1], lines[0]
+        self.assertEqual([2, 1], [line.price for line in lines])
+        self.assertEqual(3, order.total)
+        lines[1].price = 10
+        lines[0].qty = 2
+        self.assertEqual([(2, 2), (10, 1)],
+                         [(line['price'], line.get('qty', 1))
+                          for line in order.as_plain()['lines']])
+        self.assertEqual(14, order.total)
+
+    def test_reuse(self):
+        order = Order(main=Line(price=1))
+        order.extra['x'] = Line(price=2)
+        order.extra['y'] = order.extra['x']
+        other = Order(main=order.main)
+        order.lines.extend([Line(price=3)])
+        order.lines.extend(order.lines)
+        self.assertEqual(11, order.total)
+        order.main.price = 4
+        order.extra['y'].price = 5
+        order.lines[1].price = 6
+        self.assertEqual((20, 1), (order.total, other.total))
+        plain = order.as_plain()
+        self.assertEqual({'x': 2, 'y': 5}, {
+            key: line['price'] for key, line in plain['extra'].items()})
+        self.assertEqual([3, 6], [line['price'] for line in plain['lines']])
+
+    def test_compact(self):
+        line = CompactLine(price=2)
+        self.assertEqual(2, line.total)
+        line.qty = 4
+        self.assertEqual(8, line.total)
+        line.price = 3
+        self.assertEqual(8, line.total)
+
+    def test_inherited(self):
+        order = Special()
+        order.lines.append(Line(price=1))
+        self.assertEqual(1, order.total)
+        order.discount = 1
+        self.assertEqual(1, order.total)
+        self.assertEqual(1, Order.calls)
+        self.assertEqual('', order.key)
+        self.assertEqual(('key',), Special._dependents_['discount'])
+
+    def test_clone(self):
+        order = Order()
+        order.lines.append(Line(price=1))
+        order.total
+        for clone in (order.clone(), order.cow_clone()):
+            clone.lines[0].price = 5
+            self.assertEqual(5, clone.total)
+            self.assertEqual(1, order.total)
+
+    def test_unknown_depends(self):
+        with self.assertRaises(TypeError):
+            class Bad(Component):
+                a = Field()
+
+                @computed(depends=['b'])
+                def c(self):
+                    return 0
@@ -1,3 +1,4 @@
+import gc
 import unittest
 from steward import Component, Field, FieldComp, FieldDict, Error
 
@@ -10,6 +11,14 @@ class B(Component):
     a = FieldDict(A)
 
 
+class LRU(Component):
+    a = FieldDict(A, cache='lru', cache_size=2)
+
+
+class Weak(Component):
+    a = FieldDict(A, cache='weak')
+
+
 class TestDict(unittest.TestCase):
     def test_ctor(self):
         r = B()
@@ -53,3 +62,63 @@ class TestDict(unittest.TestCase):
         del r.a[1]
         self.assertEqual(1, len(r.a))
         self.assertEqual({'a': {2: {'a': 'b'}}}, r.as_plain())
+
+    def test_cache_info(self):
+        r = B.from_plain({'a': {'0': {'a': 0}, '1': {'a': 1},
+                                '2': {'a': 2}}})
+        r.a['0']
+        r.a['0']
+        r.a['1']
+        self.assertEqual((1, 2, None, 2), r.a.cache_info())
+
+    def test_lru(self):
+        r = LRU.from_plain({'a': {'0': {'a': 0}, '1': {'a': 1},
+                                  '2': {'a': 2}, '3': {'a': 3}}})
+        for key in '0123':
+            r.a[key]
+        gc.collect()
+        self.assertEqual(2, r.a.cache_info().currsize)
+        first = r.a['3']
+        self.assertIs(first, r.a['3'])
+        r.a['0']
+        r.a['1']
+        r.a['2']
+        # evicted wrapper is still returned while referenced
+        self.assertIs(first, r.a['3'])
+        self.assertEqual((3, 7, 2, 2), r.a.cache_info())
+
+    def test_lru_change(self):
+        r = LRU.from_plain({'a': {'0': {'a': 0}, '1': {'a': 1},
+                                  '2': {'a': 2}, '3': {'a': 3}}})
+        item = r.a['0']
+        for key in '123':
+            r.a[key]
+        item.a = 'changed'
+        self.assertEqual('changed', r.a['0'].a)
+        r.a['1'] = A(a='new')
+        del r.a['2']
+        gc.collect()
+        self.assertEqual({'0': {'a': 'changed'}, '1': {'a': 'new'},
+                          '3': {'a': 3}}, r.as_plain()['a'])
+        self.assertEqual('new', r.a['1'].a)
+
+    def test_weak(self):
+        r = Weak.from_plain({'a': {'0': {'a': 0}, '1': {'a': 1},
+                                   '2': {'a': 2}}})
+        item = r.a['0']
+        r.a['1']
+        gc.collect()
+        self.assertEqual(1, r.a.cache_info().currsize)
+        self.assertIs(item, r.a['0'])
+        del item
+        gc.collect()
+        self.assertEqual(0, r.a.cache_info().currsize)
+        self.assertEqual(0, r.a['0'].a)
+
+    def test_bad_cache(self):
+        with self.assertRaises(ValueError):
+            FieldDict(A, cache='fifo')
+        with self.assertRaises(ValueError):
+            FieldDict(A, cache='lru')
+        with self.assertRaises(ValueError):
+            FieldDict(A, cache='lru', cache_size=0)
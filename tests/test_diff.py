@@ -0,0 +1,209 @@
+import random
+import unittest
+from copy import deepcopy
+from datetime import date
+from steward import (Component, Field, FieldComp, FieldList, FieldDict,
+                     FieldArray, diff)
+from .test_tracking import apply_patch
+
+
+class A(Component):
+    a = Field()
+    b = Field(default=0)
+
+
+class B(Component):
+    x = FieldComp(A)
+    items = FieldList(A)
+    mapping = FieldDict(A)
+    name = Field(default='')
+
+
+class CompactA(Component, compact=True):
+    a = Field()
+
+
+class TestEquality(unittest.TestCase):
+    def test_eq(self):
+        a = B(x=A(a=1))
+        a.items.extend([A(a=i) for i in range(3)])
+        a.mapping['k'] = A(a='k')
+        b = B(x=A(a=1))
+        b.items.extend([A(a=i) for i in range(3)])
+        b.mapping['k'] = A(a='k')
+        self.assertEqual(a, b)
+        self.assertEqual(A(a=1), A.from_plain({'b': 0, 'a': 1}))
+        self.assertNotEqual(A(a=1), A(a=2))
+        self.assertNotEqual(A(a=1), CompactA(a=1))
+        self.assertNotEqual(A(a=1), {'a': 1, 'b': 0})
+
+    def test_like_plain(self):
+        # equal when plain data compare equal, digests agree
+        pairs = [(1, 1.0), ({1: 'x', 'y': [2]}, {'y': [2.0], 1: 'x'}),
+                 ({date(2020, 1, 1)}, {date(2020, 1, 1)}),
+                 ({'b': (1, 2)}, {'b': (1, 2)})]
+        for a, b in pairs:
+            self.assertEqual(A(a=a), A(a=b))
+            if not isinstance(a, set):
+                self.assertEqual(A(a=a).digest(), A(a=b).digest())
+        for a, b in [({1: 'x'}, {'1': 'x'}), ([1], (1,)), ('1', 1)]:
+            self.assertNotEqual(A(a=a), A(a=b))
+            self.assertNotEqual(A(a=a).digest(), A(a=b).digest())
+        with self.assertRaises(TypeError):
+            A(a=date(2020, 1, 1)).digest()
+
+    def test_changed_in_place(self):
+        a = A(a=[1])
+        b = A(a=[1])
+        self.assertEqual(a, b)
+        a.a.append(2)
+        self.assertNotEqual(a, b)
+        b.a.append(2)
+        self.assertEqual(a, b)
+
+    def test_identity_hash(self):
+        a = A(a=1)
+        b = A(a=1)
+        self.assertEqual(a, b)
+        self.assertEqual(2, len({a, b, a}))
+        self.assertEqual(1, len({CompactA(a=1)}))
+        mapping = {a: 'a'}
+        a.a = 2
+        self.assertEqual('a', mapping[a])
+        self.assertNotIn(b, mapping)
+
+    def test_exported(self):
+        # views and arrays compare by the plain data they export to
+        class Samples(Component):
+            values = FieldArray('i')
+            items = FieldList(A)
+        a = Samples(values=[1, 2])
+        a.items.append(A(a=1))
+        b = Samples.from_buffer(a.as_buffer())
+        c = Samples.from_json(a.as_json())
+        self.assertEqual(a, b)
+        self.assertEqual(a, c)
+        self.assertEqual(Samples.from_plain({'values': [1, 2],
+                                             'items': [{'a': 1, 'b': 0}]}),
+                         b)
+        b.items[0].a = 2
+        self.assertNotEqual(a, b)
+        self.assertEqual(a, c)
+
+    def test_digest_cached(self):
+        b = B(x=A(a=1))
+        b.items.extend([A(a=i) for i in range(3)])
+        b.mapping['k'] = A(a='k')
+        digest = b.digest()
+        self.assertIs(digest, b.digest())
+        self.assertEqual(digest, b.clone().digest())
+        self.assertEqual(digest, b.cow_clone()._digest_)
+        # only the tree having digest reports changes
+        self.assertTrue(b.items[0]._watched_)
+        self.assertFalse(B(x=A(a=1)).x._watched_)
+
+    def test_reset_by_changes(self):
+        b = B(x=A(a=1))
+        b.items.extend([A(a=i) for i in range(3)])
+        b.mapping['k'] = A(a='k')
+        changes = [
+            lambda: setattr(b, 'name', 'n'),
+            lambda: setattr(b.x, 'a', 5),
+            lambda: b.items.append(A(a=7)),
+            lambda: setattr(b.items[0], 'b', 1),
+            lambda: b.items.sort(key='a', reverse=True),
+            lambda: b.mapping.__setitem__('z', A(a='z')),
+            lambda: setattr(b.mapping['k'], 'a', 'kk'),
+            lambda: b.mapping.__delitem__('z'),
+            lambda: b.items.clear(),
+        ]
+        seen = {b.digest()}
+        for index, change in enumerate(changes):
+            child = b.x.digest()
+            change()
+            digest = b.digest()
+            self.assertNotIn(digest, seen)
+            seen.add(digest)
+            # only the changed branch is reset
+            self.assertEqual(index == 1, child != b.x.digest())
+
+    def test_default_written(self):
+        a = A.from_plain({'a': 1})
+        digest = a.digest()
+        a.b
+        self.assertNotEqual(digest, a.digest())
+
+
+class TestDiff(unittest.TestCase):
+    def test_fields(self):
+        a = B(x=A(a=1))
+        a.items.extend([A(a=i) for i in range(3)])
+        a.mapping['k'] = A(a='k')
+        b = B(x=A(a=1))
+        b.items.extend([A(a=i) for i in range(3)])
+        b.mapping['k'] = A(a='k')
+        self.assertEqual([], diff(a, b))
+        b.name = 'n'
+        b.x.a = 2
+        del b.mapping['k']
+        b.mapping['new'] = A(a=0)
+        del b.items[0]
+        self.assertEqual(
+            [{'op': 'replace', 'path': '/x/a', 'value': 2},
+             {'op': 'replace', 'path': '/items/0/a', 'value': 1},
+             {'op': 'replace', 'path': '/items/1/a', 'value': 2},
+             {'op': 'remove', 'path': '/items/2'},
+             {'op': 'remove', 'path': '/mapping/k'},
+             {'op': 'add', 'path': '/mapping/new',
+              'value': {'a': 0, 'b': 0}},
+             {'op': 'replace', 'path': '/name', 'value': 'n'}],
+            diff(a, b))
+
+    def test_types(self):
+        with self.assertRaises(TypeError):
+            diff(A(a=1), B(x=A(a=1)))
+        self.assertEqual([{'op': 'replace', 'path': '/a', 'value': True}],
+                         diff(A(a=1), A(a=True)))
+        self.assertEqual([{'op': 'replace', 'path': '/a/0', 'value': 'x'}],
+                         diff(A(a=[{}]), A(a=['x'])))
+
+    def test_skips_shared(self):
+        a = B(x=A(a=1))
+        a.items.extend([A(a=i) for i in range(3)])
+        a.mapping['k'] = A(a='k')
+        b = a.cow_clone()
+        b.items[1].a = 'x'
+        self.assertEqual([{'op': 'replace', 'path': '/items/1/a',
+                           'value': 'x'}], diff(a, b))
+        # equal digests of existing wrappers are trusted
+        a.x.digest()
+        b.x._digest_ = a.x.digest()
+        b.as_plain()['x'] = {'a': 'unseen'}
+        self.assertEqual([{'op': 'replace', 'path': '/items/1/a',
+                           'value': 'x'}], diff(a, b))
+
+    def test_random(self):
+        rnd = random.Random(3)
+        for run in range(50):
+            a = B(x=A(a=1))
+            a.items.extend([A(a=i) for i in range(3)])
+            a.mapping['k'] = A(a='k')
+            b = B(x=A(a=1))
+            b.items.extend([A(a=i) for i in range(3)])
+            b.mapping['k'] = A(a='k')
+            for step in range(rnd.randint(0, 6)):
+                action = rnd.randrange(5)
+                if action == 0:
+                    b.items.insert(rnd.randint(0, len(b.items)), A(a=step))
+                elif action == 1 and len(b.items):
+                    del b.items[rnd.randrange(len(b.items))]
+                elif action == 2:
+                    b.x.b = [step, {'n': step}]
+                elif action == 3:
+                    b.mapping[str(step % 2)] = A(a=step)
+                elif action == 4 and len(b.items):
+                    b.items[0].a = {'v': step}
+            patch = diff(a, b)
+            self.assertEqual(b.as_plain(),
+                             apply_patch(deepcopy(a.as_plain()), patch))
+            self.assertEqual(patch == [], a == b)
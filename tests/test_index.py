@@ -0,0 +1,179 @@
+import unittest
+from steward import Component, Field, FieldList, FieldDict, Error, Tracker
+
+
+class Item(Component):
+    sku = Field()
+    kind = Field(default='plain')
+    qty = Field(default=1)
+
+
+class Order(Component):
+    items = FieldList(Item, index=['sku', 'kind'])
+    by_name = FieldDict(Item, index=['sku'])
+
+
+def skus(items):
+    return [i.sku for i in items]
+
+
+class TestListIndex(unittest.TestCase):
+    def test_lookup(self):
+        order = Order.from_plain(
+            {'items': [{'sku': 's{}'.format(i)} for i in range(5)]})
+        items = order.items
+        self.assertEqual(['s3'], skus(items.lookup('sku', 's3')))
+        self.assertIs(items[3], items.lookup('sku', 's3')[0])
+        self.assertEqual([], items.lookup('sku', 'missing'))
+        self.assertEqual(5, len(items.lookup('kind', 'plain')))
+
+    def test_lazy(self):
+        order = Order.from_plain(
+            {'items': [{'sku': 's{}'.format(i)} for i in range(5)]})
+        order.items.lookup('sku', 's1')
+        self.assertEqual({1: order.items[1]}, order.items._ListProxy__shadow)
+
+    def test_not_indexed(self):
+        with self.assertRaises(Error):
+            Order().items.lookup('qty', 1)
+
+    def test_bad_index(self):
+        with self.assertRaises(TypeError):
+            FieldList(Item, index=['unknown'])
+        with self.assertRaises(TypeError):
+            FieldList(Order, index=['items'])
+
+    def test_append_and_setitem(self):
+        order = Order.from_plain(
+            {'items': [{'sku': 's{}'.format(i)} for i in range(5)]})
+        items = order.items
+        items.lookup('sku', 's0')
+        index = items._index_
+        items.append(Item(sku='new', kind='special'))
+        items[0] = Item(sku='first')
+        self.assertIsNotNone(index.buckets)
+        self.assertEqual(['new'], skus(items.lookup('kind', 'special')))
+        self.assertEqual(['first'], skus(items.lookup('sku', 'first')))
+        self.assertEqual([], items.lookup('sku', 's0'))
+        del items[-1]
+        self.assertIsNotNone(index.buckets)
+        self.assertEqual([], items.lookup('sku', 'new'))
+
+    def test_insert_and_delete(self):
+        order = Order.from_plain(
+            {'items': [{'sku': 's{}'.format(i)} for i in range(5)]})
+        items = order.items
+        items.lookup('sku', 's0')
+        index = items._index_
+        items.insert(1, Item(sku='ins'))
+        self.assertIsNone(index.buckets)
+        items.lookup('sku', 's0')
+        del items[3]
+        self.assertIsNone(index.buckets)
+        self.assertEqual(['s0', 'ins', 's1', 's3', 's4'], skus(items))
+        self.assertIs(items[3], items.lookup('sku', 's3')[0])
+        self.assertIs(items[1], items.lookup('sku', 'ins')[0])
+        self.assertEqual([], items.lookup('sku', 's2'))
+        del items[:2]
+        self.assertEqual(['s1'], skus(items.lookup('sku', 's1')))
+        items[1:1] = [Item(sku='a'), Item(sku='b', kind='special')]
+        self.assertEqual(['s1', 'a', 'b', 's3', 's4'], skus(items))
+        self.assertIs(items[4], items.lookup('sku', 's4')[0])
+        self.assertEqual([items[2]], items.lookup('kind', 'special'))
+        self.assertEqual({2}, index.find('kind', 'special'))
+
+    def test_bulk(self):
+        order = Order.from_plain(
+            {'items': [{'sku': 's{}'.format(i)} for i in range(5)]})
+        items = order.items
+        items.lookup('sku', 's0')
+        items.reverse()
+        items.extend([Item(sku='e1'), Item(sku='e2')])
+        self.assertIs(items[4], items.lookup('sku', 's0')[0])
+        self.assertIs(items[6], items.lookup('sku', 'e2')[0])
+        items.sort(key='sku')
+        self.assertIs(items[0], items.lookup('sku', 'e1')[0])
+        items.clear()
+        self.assertEqual([], items.lookup('kind', 'plain'))
+
+    def test_item_change(self):
+        order = Order.from_plain(
+            {'items': [{'sku': 's{}'.format(i)} for i in range(5)]})
+        items = order.items
+        items.lookup('sku', 's0')
+        items[2].sku = 'changed'
+        items[4].qty = 10
+        self.assertIsNotNone(items._index_.buckets)
+        self.assertEqual([], items.lookup('sku', 's2'))
+        self.assertIs(items[2], items.lookup('sku', 'changed')[0])
+
+    def test_stream(self):
+        order = Order.from_plain(
+            {'items': [{'sku': 's{}'.format(i)} for i in range(3)]})
+        items = list(order.items.stream())
+        order.items.lookup('sku', 's0')
+        del order.items[0]
+        items[1].sku = 'x'
+        self.assertEqual([order.items[0]], order.items.lookup('sku', 'x'))
+        self.assertEqual(['x', 's2'], skus(order.items))
+
+    def test_with_tracker(self):
+        order = Order.from_plain(
+            {'items': [{'sku': 's{}'.format(i)} for i in range(5)]})
+        with Tracker(order) as tracker:
+            order.items.lookup('sku', 's0')
+            order.items[0].sku = 'x'
+            self.assertEqual(['x'], skus(order.items.lookup('sku', 'x')))
+        self.assertEqual([{'op': 'replace', 'path': '/items/0/sku',
+                           'value': 'x'}], tracker.patch())
+
+    def test_list_tracker(self):
+        order = Order.from_plain(
+            {'items': [{'sku': 's{}'.format(i)} for i in range(5)]})
+        order.items.lookup('sku', 's0')
+        index = order.items._index_
+        with Tracker(order.items) as tracker:
+            order.items[0].sku = 'x'
+            self.assertIs(index, order.items._index_)
+            self.assertEqual(['x'], skus(order.items.lookup('sku', 'x')))
+            self.assertIsNotNone(index.buckets)
+        self.assertEqual([{'op': 'replace', 'path': '/0/sku',
+                           'value': 'x'}], tracker.patch())
+        self.assertTrue(order.items[1]._watched_)
+        order.items[1].sku = 'y'
+        self.assertEqual(['y'], skus(order.items.lookup('sku', 'y')))
+
+    def test_scoped(self):
+        order = Order.from_plain(
+            {'items': [{'sku': 's{}'.format(i)} for i in range(5)]})
+        order.items.lookup('sku', 's0')
+        self.assertTrue(order.items[0]._watched_)
+        # changes elsewhere are not reported
+        other = Order()
+        other.items.append(Item(sku='s0'))
+        self.assertFalse(other._watched_)
+        self.assertFalse(other.items._watched_)
+
+
+class TestDictIndex(unittest.TestCase):
+    def test_lookup(self):
+        order = Order.from_plain(
+            {'by_name': {'n{}'.format(i): {'sku': i % 2} for i in range(5)}})
+        mapping = order.by_name
+        self.assertEqual(['n1', 'n3'], sorted(
+            key for key in mapping
+            if mapping[key] in mapping.lookup('sku', 1)))
+        self.assertEqual(3, len(mapping.lookup('sku', 0)))
+
+    def test_changes(self):
+        order = Order.from_plain(
+            {'by_name': {'n{}'.format(i): {'sku': i % 2} for i in range(5)}})
+        mapping = order.by_name
+        mapping.lookup('sku', 0)
+        mapping['new'] = Item(sku=7)
+        mapping['n0'] = Item(sku=7)
+        del mapping['n2']
+        mapping['n4'].sku = 1
+        self.assertEqual([], mapping.lookup('sku', 0))
+        self.assertEqual(2, len(mapping.lookup('sku', 7)))
+        self.assertEqual(3, len(mapping.lookup('sku', 1)))
@@ -1,4 +1,4 @@
-from steward import Field, Component
+from steward import Field, Component, Error
 
 import unittest
 
@@ -28,3 +28,28 @@ class TestInheritance(unittest.TestCase):
         self.assertEqual({'a': 1, 'b': 2}, b.as_plain())
         c = B.from_plain(b.as_plain())
         self.assertEqual(b.as_plain(), c.as_plain())
+
+    def test_custom_init_in_base(self):
+        class C(A):
+            def __init__(self, **kwargs):
+                kwargs.setdefault('a', 'custom')
+                super().__init__(**kwargs)
+
+        class D(C):
+            d = Field(default='d')
+
+        self.assertIs(C.__init__, D.__init__)
+        d = D()
+        self.assertEqual({'a': 'custom', 'd': 'd'}, d.as_plain())
+
+    def test_super_init_with_more_fields(self):
+        class C(B):
+            c = Field()
+
+            def __init__(self, **kwargs):
+                super().__init__(**kwargs)
+
+        c = C(a=1, b=2, c=3)
+        self.assertEqual({'a': 1, 'b': 2, 'c': 3}, c.as_plain())
+        with self.assertRaisesRegex(Error, "Missing params: 'c'"):
+            C(a=1, b=2)
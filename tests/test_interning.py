@@ -0,0 +1,132 @@
+import io
+import json
+import unittest
+from array import array
+from steward import (Component, Field, FieldComp, FieldList, FieldDict,
+                     FieldArray, Tracker)
+from steward.interning import Interner
+from steward.stream import iter_components
+
+
+class Address(Component):
+    city = Field()
+    street = Field(default='')
+
+
+class Line(Component):
+    sku = Field()
+    tags = Field(default=None)
+
+
+class Order(Component):
+    id = Field()
+    address = FieldComp(Address, default=None)
+    lines = FieldList(Line)
+    by_name = FieldDict(Address)
+    samples = FieldArray('d')
+
+
+class TestInterner(unittest.TestCase):
+    def test_shared(self):
+        interner = Interner()
+        plainvals = [interner.intern(Order, {
+            'id': i,
+            'address': {'city': 'Kyiv', 'street': 'Main {}'.format('x')},
+            'lines': [{'sku': 's1'}, {'sku': 's2'}],
+            'by_name': {'home': {'city': 'Lviv'}}}) for i in range(3)]
+        first, second = plainvals[:2]
+        self.assertIsNot(first, second)
+        self.assertIs(first['address'], second['address'])
+        self.assertIs(first['lines'], second['lines'])
+        self.assertIs(first['by_name'], second['by_name'])
+        self.assertIs(first['address']['street'],
+                      second['address']['street'])
+        self.assertGreater(interner.saved, 0)
+        self.assertEqual(14, interner.hits)
+
+    def test_mutable_plain_values(self):
+        interner = Interner()
+        plainvals = [interner.intern(Order, {
+            'id': 1, 'lines': [{'sku': 's', 'tags': ['a' + 'b']}]})
+            for i in range(2)]
+        first, second = plainvals
+        self.assertIsNot(first['lines'], second['lines'])
+        self.assertIsNot(first['lines'][0], second['lines'][0])
+        self.assertIs(first['lines'][0]['tags'][0],
+                      second['lines'][0]['tags'][0])
+
+    def test_scalar_types(self):
+        interner = Interner()
+        first = interner.intern(Order, {'id': 1, 'address': {'city': 1}})
+        second = interner.intern(Order, {'id': 1,
+                                         'address': {'city': True}})
+        self.assertIsNot(first['address'], second['address'])
+        self.assertIs(True, second['address']['city'])
+
+    def test_clear(self):
+        interner = Interner()
+        interner.intern(Order, {'id': 1, 'address': {'city': 'Kyiv'}})
+        self.assertGreater(len(interner), 0)
+        interner.clear()
+        self.assertEqual(0, len(interner))
+
+
+class TestFromPlainMany(unittest.TestCase):
+    def test_copy_on_write(self):
+        orders = Order.from_plain_many(
+            [{'id': i,
+              'address': {'city': 'Kyiv'},
+              'lines': [{'sku': 's1'}, {'sku': 's2'}],
+              'by_name': {'home': {'city': 'Lviv'}}} for i in range(3)],
+            intern=True)
+        self.assertIs(orders[0].as_plain()['address'],
+                      orders[1].as_plain()['address'])
+        orders[0].address.city = 'Odesa'
+        orders[1].lines[0].sku = 'changed'
+        orders[2].lines.append(Line(sku='s3'))
+        orders[2].by_name['work'] = Address(city='Kharkiv')
+        orders[0].samples.append(1.5)
+        self.assertEqual(['Odesa', 'Kyiv', 'Kyiv'],
+                         [o.address.city for o in orders])
+        self.assertEqual([['s1', 's2'], ['changed', 's2'],
+                          ['s1', 's2', 's3']],
+                         [[line.sku for line in o.lines] for o in orders])
+        self.assertEqual([['home'], ['home'], ['home', 'work']],
+                         [list(o.by_name) for o in orders])
+        self.assertEqual([array('d', [1.5]), array('d'), array('d')],
+                         [o.samples for o in orders])
+
+    def test_same_items(self):
+        orders = Order.from_plain_many(
+            [{'id': 1, 'lines': [{'sku': 's'}, {'sku': 's'}]}], intern=True)
+        lines = orders[0].lines
+        second = lines[1]
+        self.assertEqual(1, lines.index(second))
+        second.sku = 'x'
+        self.assertEqual([{'sku': 's'}, {'sku': 'x'}],
+                         orders[0].as_plain()['lines'])
+        lines.remove(second)
+        self.assertEqual([{'sku': 's'}], orders[0].as_plain()['lines'])
+
+    def test_tracking(self):
+        orders = Order.from_plain_many(
+            [{'id': i, 'address': {'city': 'Kyiv', 'street': 'Main x'}}
+             for i in range(2)], intern=True)
+        with Tracker(orders[1]) as tracker:
+            orders[1].address.street = 'new'
+        self.assertEqual([{'op': 'replace', 'path': '/address/street',
+                           'value': 'new'}], tracker.patch())
+        self.assertEqual('Main x', orders[0].address.street)
+
+    def test_lazy_and_stream(self):
+        interner = Interner()
+        text = '\n'.join(
+            json.dumps({'id': i, 'lines': [{'sku': 's1'}, {'sku': 's2'}]})
+            for i in range(3))
+        orders = list(iter_components(Order, io.BytesIO(text.encode()),
+                                      ndjson=True, intern=interner))
+        self.assertIs(orders[0].as_plain()['lines'],
+                      orders[2].as_plain()['lines'])
+        orders[0].lines[0].sku = 'x'
+        self.assertEqual('s1', orders[2].lines[0].sku)
+        self.assertGreater(interner.saved, 0)
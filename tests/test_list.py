@@ -1,5 +1,8 @@
 import unittest
-from collections import Iterator
+try:
+    from collections.abc import Iterator
+except ImportError:  # pragma: no cover
+    from collections import Iterator
 from steward import Component, Field, FieldComp, FieldList, Error
 
 
@@ -65,3 +68,152 @@ class TestList(unittest.TestCase):
         self.assertIsInstance(_iter, Iterator)
         self.assertEqual(i1.as_plain(), next(_iter).as_plain())
         self.assertEqual(i2.as_plain(), next(_iter).as_plain())
+
+    def test_lazy_item(self):
+        calls = []
+
+        class Counted(A):
+            @classmethod
+            def from_plain(cls, plainval):
+                calls.append(plainval)
+                return super().from_plain(plainval)
+
+        class L(Component):
+            a = FieldList(Counted)
+
+        r = L.from_plain({'a': [{'a': i} for i in range(1000)]})
+        self.assertEqual(5, r.a[5].a)
+        self.assertEqual(999, r.a[-1].a)
+        self.assertEqual(2, len(calls))
+        self.assertIs(r.a[5], r.a[5])
+        self.assertEqual(2, len(calls))
+
+    def test_iter_after_changes(self):
+        r = B.from_plain({'a': [{'a': i} for i in range(4)]})
+        items = list(r.a)
+        self.assertEqual(items, list(r.a))
+        self.assertIs(items[2], r.a[2])
+        self.assertEqual([items[1], items[2]], r.a[1:3])
+        r.a.insert(1, A(a='x'))
+        r.a[0] = A(a='y')
+        del r.a[4]
+        self.assertEqual(['y', 'x', 1, 2], [i.a for i in r.a])
+        r.a.reverse()
+        self.assertEqual([2, 1, 'x', 'y'], [i.a for i in r.a])
+        self.assertIs(items[2], r.a[0])
+        with self.assertRaises(IndexError):
+            r.a[4]
+
+    def test_identity_after_insert_and_delete(self):
+        r = B.from_plain({'a': [{'a': 'a'}, {'a': 'b'}, {'a': 'c'}]})
+        b, c = r.a[1], r.a[2]
+        r.a.insert(0, A(a='z'))
+        self.assertIs(b, r.a[2])
+        self.assertIs(c, r.a[3])
+        del r.a[1]
+        self.assertIs(b, r.a[1])
+        self.assertIs(c, r.a[2])
+        self.assertEqual(['z', 'b', 'c'], [i.a for i in r.a])
+
+    def test_slices(self):
+        r = B.from_plain({'a': [{'a': i} for i in range(6)]})
+        four = r.a[4]
+        self.assertEqual([1, 2], [i.a for i in r.a[1:3]])
+        r.a[1:3] = [A(a='x')]
+        self.assertIs(four, r.a[3])
+        self.assertEqual([0, 'x', 3, 4, 5], [i.a for i in r.a])
+        del r.a[::2]
+        self.assertIs(four, r.a[1])
+        self.assertEqual({'a': [{'a': 'x'}, {'a': 4}]}, r.as_plain())
+
+    def test_stream(self):
+        r = B.from_plain({'a': [{'a': 'a'}, {'a': 'b'}]})
+        first = r.a[0]
+        items = list(r.a.stream())
+        self.assertIs(first, items[0])
+        self.assertEqual('b', items[1].a)
+        # kept while referenced only
+        self.assertIs(items[1], r.a._child(1))
+        del items
+        self.assertIsNone(r.a._child(1))
+
+    def test_stream_changes(self):
+        r = B.from_plain({'a': [{'a': 'a'}, {'a': 'b'}, {'a': 'c'}]})
+        items = list(r.a.stream())
+        r.a.insert(0, A(a='new'))
+        del r.a[2]
+        items[0].a = 'changed'
+        items[2].a = 'last'
+        self.assertEqual({'a': [{'a': 'new'}, {'a': 'changed'},
+                                {'a': 'last'}]}, r.as_plain())
+        self.assertIsNone(items[1]._parent_)
+        r.a.reverse()
+        self.assertIs(items[0], r.a[1])
+        self.assertEqual(1, r.a.index(items[0]))
+
+    def test_index_error(self):
+        r = B.from_plain({'a': [{'a': 'a'}]})
+        with self.assertRaises(IndexError):
+            r.a[1]
+        with self.assertRaises(IndexError):
+            r.a[-2]
+
+    def test_extend(self):
+        r = B()
+        first = A(a=0)
+        r.a.append(first)
+        items = [A(a=i) for i in range(1, 4)]
+        r.a.extend(iter(items))
+        r.a += [A(a=4)]
+        self.assertIs(items[1], r.a[2])
+        self.assertEqual(r.a, items[2]._parent_[0])
+        self.assertEqual([{'a': i} for i in range(5)], r.as_plain()['a'])
+        with self.assertRaises(AttributeError):
+            r.a = []
+
+    def test_clear_and_pop(self):
+        r = B.from_plain({'a': [{'a': i} for i in range(4)]})
+        second = r.a[1]
+        last = r.a.pop()
+        self.assertEqual(3, last.a)
+        self.assertIsNone(last._parent_)
+        self.assertIs(second, r.a.pop(1))
+        self.assertEqual([0, 2], [i.a for i in r.a])
+        r.a.clear()
+        self.assertEqual({'a': []}, r.as_plain())
+        with self.assertRaises(IndexError):
+            r.a.pop()
+
+    def test_index_and_remove(self):
+        r = B.from_plain({'a': [{'a': i} for i in range(4)]})
+        item = r.a[2]
+        self.assertEqual(2, r.a.index(item))
+        r.a.remove(item)
+        self.assertIsNone(item._parent_)
+        with self.assertRaises(ValueError):
+            r.a.index(item)
+        with self.assertRaises(ValueError):
+            r.a.remove(A(a=5))
+        r.a.remove(A(a=0))
+        self.assertEqual([1, 3], [i.a for i in r.a])
+
+    def test_reverse(self):
+        r = B.from_plain({'a': [{'a': i} for i in range(4)]})
+        first = r.a[0]
+        r.a.reverse()
+        self.assertIs(first, r.a[3])
+        self.assertEqual([3, 2, 1, 0], [i.a for i in r.a])
+        first.a = 'x'
+        self.assertEqual({'a': 'x'}, r.as_plain()['a'][3])
+
+    def test_sort(self):
+        r = B.from_plain({'a': [{'a': i % 3} for i in range(5)]})
+        item = r.a[1]
+        r.a.sort(key='a')
+        self.assertEqual([0, 0, 1, 1, 2], [i['a'] for i in r.as_plain()['a']])
+        self.assertIs(item, r.a[2])
+        self.assertEqual(2, r.a.index(item))
+        r.a.sort(key=lambda plain: -plain['a'], reverse=True)
+        self.assertEqual([0, 0, 1, 1, 2], [i.a for i in r.a])
+        with self.assertRaises(Error):
+            r.a.sort(key='unknown')
@@ -0,0 +1,176 @@
+import sys
+import unittest
+from steward import (Component, Field, FieldComp, FieldList, FieldDict,
+                     FieldArray, Metrics, Error)
+from steward.storage import SqliteStorage
+
+
+class A(Component):
+    a = Field()
+    b = Field(default=1)
+
+
+class Tagged(Component):
+    a = Field()
+
+    @classmethod
+    def from_plain(cls, plainval, validate=False, only=None, eager=False):
+        ret = super().from_plain(plainval, validate, only, eager)
+        ret.tagged = True
+        return ret
+
+
+class C(Component):
+    x = FieldComp(Tagged)
+    items = FieldList(Tagged)
+    mapping = FieldDict(Tagged)
+
+
+class CompactA(Component, compact=True):
+    a = Field()
+    nested = FieldList(A)
+
+
+class TestMaterialize(unittest.TestCase):
+    def setUp(self):
+        self.storage = SqliteStorage()
+
+        class B(Component):
+            x = FieldComp(A)
+            y = FieldComp(A, default=None)
+            items = FieldList(A)
+            mapping = FieldDict(A)
+            lru = FieldDict(A, cache='lru', cache_size=1)
+            stored = FieldList(A, storage=self.storage)
+            numbers = FieldArray('i')
+            name = Field(default='')
+        self.B = B
+        self.plain = {'x': {'a': 1}, 'items': [{'a': 2}, {'a': 3}],
+                      'mapping': {'k': {'a': 4}}, 'lru': {'k': {'a': 5}},
+                      'stored': [{'a': 6}], 'numbers': [1, 2], 'name': 'n'}
+
+    def tearDown(self):
+        self.storage.close()
+
+    def test_cached(self):
+        b = self.B.from_plain(self.plain, eager=True)
+        cache = b.__dict__
+        self.assertEqual('n', cache['name'])
+        x = cache['x']
+        self.assertIs(x, b.x)
+        self.assertEqual(1, x.__dict__['a'])
+        self.assertNotIn('b', x.__dict__)
+        self.assertNotIn('y', cache)
+        self.assertEqual([2, 3], [item.__dict__['a'] for item in b.items])
+        self.assertIs(b.items[1], b.items._child(1))
+        self.assertEqual(4, b.mapping._child('k').__dict__['a'])
+        self.assertIsNone(b.lru._child('k'))
+        self.assertEqual(0, b.items._child(0).__dict__.get('b', 0))
+        self.assertEqual(6, b.stored[0].a)
+        self.assertEqual([1, 2], list(b.numbers))
+        self.assertEqual('n', b.name)
+
+    def test_changes(self):
+        b = self.B.from_plain(self.plain)
+        b.x
+        b.items[0].a = 'changed'
+        b.materialize()
+        self.assertEqual('changed', b.items[0].a)
+        b.items[1].a = 'later'
+        b.x.a = 7
+        self.assertEqual({'a': 'later'}, b.as_plain()['items'][1])
+        self.assertEqual(7, b.as_plain()['x']['a'])
+
+    def test_compact(self):
+        c = CompactA.from_plain({'a': 1, 'nested': [{'a': 2}]}, eager=True)
+        self.assertEqual(['nested'], list(c.__dict__))
+        self.assertEqual(2, c.nested._child(0).a)
+
+    def test_views(self):
+        B = self.B
+        b = B(x=A(a=1))
+        b.items.append(A(a=2))
+        for view in (B.from_buffer(b.as_buffer()),
+                     B.from_json(b.as_json())):
+            view.materialize()
+            self.assertEqual(2, view.items._child(0).a)
+            view.items[0].a = 3
+            self.assertEqual(2, b.items[0].a)
+
+    def test_deep(self):
+        limit = sys.getrecursionlimit()
+        depth = 300
+        cls = A
+        for level in range(depth):
+            class Node(Component):
+                value = Field()
+                child = FieldComp(cls)
+            cls = Node
+        plainval = {'a': depth}
+        for i in range(depth - 1, -1, -1):
+            plainval = {'value': i, 'child': plainval}
+        sys.setrecursionlimit(100)
+        try:
+            node = cls.from_plain(plainval, eager=True)
+        finally:
+            sys.setrecursionlimit(limit)
+        for i in range(depth):
+            node = node.__dict__['child']
+        self.assertEqual(depth, node.a)
+        self.assertNotIn('child', node.__dict__)
+
+    def test_deeper(self):
+        depth = 3000
+        cls = A
+        for level in range(depth):
+            class Node(Component):
+                value = Field()
+                child = FieldComp(cls)
+            cls = Node
+        plainval = {'a': depth}
+        for i in range(depth - 1, -1, -1):
+            plainval = {'value': i, 'child': plainval}
+        node = cls.from_plain(plainval, validate=True)
+        # plain dicts this deep are compared as components
+        self.assertEqual(node, cls.from_plain(node.as_plain()))
+        clone = node.clone()
+        self.assertEqual(node, clone)
+        self.assertEqual(node.digest(), clone.digest())
+        # encoders recurse, exporting a view does not
+        limit = sys.getrecursionlimit()
+        sys.setrecursionlimit(4 * depth)
+        try:
+            buf = node.as_buffer()
+        finally:
+            sys.setrecursionlimit(limit)
+        view = cls.from_buffer(buf)
+        self.assertEqual(node, cls.from_plain(view.as_plain()))
+        leaf = plainval
+        for i in range(depth):
+            leaf = leaf['child']
+        leaf['a'] = 'x'
+        leaf['c'] = 1
+        with self.assertRaises(Error) as ctx:
+            cls.validate_plain(plainval)
+        self.assertIn("Extra params: 'c'", str(ctx.exception))
+        del leaf['c']
+        self.assertNotEqual(clone, cls.from_plain(plainval))
+
+    def test_from_plain(self):
+        c = C.from_plain({'x': {'a': 1}, 'items': [{'a': 2}],
+                          'mapping': {'k': {'a': 3}}}, eager=True)
+        self.assertTrue(c.__dict__['x'].tagged)
+        self.assertTrue(c.items._child(0).tagged)
+        self.assertTrue(c.mapping._child('k').tagged)
+
+    def test_metrics(self):
+        with Metrics() as metrics:
+            self.B.from_plain(self.plain, eager=True)
+        counters = metrics.snapshot()
+        self.assertEqual(
+            1, counters[__name__ + '.' + self.B.__qualname__]['from_plain'])
+        counters = counters[__name__ + '.A']
+        self.assertEqual(4, counters['from_plain'])
+        self.assertEqual(2, counters['list_builds'])
+        self.assertEqual(2, counters['list_size'])
+        self.assertEqual(1, counters['dict_misses'])
@@ -0,0 +1,79 @@
+import unittest
+import steward
+from steward import (Component, Field, FieldList, FieldDict, Metrics,
+                     Error)
+
+
+class A(Component):
+    a = Field()
+    b = Field(default=1)
+
+
+class CompactA(Component, compact=True):
+    a = Field()
+
+
+class B(Component):
+    items = FieldList(A)
+    mapping = FieldDict(A)
+
+
+class TestMetrics(unittest.TestCase):
+    def test_disabled(self):
+        self.assertIsNone(steward._metrics)
+        A(a=1).a
+
+    def test_fields(self):
+        with Metrics() as metrics:
+            a = A.from_plain({'a': 1})
+            a.a
+            a.a
+            a.b
+            c = CompactA.from_plain({'a': 1})
+            c.a
+        self.assertIsNone(steward._metrics)
+        self.assertEqual({__name__ + '.A': {'from_plain': 1, 'get_hits': 1,
+                                            'get_misses': 2},
+                          __name__ + '.CompactA': {'from_plain': 1,
+                                                   'get_hits': 1}},
+                         metrics.snapshot())
+
+    def test_proxies(self):
+        b = B.from_plain({'items': [{'a': 1}, {'a': 2}, {'a': 3}],
+                          'mapping': {'x': {'a': 1}}})
+        with Metrics() as metrics:
+            b.items[0]
+            b.items[2]
+            b.items[0]
+            b.mapping['x']
+            b.mapping['x']
+        counters = metrics.snapshot()[__name__ + '.A']
+        self.assertEqual(2, counters['list_builds'])
+        self.assertEqual(2, counters['list_size'])
+        self.assertEqual(1, counters['dict_hits'])
+        self.assertEqual(1, counters['dict_misses'])
+        self.assertEqual(3, counters['from_plain'])
+
+    def test_clone_timing(self):
+        a = A(a=[1, 2, 3])
+        with Metrics(timing=True) as metrics:
+            a.clone()
+            a.clone().a
+        counters = metrics.snapshot(reset=True)[__name__ + '.A']
+        self.assertEqual(2, counters['clone'])
+        self.assertGreater(counters['clone_bytes'], 0)
+        self.assertGreaterEqual(counters['clone_time'], 0)
+        self.assertGreaterEqual(counters['get_misses_time'], 0)
+        self.assertEqual({}, metrics.snapshot())
+
+    def test_batch(self):
+        with Metrics() as metrics:
+            A.from_plain_many([{'a': 1}, {'a': 2}])
+            list(A.from_plain_many([{'a': 1}], lazy=True))
+        self.assertEqual({__name__ + '.A': {'from_plain': 3}},
+                         metrics.snapshot())
+
+    def test_single(self):
+        with Metrics():
+            with self.assertRaises(Error):
+                Metrics()
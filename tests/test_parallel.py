@@ -0,0 +1,107 @@
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from steward import Component, Field, FieldComp, FieldList, FieldDict, Error
+from steward.parallel import validate_many, _chunk_size, CHUNKS_PER_WORKER
+
+
+class A(Component):
+    a = Field()
+    b = Field(default=1)
+
+
+class B(Component):
+    x = FieldComp(A)
+    items = FieldList(A)
+
+
+class C(Component):
+    b = FieldComp(B, default=None)
+    mapping = FieldDict(B)
+
+
+class Pool(ThreadPoolExecutor):
+    # counts chunks submitted and not taken back yet
+    def __init__(self):
+        super().__init__(1)
+        self.pending = self.most = 0
+
+    def submit(self, *args):
+        self.pending += 1
+        self.most = max(self.most, self.pending)
+        future = super().submit(*args)
+        result = future.result
+
+        def collect():
+            self.pending -= 1
+            return result()
+        future.result = collect
+        return future
+
+
+class TestValidateMany(unittest.TestCase):
+    def test_processes(self):
+        plainvals = [{'x': {'a': i}} for i in range(10)]
+        plainvals[3] = {'x': {'b': 2}}
+        plainvals[7] = {'x': {'a': 1}, 'unknown': 1}
+        ret = validate_many(B, plainvals, max_workers=2, chunk_size=3)
+        self.assertEqual([(3, 'x'), (7,)],
+                         [exc.path for exc in ret.errors])
+        self.assertIsInstance(ret.errors[0], Error)
+        self.assertEqual("Missing params: 'a'", ret.errors[0].reason)
+        self.assertEqual(10, len(ret.plainvals))
+        self.assertIsNone(ret.plainvals[3])
+        self.assertEqual({'x': {'a': 0, 'b': 1}, 'items': []},
+                         ret.plainvals[0])
+        # the input is left as is
+        self.assertEqual({'x': {'a': 0}}, plainvals[0])
+
+    def test_executor(self):
+        with ThreadPoolExecutor(2) as executor:
+            ret = validate_many(A, iter([{'a': 1}, {'a': 2, 'b': 3}]),
+                                executor=executor)
+            ret2 = validate_many(A, [{'a': 1}], normalize=False,
+                                 executor=executor)
+        self.assertEqual([{'a': 1, 'b': 1}, {'a': 2, 'b': 3}],
+                         ret.plainvals)
+        self.assertEqual([], ret.errors)
+        self.assertEqual([{'a': 1}], ret2.plainvals)
+
+    def test_empty(self):
+        with ThreadPoolExecutor(1) as executor:
+            self.assertEqual(([], []), validate_many(A, [],
+                                                     executor=executor))
+        with self.assertRaises(ValueError):
+            validate_many(A, [], chunk_size=0)
+
+    def test_nested(self):
+        plainval = {'b': {'x': {'a': 0}, 'items': [{'a': 5}]},
+                    'mapping': {'k': {'x': {'a': 1, 'b': 2}}}}
+        with ThreadPoolExecutor(1) as executor:
+            ret = validate_many(C, [plainval, {}], executor=executor)
+        self.assertEqual([], ret.errors)
+        self.assertEqual([
+            {'b': {'x': {'a': 0, 'b': 1}, 'items': [{'a': 5, 'b': 1}]},
+             'mapping': {'k': {'x': {'a': 1, 'b': 2}, 'items': []}}},
+            {'b': None, 'mapping': {}}], ret.plainvals)
+
+    def test_stream(self):
+        with Pool() as pool:
+            ret = validate_many(A, ({'a': i} for i in range(50)),
+                                executor=pool, max_workers=1, chunk_size=2)
+        self.assertEqual(list(range(50)), [p['a'] for p in ret.plainvals])
+        self.assertEqual(0, pool.pending)
+        self.assertEqual(CHUNKS_PER_WORKER, pool.most)
+
+    def test_chunk_size(self):
+        self.assertEqual(1, _chunk_size(0, 4))
+        self.assertEqual(7, _chunk_size(100, 4))
+        self.assertEqual(10000, _chunk_size(10 ** 7, 32))
+
+    def test_json_records(self):
+        lines = [b'{"a": 1}\n', b'\n', b'{"b": 1}\n', b'{"a": ']
+        ret = validate_many(A, lines, max_workers=1)
+        self.assertEqual([{'a': 1, 'b': 1}, None, None, None], ret.plainvals)
+        self.assertEqual([(2,), (3,)], [exc.path for exc in ret.errors])
+        ret = validate_many(A, lines, collect=False, max_workers=1)
+        self.assertIsNone(ret.plainvals)
+        self.assertEqual(2, len(ret.errors))
@@ -0,0 +1,101 @@
+import unittest
+from steward import (Component, Field, FieldComp, FieldList, FieldDict,
+                     Projection, Error)
+
+
+class Price(Component):
+    amount = Field()
+    currency = Field(default='EUR')
+
+
+class Item(Component):
+    sku = Field()
+    title = Field()
+    price = FieldComp(Price)
+
+
+class Order(Component):
+    id = Field()
+    note = Field()
+    customer = FieldComp(Price, default=None)
+    items = FieldList(Item)
+    by_sku = FieldDict(Item)
+
+
+class TestProjection(unittest.TestCase):
+    def setUp(self):
+        self.data = {
+            'id': 1, 'note': 'x' * 100,
+            'customer': {'amount': 5},
+            'items': [{'sku': 'a', 'title': 'A',
+                       'price': {'amount': 1, 'currency': 'USD'}},
+                      {'sku': 'b', 'title': 'B', 'price': {'amount': 2}}],
+            'by_sku': {'a': {'sku': 'a', 'title': 'A',
+                             'price': {'amount': 1}}}}
+
+    def test_from_plain(self):
+        order = Order.from_plain(self.data,
+                                 only=['id', 'items.price.amount',
+                                       'by_sku.sku'])
+        self.assertEqual({'id': 1,
+                          'items': [{'price': {'amount': 1}},
+                                    {'price': {'amount': 2}}],
+                          'by_sku': {'a': {'sku': 'a'}}}, order.as_plain())
+        self.assertEqual(2, order.items[1].price.amount)
+        self.assertEqual('EUR', order.items[0].price.currency)
+        with self.assertRaises(AttributeError):
+            order.note
+        self.assertEqual(order.as_plain(), order.clone().as_plain())
+
+    def test_whole_subtree(self):
+        data = self.data
+        order = Order.from_plain(data, only=['customer.amount', 'customer',
+                                             'items.sku'])
+        self.assertIs(data['customer'], order.as_plain()['customer'])
+        self.assertEqual(['a', 'b'], [i.sku for i in order.items])
+        order = Order.from_plain(data, only='customer')
+        self.assertEqual({'customer': {'amount': 5}}, order.as_plain())
+
+    def test_none(self):
+        data = self.data
+        data['customer'] = None
+        order = Order.from_plain(data, only=['customer.amount'],
+                                 validate=True)
+        self.assertIsNone(order.customer)
+
+    def test_validate(self):
+        data = self.data
+        del data['note']
+        data['items'][1]['title'] = None
+        Order.from_plain(data, only=['id', 'items.sku'], validate=True)
+        del data['items'][1]['sku']
+        with self.assertRaises(Error) as ctx:
+            Order.from_plain(data, only=['id', 'items.sku'], validate=True)
+        self.assertEqual(('items', 1), ctx.exception.path)
+        data['items'] = 5
+        with self.assertRaises(Error) as ctx:
+            Order.from_plain(data, only=['items.sku'], validate=True)
+        self.assertEqual(('items',), ctx.exception.path)
+        with self.assertRaises(Error):
+            Order.from_plain(data, only=['note'], validate=True)
+
+    def test_as_plain(self):
+        order = Order.from_plain(self.data)
+        self.assertEqual({'id': 1, 'customer': {'amount': 5}},
+                         order.as_plain(only=['id', 'customer.amount']))
+
+    def test_projection_object(self):
+        projection = Projection(Order, ['id', 'items.sku'])
+        order = Order.from_plain(self.data, only=projection)
+        self.assertEqual(['a', 'b'], [i.sku for i in order.items])
+        self.assertIs(projection.cls, Order)
+        with self.assertRaises(Error):
+            Item.from_plain({}, only=projection)
+
+    def test_bad_paths(self):
+        with self.assertRaises(Error):
+            Projection(Order, ['unknown'])
+        with self.assertRaises(Error):
+            Projection(Order, ['items.unknown'])
+        with self.assertRaises(Error):
+            Projection(Order, ['id.x'])
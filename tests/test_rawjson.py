@@ -0,0 +1,179 @@
+import json
+import unittest
+from steward import (Component, Field, FieldComp, FieldList, FieldDict,
+                     FieldArray, Error, Tracker)
+from steward import rawjson
+from steward.rawjson import dumps, load
+
+
+class A(Component):
+    a = Field()
+    b = Field(default=0)
+
+
+class B(Component):
+    name = Field()
+    comp = FieldComp(A, default=None)
+    items = FieldList(A)
+    mapping = FieldDict(A)
+    extra = Field(default=None)
+
+
+PLAIN = {
+    'name': 'ü-name "quoted" [',
+    'comp': {'a': 1.5},
+    'items': [{'a': i, 'b': -i} for i in range(5)],
+    'mapping': {'x': {'a': 'x'}, 'y': {'a': None}, 'é': {'a': True}},
+    'extra': {'list': [1, 2 ** 70, '}\\', False], 'nested': {}}}
+
+
+class TestFromJson(unittest.TestCase):
+    def test_fields(self):
+        b = B.from_json(json.dumps(PLAIN, indent=2))
+        self.assertEqual(PLAIN['name'], b.name)
+        self.assertEqual(1.5, b.comp.a)
+        self.assertEqual(0, b.comp.b)
+        self.assertEqual(5, len(b.items))
+        self.assertEqual(-4, b.items[-1].b)
+        self.assertEqual([0, 1, 2, 3, 4], [i.a for i in b.items])
+        self.assertEqual(['x', 'y', 'é'], list(b.mapping))
+        self.assertTrue(b.mapping['é'].a)
+        self.assertNotIn('z', b.mapping)
+        self.assertEqual(PLAIN['extra'], b.extra)
+        self.assertIs(b.items[2], b.items[2])
+        b = B.from_json(json.dumps(PLAIN))
+        self.assertEqual(PLAIN, b.clone().as_plain())
+
+    def test_bytes(self):
+        b = B.from_json(json.dumps(PLAIN).encode('utf-8'))
+        self.assertEqual(PLAIN['name'], b.name)
+
+    def test_lazy(self):
+        b = B.from_json(json.dumps(PLAIN))
+        self.assertEqual('x', b.mapping['x'].a)
+        plain = b._plain_
+        self.assertEqual(['mapping'], list(plain._cache))
+        self.assertEqual(list(PLAIN), list(plain._spans))
+        mapping = plain._cache['mapping']
+        self.assertEqual(['x'], list(mapping._cache))
+        self.assertEqual(['x', 'y', 'é'], list(mapping._spans))
+
+    def test_change(self):
+        b = B.from_json(json.dumps(PLAIN))
+        item = b.items[1]
+        item.a = 'changed'
+        b.name = 'new'
+        del b.mapping['x']
+        b.items.append(A(a='last'))
+        self.assertIs(item, b.items[1])
+        self.assertIsInstance(b.as_plain(), dict)
+        expected = json.loads(json.dumps(PLAIN))
+        expected['name'] = 'new'
+        expected['items'][1]['a'] = 'changed'
+        expected['items'].append({'a': 'last', 'b': 0})
+        del expected['mapping']['x']
+        self.assertEqual(expected, b.clone().as_plain())
+        self.assertEqual(expected, json.loads(b.as_json()))
+
+    def test_as_plain(self):
+        b = B.from_json(json.dumps(PLAIN))
+        item = b.items[1]
+        plain = b.as_plain()
+        self.assertEqual(PLAIN, json.loads(json.dumps(plain)))
+        self.assertEqual(PLAIN, B.from_plain(plain, validate=True).as_plain())
+        self.assertIs(dict, type(plain['mapping']['x']))
+        self.assertIs(plain['items'][1], item.as_plain())
+        item.a = 'changed'
+        self.assertEqual('changed', plain['items'][1]['a'])
+
+    def test_tracking(self):
+        b = B.from_json(json.dumps(PLAIN))
+        with Tracker(b) as tracker:
+            b.items[0].b = 7
+        self.assertEqual([{'op': 'replace', 'path': '/items/0/b',
+                           'value': 7}], tracker.patch())
+
+    def test_missing(self):
+        b = B.from_json('{"name": "n", "comp": null, "items": []}')
+        self.assertIsNone(b.comp)
+        self.assertEqual(0, len(b.items))
+        self.assertEqual(0, len(b.mapping))
+
+    def test_deep(self):
+        value = 'x'
+        for i in range(rawjson.MAX_DEPTH + 5):
+            value = [{'v': value}]
+        b = B.from_json(json.dumps({'extra': value, 'name': 'n'}))
+        self.assertEqual('n', b.name)
+        self.assertEqual(value, b.extra)
+
+    def test_duplicates(self):
+        text = '{"comp": {"a": 1}, "comp": {"a": 2}, "name": "n"}'
+        for names in (['comp', 'name'], ['name', 'comp']):
+            b = B.from_json(text)
+            values = {name: getattr(b, name) for name in names}
+            self.assertEqual(2, values['comp'].a)
+        self.assertEqual({'a': 2}, json.loads(text)['comp'])
+
+    def test_errors(self):
+        with self.assertRaises(Error):
+            B.from_json('[1]')
+        for text in ('{"name": "n"} trailing', '{"name": "n"}}',
+                     '{"name": "n"}{}'):
+            with self.assertRaises(Error):
+                B.from_json(text)
+        self.assertEqual('n', B.from_json(' {"name": "n"}\n').name)
+        for text in ('{"name": "n"', '{"extra": [1, 2}', '{"name" 1}',
+                     '{"extra": "x, "name": 1}', '{"extra": 1 "name": 2}'):
+            with self.assertRaises(Error):
+                B.from_json(text).as_json()
+
+
+class TestAsJson(unittest.TestCase):
+    def test_verbatim(self):
+        text = json.dumps(PLAIN, indent=4)
+        self.assertEqual(text, B.from_json(text).as_json())
+
+    def test_untouched_subtrees(self):
+        text = json.dumps(PLAIN, indent=4)
+        b = B.from_json(text)
+        b.name = 'new'
+        b.comp.a = 2
+        ret = b.as_json()
+        # root was copied on change, its component values are still views
+        self.assertIn(json.dumps(PLAIN['mapping'], indent=4).replace(
+            '\n', '\n    '), ret)
+        self.assertEqual('new', json.loads(ret)['name'])
+        self.assertEqual(2, json.loads(ret)['comp']['a'])
+
+    def test_used_values(self):
+        b = B.from_json(json.dumps(PLAIN))
+        b.extra['list'].append(3)
+        b.comp.a
+        self.assertEqual(3, json.loads(b.as_json())['extra']['list'][-1])
+
+    def test_plain(self):
+        b = B(name='n', extra={1: (1, 2)})
+        b.items.append(A(a=[]))
+        self.assertEqual({'name': 'n', 'extra': {'1': [1, 2]},
+                          'items': [{'a': [], 'b': 0}], 'mapping': {},
+                          'comp': None},
+                         json.loads(b.as_json()))
+        with self.assertRaises(TypeError):
+            dumps({'a': object()})
+
+    def test_array(self):
+        class Samples(Component):
+            values = FieldArray('d')
+
+        s = Samples.from_json('{"values": [1.5, 2]}')
+        self.assertEqual([1.5, 2.0], s.values.tolist())
+        self.assertEqual('{"values":[1.5,2.0]}', s.as_json())
+
+
+class TestLoad(unittest.TestCase):
+    def test_view(self):
+        view = load(' {"a": [1, "x"], "a": 2} ', A)
+        self.assertEqual('{"a": [1, "x"], "a": 2}', dumps(view))
+        self.assertEqual({'a': 2}, dict(view))
+        self.assertEqual(1, len(view))
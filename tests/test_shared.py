@@ -0,0 +1,101 @@
+import pickle
+import unittest
+from concurrent.futures import ProcessPoolExecutor
+from steward import Component, Field, FieldComp, FieldList, FieldDict
+from steward.shared import share, _blocks
+
+
+class A(Component):
+    a = Field()
+
+
+class B(Component):
+    x = FieldComp(A)
+    items = FieldList(A)
+    mapping = FieldDict(A)
+    name = Field(default='')
+
+
+def total(batch):
+    return [b.x.a + sum(item.a for item in b.items) for b in batch]
+
+
+class TestPickle(unittest.TestCase):
+    def test_plain_only(self):
+        b = B(x=A(a=1), name='b1')
+        b.items.extend([A(a=1), A(a=-1)])
+        b.mapping['k'] = A(a='1')
+        b.items[0].a
+        data = pickle.dumps(b)
+        self.assertNotIn(b'ListProxy', data)
+        ret = pickle.loads(data)
+        self.assertEqual(b, ret)
+        self.assertEqual(b.as_plain(), ret.as_plain())
+        # nested components are pickled as roots
+        self.assertEqual(A(a=1), pickle.loads(pickle.dumps(b.items[0])))
+
+    def test_views(self):
+        b = B(x=A(a=2), name='b2')
+        b.items.extend([A(a=2), A(a=-2)])
+        b.mapping['k'] = A(a='2')
+        for view in (B.from_buffer(b.as_buffer()),
+                     B.from_json(b.as_json())):
+            view.items[1].a
+            ret = pickle.loads(pickle.dumps(view))
+            self.assertEqual(b.as_plain(), ret.as_plain())
+            self.assertIs(dict, type(ret.as_plain()['mapping']))
+
+
+class TestSharedBatch(unittest.TestCase):
+    def setUp(self):
+        self.batch = share(B, [B.from_plain({
+            'x': {'a': i}, 'items': [{'a': i}, {'a': -i}],
+            'mapping': {'k': {'a': str(i)}}, 'name': 'b{}'.format(i)})
+            for i in range(10)])
+        self.addCleanup(self.batch.unlink)
+
+    def test_access(self):
+        batch = self.batch
+        self.assertEqual(10, len(batch))
+        self.assertEqual({'x': {'a': 3}, 'items': [{'a': 3}, {'a': -3}],
+                          'mapping': {'k': {'a': '3'}}, 'name': 'b3'},
+                         batch[3].as_plain())
+        self.assertEqual('b9', batch[-1].name)
+        part = batch[2:5]
+        self.assertEqual(3, len(part))
+        self.assertEqual([2, 3, 4], [b.x.a for b in part])
+        self.assertEqual([4, 4, 2], [len(p) for p in batch.split(3)])
+        self.assertEqual([1, 1], [len(p) for p in batch[8:].split(3)])
+        with self.assertRaises(IndexError):
+            part[3]
+        with self.assertRaises(TypeError):
+            share(A, [B(x=A(a=0))])
+
+    def test_change(self):
+        b = self.batch[0]
+        b.items[0].a = 'x'
+        self.assertEqual('x', b.items[0].a)
+        self.assertEqual(0, self.batch[0].items[0].a)
+
+    def test_pickle(self):
+        part = self.batch[4:6]
+        data = pickle.dumps(part)
+        self.assertLess(len(data), 200)
+        ret = pickle.loads(data)
+        self.assertEqual([4, 5], [b.x.a for b in ret])
+        self.assertIn(part.name, _blocks)
+
+    def test_processes(self):
+        with ProcessPoolExecutor(2) as pool:
+            ret = list(pool.map(total, self.batch.split(3)))
+        self.assertEqual([list(range(0, 4)), list(range(4, 8)), [8, 9]],
+                         ret)
+
+    def test_close(self):
+        batch = share(A, [A(a=1)])
+        item = batch[0]
+        with self.assertRaises(BufferError):
+            batch.close()
+        del item
+        batch.close()
+        batch.unlink()
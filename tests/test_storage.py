@@ -0,0 +1,223 @@
+import json
+import os
+import random
+import unittest
+from copy import deepcopy
+from steward import (Component, Field, FieldComp, FieldList, FieldDict,
+                     diff, json_default)
+from steward.storage import SqliteStorage
+
+
+storage = SqliteStorage(cache_size=3, batch_size=4)
+
+
+class Point(Component):
+    x = Field()
+    y = Field(default=0)
+
+
+class A(Component):
+    a = Field()
+    point = FieldComp(Point, default=None)
+
+
+class B(Component):
+    items = FieldList(A, storage=storage)
+    mapping = FieldDict(A, storage=storage, cache='lru', cache_size=2)
+
+
+def stored(store):
+    # items as written to the database
+    store.flush()
+    table = store._table
+    order = 'pos' if table == 'items' else 'seq'
+    rows = store._db.execute(
+        'SELECT * FROM {} WHERE store = ? ORDER BY {}'.format(table, order),
+        (store._id,)).fetchall()
+    if table == 'items':
+        return [json.loads(row[-1]) for row in rows]
+    return {json.loads(row[1]): json.loads(row[-1]) for row in rows}
+
+
+class TestListStore(unittest.TestCase):
+    def test_random(self):
+        rnd = random.Random(5)
+        for run in range(20):
+            store = storage.list()
+            model = []
+            for step in range(60):
+                action = rnd.randrange(9)
+                size = len(model)
+                pos = rnd.randint(-size, size - 1) if size else 0
+                if action == 0:
+                    store.append(step)
+                    model.append(step)
+                elif action == 1:
+                    store.insert(pos, step)
+                    model.insert(pos, step)
+                elif action == 2 and size:
+                    del store[pos]
+                    del model[pos]
+                elif action == 3 and size:
+                    store[pos] = -step
+                    model[pos] = -step
+                elif action == 4:
+                    index = slice(rnd.randint(0, size), rnd.randint(0, size))
+                    items = list(range(rnd.randrange(3)))
+                    store[index] = items
+                    model[index] = items
+                elif action == 5:
+                    index = slice(rnd.randint(0, size), None, 2)
+                    del store[index]
+                    del model[index]
+                elif action == 6:
+                    store.extend([step, step])
+                    model.extend([step, step])
+                elif action == 7 and size:
+                    self.assertEqual(model.pop(pos), store.pop(pos))
+                elif action == 8 and size:
+                    self.assertEqual(model[pos], store[pos])
+                self.assertEqual(len(model), len(store))
+            self.assertEqual(model, list(store))
+            self.assertEqual(model, stored(store))
+            self.assertEqual(model[1:-1:2], store[1:-1:2])
+            if model:
+                self.assertEqual(model.index(model[-1]),
+                                 store.index(model[-1]))
+            store.clear()
+            self.assertEqual([], stored(store))
+
+    def test_copy(self):
+        store = storage.list([{'a': i} for i in range(5)])
+        item = store[4]
+        copy = store.copy()
+        self.assertIs(item, copy[4])
+        deep = deepcopy(store)
+        self.assertIsNot(item, deep[4])
+        copy.append({'a': 5})
+        self.assertEqual(5, len(store))
+        self.assertEqual(store[:], deep[:])
+        with self.assertRaises(ValueError):
+            store.index({'a': 7})
+
+
+class TestDictStore(unittest.TestCase):
+    def test_random(self):
+        rnd = random.Random(7)
+        store = storage.dict()
+        model = {}
+        for step in range(300):
+            key = rnd.choice(['a', 'b', 'c', 'd', 'e', 'f', 1, 2])
+            action = rnd.randrange(3)
+            if action == 0:
+                store[key] = [step]
+                model[key] = [step]
+            elif action == 1 and key in model:
+                del store[key]
+                del model[key]
+            elif action == 2:
+                self.assertEqual(model.get(key), store.get(key))
+            self.assertEqual(len(model), len(store))
+        self.assertEqual(list(model.items()), list(store.items()))
+        self.assertEqual(list(model.values()), list(store.values()))
+        self.assertEqual(model, stored(store))
+        self.assertEqual(model, dict(deepcopy(store)))
+        with self.assertRaises(KeyError):
+            del store['missing']
+
+
+class TestFields(unittest.TestCase):
+    def test_list(self):
+        b = B.from_plain({'items': [{'a': 0}]})
+        b.items.extend(A.from_plain({'a': i}) for i in range(1, 10))
+        store = b._plain_['items']
+        self.assertTrue(storage.owns(store))
+        for item in b.items.stream():
+            item.a *= 10
+        b.items[3].point = Point(x=1)
+        b.items[3].point.y = 2
+        b.items.insert(0, A.from_plain({'a': -1}))
+        b.items[1].a = 'first'
+        expected = [{'a': -1}, {'a': 'first'}] + \
+            [{'a': i * 10} for i in range(1, 10)]
+        expected[4]['point'] = {'x': 1, 'y': 2}
+        self.assertEqual(expected, stored(store))
+        self.assertEqual(expected, json.loads(json.dumps(
+            b.as_plain(), default=json_default))['items'])
+        del b.items[:5]
+        self.assertEqual(expected[5:], stored(store))
+        self.assertEqual([40, 50], [a.a for a in b.items[:2]])
+
+    def test_stream_then_insert(self):
+        b = B.from_plain({'items': [{'a': i} for i in range(3)]})
+        items = list(b.items.stream())
+        b.items.insert(0, A.from_plain({'a': -1}))
+        items[0].a = 'zero'
+        store = b._plain_['items']
+        self.assertEqual([{'a': -1}, {'a': 'zero'}, {'a': 1}, {'a': 2}],
+                         stored(store))
+
+    def test_dict(self):
+        b = B()
+        for key in 'abcde':
+            b.mapping[key] = A.from_plain({'a': key})
+        for key in 'abcde':
+            b.mapping[key].a += '!'
+        b.mapping['c'].point = Point(x=0)
+        del b.mapping['a']
+        expected = {key: {'a': key + '!'} for key in 'bcde'}
+        expected['c']['point'] = {'x': 0, 'y': 0}
+        self.assertEqual(expected, stored(b._plain_['mapping']))
+        self.assertEqual(['b', 'c', 'd', 'e'], list(b.mapping))
+
+    def test_clone(self):
+        b = B()
+        b.items.append(A.from_plain({'a': 1}))
+        for clone in (b.clone(), b.cow_clone()):
+            clone.items[0].a = 2
+            clone.items.append(A.from_plain({'a': 3}))
+            self.assertEqual([{'a': 2}, {'a': 3}],
+                             stored(clone._plain_['items']))
+            self.assertEqual([{'a': 1}], stored(b._plain_['items']))
+
+    def test_plain(self):
+        b = B.from_plain({'items': [{'a': 1}], 'mapping': {'k': {'a': 2}}})
+        b.items.append(A.from_plain({'a': 3}))
+        plain = {'items': [{'a': 1}, {'a': 3}], 'mapping': {'k': {'a': 2}}}
+        self.assertEqual(plain, json.loads(json.dumps(b.as_plain())))
+        self.assertEqual(plain['items'], b.items.as_plain())
+        self.assertIs(type(b.mapping.as_plain()), dict)
+        self.assertEqual([plain], B.as_plain_many([b]))
+
+    def test_compare(self):
+        b = B.from_plain({'items': [{'a': 1}, {'a': 2}]})
+        b.items[0].a = 10
+        clone = b.clone()
+        self.assertEqual(b, clone)
+        self.assertEqual([], diff(b, clone))
+        clone.items.append(A.from_plain({'a': 3}))
+        clone.items[1].a = 20
+        patch = diff(b, clone)
+        self.assertEqual(
+            [{'op': 'replace', 'path': '/items/1/a', 'value': 20},
+             {'op': 'add', 'path': '/items/2', 'value': {'a': 3}}], patch)
+        self.assertNotEqual(b, clone)
+        self.assertEqual(storage.list([1, 2]), [1, 2])
+
+    def test_iter(self):
+        b = B.from_plain({'items': [{'a': i} for i in range(5)]})
+        first = b.items[0]
+        items = list(b.items)
+        self.assertIs(first, items[0])
+        self.assertIs(items[3], b.items[3])
+        del items
+        self.assertEqual([0, 3], [i for i in range(5)
+                                  if b.items._child(i) is not None])
+
+    def test_close(self):
+        temp = SqliteStorage()
+        path = temp._close.peek()[2][1]
+        temp.list([1, 2])
+        self.assertTrue(os.path.exists(path))
+        temp.close()
+        self.assertFalse(os.path.exists(path))
@@ -0,0 +1,89 @@
+import io
+import json
+import unittest
+from steward import Component, Field, FieldList, Error
+from steward.stream import (iter_plain, iter_ndjson, iter_components,
+                            _Scanner)
+
+
+class A(Component):
+    a = Field()
+
+
+class B(Component):
+    items = FieldList(A)
+
+
+def dump(value):
+    return io.BytesIO(json.dumps(value).encode('utf-8'))
+
+
+class TestIterPlain(unittest.TestCase):
+    def test_top_level(self):
+        data = [1, 'a', {'b': [1, 2]}, None, True, -1.5e3, []]
+        self.assertEqual(data, list(iter_plain(dump(data))))
+
+    def test_empty(self):
+        self.assertEqual([], list(iter_plain(dump([]))))
+
+    def test_path(self):
+        doc = {'meta': {'x': '"]}'}, 'data': {'items': [1, 2]}, 'z': 0}
+        self.assertEqual([1, 2],
+                         list(iter_plain(dump(doc), ['data', 'items'])))
+        self.assertEqual([3], list(iter_plain(dump([[1], [3]]), [1])))
+
+    def test_small_chunks(self):
+        data = [{'s': 'ü\\"x' * i, 'n': i * 1.5} for i in range(50)]
+        raw = json.dumps({'skip': data, 'items': data},
+                         ensure_ascii=False).encode('utf-8')
+        for size in (1, 2, 5):
+            self.assertEqual(data, list(iter_plain(io.BytesIO(raw),
+                                                   ['items'], size)))
+
+    def test_key_not_found(self):
+        with self.assertRaisesRegex(Error, "Key 'items' not found"):
+            list(iter_plain(dump({'a': 1}), ['items']))
+
+    def test_not_array(self):
+        with self.assertRaisesRegex(Error, r"'\[' expected"):
+            list(iter_plain(dump({'a': 1}), ['a']))
+
+    def test_broken(self):
+        with self.assertRaises(ValueError):
+            list(iter_plain(io.BytesIO(b'[1, {"a": tru}, 3]' + b' ' * 100),
+                            chunk_size=4))
+
+    def test_memory_is_bounded(self):
+        item = {'payload': 'x' * 100}
+        raw = json.dumps({'items': [item] * 2000}).encode('utf-8')
+        scanner = _Scanner(io.BytesIO(raw), 64)
+        scanner.seek(['items'])
+        peak = 0
+        for value in scanner.items():
+            peak = max(peak, len(scanner.buf))
+        self.assertLess(peak, 1024)
+
+
+class TestNDJSON(unittest.TestCase):
+    def test_iter(self):
+        fp = io.BytesIO(b'{"a": 1}\n\n{"a": 2}\n')
+        self.assertEqual([{'a': 1}, {'a': 2}], list(iter_ndjson(fp)))
+
+
+class TestIterComponents(unittest.TestCase):
+    def test_field_list_payload(self):
+        b = B()
+        b.items.extend([A(a=1), A(a=2)])
+        ret = iter_components(A, dump(b.as_plain()), path=['items'])
+        self.assertEqual([1, 2], [i.a for i in ret])
+
+    def test_ndjson(self):
+        fp = io.BytesIO(b'{"a": 1}\n{"a": 2}\n')
+        ret = iter_components(A, fp, ndjson=True)
+        self.assertEqual([1, 2], [i.a for i in ret])
+
+    def test_validate(self):
+        ret = iter_components(A, dump([{'a': 1}, {}]), validate=True)
+        self.assertEqual(1, next(ret).a)
+        with self.assertRaisesRegex(Error, r"\[1\]: Missing params: 'a'"):
+            next(ret)
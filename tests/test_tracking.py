@@ -0,0 +1,269 @@
+import random
+import unittest
+from copy import deepcopy
+from steward import (Component, Field, FieldComp, FieldList, FieldDict,
+                     Tracker, Error)
+
+
+class A(Component):
+    a = Field()
+    b = Field(default=0)
+
+
+class B(Component):
+    x = FieldComp(A)
+    items = FieldList(A)
+    mapping = FieldDict(A)
+    name = Field(default='')
+
+
+class C(Component):
+    b = FieldComp(B)
+    n = Field(default=0)
+
+
+def parse(pointer):
+    ret = []
+    for key in pointer.split('/')[1:]:
+        ret.append(key.replace('~1', '/').replace('~0', '~'))
+    return ret
+
+
+def apply_patch(doc, patch):
+    for op in patch:
+        path = parse(op['path'])
+        target = doc
+        for key in path[:-1]:
+            target = target[int(key) if isinstance(target, list) else key]
+        key = path[-1]
+        if isinstance(target, list):
+            key = int(key)
+            if op['op'] == 'add':
+                target.insert(key, deepcopy(op['value']))
+            elif op['op'] == 'remove':
+                del target[key]
+            else:
+                target[key] = deepcopy(op['value'])
+        else:
+            if op['op'] == 'remove':
+                del target[key]
+            else:
+                target[key] = deepcopy(op['value'])
+    return doc
+
+
+def apply_merge(doc, delta):
+    for key, value in delta.items():
+        if value is None:
+            doc.pop(key, None)
+        elif isinstance(value, dict) and isinstance(doc.get(key), dict):
+            apply_merge(doc[key], value)
+        else:
+            doc[key] = deepcopy(value)
+    return doc
+
+
+class TestTracker(unittest.TestCase):
+    def test_field(self):
+        b = B(x=A(a=1))
+        b.items.extend([A(a=i) for i in range(3)])
+        b.mapping['k'] = A(a='k')
+        c = C(b=b)
+        with Tracker(c) as tracker:
+            c.n = 5
+            c.b.x.a = 2
+            self.assertTrue(tracker.dirty)
+            self.assertEqual([{'op': 'replace', 'path': '/n', 'value': 5},
+                              {'op': 'replace', 'path': '/b/x/a',
+                               'value': 2}],
+                             tracker.patch())
+            self.assertFalse(tracker.dirty)
+            self.assertEqual([], tracker.patch())
+
+    def test_list(self):
+        b = B(x=A(a=1))
+        b.items.extend([A(a=i) for i in range(3)])
+        b.mapping['k'] = A(a='k')
+        c = C(b=b)
+        tracker = Tracker(c)
+        c.b.items.insert(1, A(a='new'))
+        del c.b.items[0]
+        c.b.items[0].a = 'changed'
+        self.assertEqual(
+            [{'op': 'add', 'path': '/b/items/1',
+              'value': {'a': 'new', 'b': 0}},
+             {'op': 'remove', 'path': '/b/items/0'},
+             {'op': 'replace', 'path': '/b/items/0/a', 'value': 'changed'}],
+            tracker.patch())
+        tracker.close()
+
+    def test_list_stream(self):
+        b = B.from_plain({'x': {'a': 1}, 'items': [{'a': 0}, {'a': 1}]})
+        items = list(b.items.stream())
+        tracker = Tracker(b)
+        b.items.insert(0, A(a='new'))
+        items[0].a = 'changed'
+        self.assertEqual(
+            [{'op': 'add', 'path': '/items/0',
+              'value': {'a': 'new', 'b': 0}},
+             {'op': 'replace', 'path': '/items/1/a', 'value': 'changed'}],
+            tracker.patch())
+        tracker.close()
+
+    def test_dict(self):
+        b = B(x=A(a=1))
+        b.items.extend([A(a=i) for i in range(3)])
+        b.mapping['k'] = A(a='k')
+        c = C(b=b)
+        tracker = Tracker(c)
+        c.b.mapping['n'] = A(a='n')
+        del c.b.mapping['k']
+        self.assertEqual(
+            [{'op': 'add', 'path': '/b/mapping/n',
+              'value': {'a': 'n', 'b': 0}},
+             {'op': 'remove', 'path': '/b/mapping/k'}],
+            tracker.patch())
+        tracker.close()
+
+    def test_compaction(self):
+        b = B(x=A(a=1))
+        b.items.extend([A(a=i) for i in range(3)])
+        b.mapping['k'] = A(a='k')
+        c = C(b=b)
+        tracker = Tracker(c)
+        c.b.x.a = 2
+        c.b.x.a = 3
+        c.b.x = A(a=4)
+        self.assertEqual([{'op': 'replace', 'path': '/b/x',
+                           'value': {'a': 4, 'b': 0}}],
+                         tracker.patch())
+        tracker.close()
+
+    def test_value_is_copied(self):
+        b = B(x=A(a=1))
+        b.items.extend([A(a=i) for i in range(3)])
+        b.mapping['k'] = A(a='k')
+        c = C(b=b)
+        tracker = Tracker(c)
+        x = A(a=1)
+        c.b.x = x
+        x.a = 2
+        patch = tracker.patch()
+        self.assertEqual({'a': 1, 'b': 0}, patch[0]['value'])
+        self.assertEqual({'op': 'replace', 'path': '/b/x/a', 'value': 2},
+                         patch[1])
+        tracker.close()
+
+    def test_delta(self):
+        b = B(x=A(a=1))
+        b.items.extend([A(a=i) for i in range(3)])
+        b.mapping['k'] = A(a='k')
+        c = C(b=b)
+        tracker = Tracker(c)
+        c.b.x.a = 2
+        c.b.items[1].a = 'x'
+        del c.b.mapping['k']
+        self.assertEqual(
+            {'b': {'x': {'a': 2},
+                   'items': c.b.items.as_plain(),
+                   'mapping': {'k': None}}},
+            tracker.delta())
+        self.assertEqual({}, tracker.delta())
+        tracker.close()
+
+    def test_delta_plain(self):
+        c = C.from_plain({'b': {'x': {'a': 1},
+                                'items': [{'a': i} for i in range(3)]}})
+        tracker = Tracker(c)
+        c.b.name = 'b'
+        c.b.x = None
+        c.n = 1
+        self.assertEqual({'b': {'name': 'b', 'x': None}, 'n': 1},
+                         tracker.delta())
+        self.assertIsNone(c.b._child('items'))
+        tracker.close()
+
+    def test_escaping(self):
+        class D(Component):
+            d = FieldDict(A)
+
+        d = D()
+        tracker = Tracker(d)
+        d.d['a/b~c'] = A(a=1)
+        self.assertEqual('/d/a~1b~0c', tracker.patch()[0]['path'])
+        tracker.close()
+
+    def test_close(self):
+        b = B(x=A(a=1))
+        b.items.extend([A(a=i) for i in range(3)])
+        b.mapping['k'] = A(a='k')
+        c = C(b=b)
+        tracker = Tracker(c)
+        tracker.close()
+        self.assertFalse(c.b.items._watched_)
+        c.n = 1
+        self.assertFalse(tracker.dirty)
+        tracker = Tracker(c)
+        with self.assertRaises(Error):
+            Tracker(c)
+        tracker.close()
+
+    def test_nested_tracker(self):
+        b = B(x=A(a=1))
+        b.items.extend([A(a=i) for i in range(3)])
+        b.mapping['k'] = A(a='k')
+        c = C(b=b)
+        outer = Tracker(c)
+        inner = Tracker(c.b)
+        c.b.x.a = 5
+        self.assertEqual('/x/a', inner.patch()[0]['path'])
+        self.assertEqual('/b/x/a', outer.patch()[0]['path'])
+        outer.close()
+        c.b.x.a = 6
+        self.assertEqual('/x/a', inner.patch()[0]['path'])
+        inner.close()
+
+    def test_random(self):
+        rnd = random.Random(5)
+        for run in range(100):
+            b = B(x=A(a=1))
+            b.items.extend([A(a=i) for i in range(3)])
+            b.mapping['k'] = A(a='k')
+            c = C(b=b)
+            before = deepcopy(c.as_plain())
+            tracker = Tracker(c)
+            for step in range(rnd.randint(1, 15)):
+                items = c.b.items
+                action = rnd.randrange(12)
+                if action == 0:
+                    items.insert(rnd.randint(-1, len(items)), A(a=step))
+                elif action == 1 and len(items):
+                    del items[rnd.randrange(len(items))]
+                elif action == 2 and len(items):
+                    items[rnd.randrange(len(items))].a = step
+                elif action == 3:
+                    c.b.x.b = step
+                elif action == 4:
+                    items[1:3] = [A(a=step)
+                                  for i in range(rnd.randint(0, 3))]
+                elif action == 5:
+                    del items[::2]
+                elif action == 6:
+                    c.b.mapping[str(step % 3)] = A(a=step)
+                elif action == 7 and c.b.mapping:
+                    del c.b.mapping[next(iter(c.b.mapping))]
+                elif action == 8:
+                    items.extend(A(a=step, b=i)
+                                 for i in range(rnd.randint(0, 2)))
+                elif action == 9:
+                    items.sort(key='b', reverse=rnd.random() < 0.5)
+                elif action == 10:
+                    items.reverse()
+                elif action == 11 and rnd.random() < 0.2:
+                    items.clear()
+            after = c.as_plain()
+            self.assertEqual(after, apply_patch(deepcopy(before),
+                                                tracker.patch(reset=False)))
+            self.assertEqual(after, apply_merge(deepcopy(before),
+                                                tracker.delta()))
+            tracker.close()
@@ -0,0 +1,101 @@
+import unittest
+from steward import (Component, Field, FieldComp, FieldList, FieldDict,
+                     Error)
+
+
+class A(Component):
+    a = Field()
+    b = Field(default=1)
+    c = Field(maker=list)
+
+
+class B(Component):
+    x = FieldComp(A)
+    y = FieldList(A)
+    z = FieldDict(A)
+    n = FieldComp(A, default=None)
+
+
+class TestValidate(unittest.TestCase):
+    def test_ok(self):
+        A.validate_plain({'a': 1})
+        B.validate_plain({'x': {'a': 1},
+                          'y': [{'a': 2}],
+                          'z': {'k': {'a': 3}},
+                          'n': None})
+
+    def test_missing(self):
+        with self.assertRaisesRegex(Error, "Missing params: 'a'"):
+            A.validate_plain({'b': 2})
+        with self.assertRaisesRegex(Error, "Missing params: 'x'"):
+            B.validate_plain({})
+
+    def test_extra(self):
+        with self.assertRaisesRegex(Error, "Extra params: 'q'"):
+            A.validate_plain({'a': 1, 'q': 2})
+
+    def test_not_a_dict(self):
+        with self.assertRaisesRegex(Error, "a dict is required, got list"):
+            A.validate_plain([])
+
+    def test_nested_path(self):
+        with self.assertRaisesRegex(Error, r"^x: Missing params: 'a'$"):
+            B.validate_plain({'x': {}})
+        with self.assertRaisesRegex(Error, r"^y\[1\]: Extra params: 'q'$"):
+            B.validate_plain({'x': {'a': 1}, 'y': [{'a': 1}, {'a': 1,
+                                                              'q': 1}]})
+        try:
+            B.validate_plain({'x': {'a': 1}, 'z': {'k': {}}})
+        except Error as exc:
+            self.assertEqual(('z', 'k'), exc.path)
+            self.assertEqual("Missing params: 'a'", exc.reason)
+        else:
+            self.fail("Error is not raised")
+
+    def test_from_plain(self):
+        self.assertEqual(1, A.from_plain({'a': 1}, validate=True).a)
+        with self.assertRaises(Error):
+            A.from_plain({}, validate=True)
+
+    def test_custom_validator_is_kept(self):
+        class C(Component):
+            a = Field()
+
+            @classmethod
+            def validate_plain(cls, plainval):
+                raise Error("custom")
+
+        class D(C):
+            pass
+
+        with self.assertRaisesRegex(Error, "custom"):
+            D.from_plain({'a': 1}, validate=True)
+
+
+class TestCompiledInit(unittest.TestCase):
+    def test_compiled(self):
+        self.assertTrue(A.__init__._compiled_)
+        self.assertEqual({'a': 1, 'b': 1, 'c': []}, A(a=1).as_plain())
+        self.assertIsNot(A(a=1).c, A(a=1).c)
+
+    def test_positional_args(self):
+        with self.assertRaises(TypeError):
+            A(1)
+
+    def test_builtin_names(self):
+        class C(Component):
+            sorted = Field()
+            type = Field(default=None)
+
+        self.assertEqual({'sorted': 1, 'type': None}, C(sorted=1).as_plain())
+        with self.assertRaisesRegex(Error, "Extra params: 'x'"):
+            C(sorted=1, x=2)
+        with self.assertRaisesRegex(Error, "Missing params: 'sorted'"):
+            C()
+
+    def test_generic_fallback(self):
+        class C(Component):
+            __x__ = Field(default=1)
+
+        self.assertIs(Component.__init__, C.__init__)
+        self.assertEqual({'__x__': 1}, C().as_plain())